@@ -0,0 +1,52 @@
+from flask import Blueprint, Response
+from app.db.postgres import pool_stats, read_pool_stats
+from app.db.postgres_async import async_pool_stats
+from app.extensions import dbsql_pool_stats
+from app.services import metrics
+from app.services.interning import interning_stats
+
+metrics_bp = Blueprint("metrics", __name__)
+
+@metrics_bp.get("/metrics")
+def get_metrics():
+    """Statement, connection pool and IRI cache metrics in Prometheus text format"""
+    return Response(metrics.render(_pool_lines() + _interning_lines()), mimetype="text/plain; version=0.0.4")
+
+def _pool_lines() -> list:
+    # (pool, open, in use, max, waiting) from each pool's own statistics
+    pools = [
+        (f"warehouse:{s['http_path']}", s["size"], s["in_use"], s["max_size"], None)
+        for s in dbsql_pool_stats()
+    ]
+    lakebase = [("lakebase", pool_stats())] + read_pool_stats() + [("lakebase_async", async_pool_stats())]
+    for name, stats in lakebase:
+        if stats is not None:
+            in_use = stats.get("pool_size", 0) - stats.get("pool_available", 0)
+            pools.append((name, stats.get("pool_size", 0), in_use, stats.get("pool_max", 0),
+                          stats.get("requests_waiting", 0)))
+
+    lines = metrics.collected("db_pool_connections", "gauge", "Open connections per pool", ("pool",),
+                              [((name,), size) for name, size, _, _, _ in pools])
+    lines += metrics.collected("db_pool_in_use", "gauge", "Connections checked out per pool", ("pool",),
+                               [((name,), in_use) for name, _, in_use, _, _ in pools])
+    lines += metrics.collected("db_pool_max_connections", "gauge", "Configured pool size limit", ("pool",),
+                               [((name,), max_size) for name, _, _, max_size, _ in pools])
+    lines += metrics.collected("db_pool_utilisation", "gauge", "Checked out connections over the size limit",
+                               ("pool",), [((name,), in_use / max_size if max_size else 0.0)
+                                           for name, _, in_use, max_size, _ in pools])
+    lines += metrics.collected("db_pool_waiting_requests", "gauge", "Requests queued for a connection",
+                               ("pool",), [((name,), waiting) for name, _, _, _, waiting in pools
+                                           if waiting is not None])
+    lines += metrics.collected("db_pool_timeouts_total", "counter", "Checkouts that gave up waiting", ("pool",),
+                               [((f"warehouse:{s['http_path']}",), s["timeouts"]) for s in dbsql_pool_stats()])
+    return lines
+
+def _interning_lines() -> list:
+    stats = interning_stats()
+    lines = metrics.collected("iri_cache_hits_total", "counter", "IRI memo table hits", ("cache",),
+                              [((s["name"],), s["hits"]) for s in stats])
+    lines += metrics.collected("iri_cache_misses_total", "counter", "IRI memo table misses", ("cache",),
+                               [((s["name"],), s["misses"]) for s in stats])
+    lines += metrics.collected("iri_cache_entries", "gauge", "IRI memo table entries", ("cache",),
+                               [((s["name"],), s["size"]) for s in stats])
+    return lines
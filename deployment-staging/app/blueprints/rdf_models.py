@@ -154,7 +154,7 @@ def update_model(model_id: int):
         data = request.get_json() or {}
         
         # Check if model exists
-        existing_model = get_rdf_model(model_id=model_id)
+        existing_model = get_rdf_model(model_id=model_id, primary=True)
         if not existing_model:
             return jsonify({"error": "Model not found"}), 404
         
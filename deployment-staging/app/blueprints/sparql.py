@@ -0,0 +1,35 @@
+from flask import Blueprint, request, jsonify
+from app.services.sparql import run_query, QueryRejected
+from app.services.triple_store import QueryTimeout
+
+sparql_bp = Blueprint("sparql", __name__)
+
+SPARQL_JSON = 'application/sparql-results+json'
+
+def _query_text():
+    """Read the query per the SPARQL 1.1 protocol: ?query=, form field or raw body"""
+    if request.method == "GET":
+        return request.args.get('query')
+    if request.mimetype == 'application/sparql-query':
+        return request.get_data(as_text=True)
+    return request.form.get('query')
+
+@sparql_bp.route("/sparql", methods=["GET", "POST"])
+def sparql_query():
+    """Run a SELECT or ASK query against the latest graph and return SPARQL JSON results"""
+    text = _query_text()
+    if not text:
+        return jsonify({"error": "Missing required 'query' parameter", "status": "error"}), 400
+    try:
+        result, truncated = run_query(text)
+    except QueryRejected as e:
+        return jsonify({"error": str(e), "status": "error"}), 400
+    except QueryTimeout as e:
+        return jsonify({"error": str(e), "status": "timeout"}), 503
+    except Exception as e:
+        return jsonify({"error": str(e), "status": "error"}), 500
+
+    response = jsonify(result)
+    response.headers['Content-Type'] = SPARQL_JSON
+    response.headers['X-Result-Truncated'] = 'true' if truncated else 'false'
+    return response
@@ -1,36 +1,39 @@
-from flask import Blueprint, request, jsonify
-from databricks import sql as dbsql
-from databricks.sdk.core import Config
-from functools import lru_cache
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
+from datetime import datetime, timezone
+from itertools import chain
+import json
 import os
+from app.services.data_version import VersionedCache, make_etag, not_modified, tag_response, warehouse_table_version
+from app.services import telemetry_snapshot
+from app.services.telemetry import query_triples_telemetry, query_lakebase_telemetry
+from app.services.telemetry_anomalies import ANOMALY_STATS
+from app.services.telemetry_history import parse_sensors, query_history, stream_history_arrow, stream_raw_arrow
+from app.services.arrow_ipc import HAS_ARROW, ARROW_STREAM_MEDIA_TYPE
+from app.extensions import dbsql_connection, dbsql_pool_stats
+from app.services.parallel_queries import run_queries
+from app.config import Config as AppConfig
 
 telemetry_bp = Blueprint("telemetry", __name__)
 
-@lru_cache(maxsize=1)
-def get_dbsql_connection():
-    """Get a cached Databricks SQL connection"""
-    from app.config import Config as AppConfig
-    cfg = Config()  # Databricks config for authentication
+# Response payloads keyed by endpoint, invalidated when the source table version changes
+_payload_cache = VersionedCache()
 
-    return dbsql.connect(
-        server_hostname=cfg.host,
-        http_path=AppConfig.WAREHOUSE_HTTP,
-        credentials_provider=lambda: cfg.authenticate,
-    )
+# Debug endpoint payloads, additionally expiring after a short TTL
+_debug_cache = VersionedCache(ttl=lambda: current_app.config["DEBUG_CACHE_TTL_SECONDS"])
 
 @telemetry_bp.get("/telemetry/test")
 def test_connection():
     """Test the Databricks connection from backend"""
     try:
-        conn = get_dbsql_connection()
-        with conn.cursor() as cursor:
+        with dbsql_connection() as conn, conn.cursor() as cursor:
             cursor.execute("SELECT 1 as test")
             result = cursor.fetchone()
             if result and result[0] == 1:
                 return jsonify({
                     "status": "connected", 
                     "message": "Databricks connection successful",
-                    "backend": "available"
+                    "backend": "available",
+                    "pools": dbsql_pool_stats()
                 }), 200
             else:
                 return jsonify({
@@ -44,58 +47,38 @@ def test_connection():
             "backend": "available"
         }), 500
 
+@telemetry_bp.get("/telemetry/pool")
+def get_pool_stats():
+    """Warehouse connection pool sizes, waits and open/close counts"""
+    return jsonify({"pools": dbsql_pool_stats(), "status": "success"}), 200
+
 @telemetry_bp.get("/telemetry/latest")
 def get_latest_telemetry():
     """Get latest telemetry data through backend proxy"""
     try:
         # Get table configuration from environment or use defaults
-        from app.config import Config as AppConfig
         catalog = AppConfig.DATABRICKS_CATALOG
         schema = AppConfig.DATABRICKS_SCHEMA
         table = AppConfig.DATABRICKS_TABLE
         table_full_name = f"{catalog}.{schema}.{table}"
-        
-        conn = get_dbsql_connection()
-        with conn.cursor() as cursor:
-            query = f"""
-                SELECT 
-                    component_id,
-                    sensor_temperature as sensorAReading,
-                    sensor_pressure as sensorBReading, 
-                    sensor_vibration as sensorCReading,
-                    sensor_speed as sensorDReading,
-                    timestamp
-                FROM (
-                    SELECT *,
-                           ROW_NUMBER() OVER (PARTITION BY component_id ORDER BY timestamp DESC) as rn
-                    FROM {table_full_name}
-                    WHERE timestamp >= current_timestamp() - INTERVAL 30 DAYS
-                ) t
-                WHERE rn = 1
-                LIMIT 50
-            """
-            
-            cursor.execute(query)
-            rows = cursor.fetchall()
-            
-            result = []
-            for row in rows:
-                result.append({
-                    "componentID": row[0],
-                    "sensorAReading": float(row[1]) if row[1] is not None else 0.0,
-                    "sensorBReading": float(row[2]) if row[2] is not None else 0.0,
-                    "sensorCReading": float(row[3]) if row[3] is not None else 0.0,
-                    "sensorDReading": float(row[4]) if row[4] is not None else 0.0,
-                    "timestamp": row[5]
-                })
-            
-            return jsonify({
-                "data": result,
-                "count": len(result),
-                "table": table_full_name,
-                "status": "success"
-            }), 200
-            
+
+        # Bronze readings only: the synced Lakebase table holds triple-derived data
+        with dbsql_connection() as conn:
+            token = warehouse_table_version(conn, table_full_name)
+            if token:
+                # Readings also age out of the 30-day window without a new table
+                # version; keying on the hour drops them within an hour of doing so
+                token = f"{token}:{datetime.now(timezone.utc):%Y-%m-%dT%H}"
+            etag = make_etag(token, "telemetry/latest") if token else None
+            cached = not_modified(etag)
+            if cached:
+                return cached
+
+            payload = _payload_cache.get("latest", token)
+            if payload is None:
+                payload = _payload_cache.put("latest", token, _query_latest_telemetry(conn, table_full_name))
+        return tag_response(jsonify(payload), etag), 200
+
     except Exception as e:
         return jsonify({
             "error": str(e),
@@ -103,58 +86,113 @@ def get_latest_telemetry():
             "backend": "available"
         }), 500
 
+def _serve_from_lakebase(endpoint: str):
+    """Serve latest telemetry from the synced Lakebase table, or None to fall back to the warehouse"""
+    cfg = current_app.config
+    if not cfg["LAKEBASE_TELEMETRY_ENABLED"]:
+        return None
+    try:
+        result = query_lakebase_telemetry(cfg["PG_TRIPLE_TABLE"], cfg["LAKEBASE_TELEMETRY_MAX_STALENESS_SECONDS"])
+    except Exception as e:
+        current_app.logger.warning(f"Lakebase telemetry unavailable, falling back to the warehouse: {e}")
+        return None
+    if result is None:
+        current_app.logger.info("Synced table is stale, falling back to the warehouse")
+        return None
+    payload, version = result
+    etag = make_etag(version, endpoint)
+    return not_modified(etag) or tag_response(jsonify(payload), etag)
+
+def _query_latest_telemetry(conn, table_full_name: str) -> dict:
+    with conn.cursor() as cursor:
+        query = f"""
+            SELECT 
+                component_id,
+                sensor_temperature as sensorAReading,
+                sensor_pressure as sensorBReading, 
+                sensor_vibration as sensorCReading,
+                sensor_speed as sensorDReading,
+                timestamp
+            FROM (
+                SELECT *,
+                       ROW_NUMBER() OVER (PARTITION BY component_id ORDER BY timestamp DESC) as rn
+                FROM {table_full_name}
+                WHERE timestamp >= current_timestamp() - INTERVAL 30 DAYS
+            ) t
+            WHERE rn = 1
+            LIMIT 50
+        """
+        
+        cursor.execute(query)
+        rows = cursor.fetchall()
+        
+        result = []
+        for row in rows:
+            result.append({
+                "componentID": row[0],
+                "sensorAReading": float(row[1]) if row[1] is not None else 0.0,
+                "sensorBReading": float(row[2]) if row[2] is not None else 0.0,
+                "sensorCReading": float(row[3]) if row[3] is not None else 0.0,
+                "sensorDReading": float(row[4]) if row[4] is not None else 0.0,
+                "timestamp": row[5]
+            })
+        
+        return {
+            "data": result,
+            "count": len(result),
+            "table": table_full_name,
+            "status": "success"
+        }
+
 @telemetry_bp.get("/telemetry/debug")
 def debug_table_data():
     """Debug endpoint to check table structure and sample data"""
     try:
-        from app.config import Config as AppConfig
         catalog = AppConfig.DATABRICKS_CATALOG
         schema = AppConfig.DATABRICKS_SCHEMA
         table = AppConfig.DATABRICKS_TABLE
         table_full_name = f"{catalog}.{schema}.{table}"
 
-        conn = get_dbsql_connection()
-        with conn.cursor() as cursor:
-            # First, check table schema
-            cursor.execute(f"DESCRIBE {table_full_name}")
-            schema_info = cursor.fetchall()
-
-            # Check total row count
-            cursor.execute(f"SELECT COUNT(*) FROM {table_full_name}")
-            total_rows = cursor.fetchone()[0]
-
-            # Get sample data without time filter
-            sample_query = f"""
-                SELECT *
-                FROM {table_full_name}
-                ORDER BY timestamp DESC
-                LIMIT 5
-            """
-            cursor.execute(sample_query)
-            sample_data = cursor.fetchall()
-
-            # Check timestamp range
-            cursor.execute(f"""
-                SELECT
-                    MIN(timestamp) as oldest,
-                    MAX(timestamp) as newest,
-                    COUNT(*) as total_records
-                FROM {table_full_name}
-            """)
-            timestamp_info = cursor.fetchone()
-
-            return jsonify({
+        with dbsql_connection() as conn:
+            token = warehouse_table_version(conn, table_full_name)
+        payload = _debug_cache.get(("debug", table_full_name), token)
+        if payload is None:
+            # Independent queries run concurrently, so the page costs the slowest one
+            results = run_queries({
+                # Table schema
+                "schema": (f"DESCRIBE {table_full_name}", "all"),
+                # Total row count
+                "total_rows": (f"SELECT COUNT(*) FROM {table_full_name}", "one"),
+                # Sample data without time filter
+                "sample": (f"""
+                    SELECT *
+                    FROM {table_full_name}
+                    ORDER BY timestamp DESC
+                    LIMIT 5
+                """, "all"),
+                # Timestamp range
+                "timestamp_range": (f"""
+                    SELECT
+                        MIN(timestamp) as oldest,
+                        MAX(timestamp) as newest,
+                        COUNT(*) as total_records
+                    FROM {table_full_name}
+                """, "one"),
+            })
+            timestamp_info = results["timestamp_range"]
+            payload = _debug_cache.put(("debug", table_full_name), token, {
                 "table": table_full_name,
-                "total_rows": total_rows,
-                "schema": [{"column": row[0], "type": row[1]} for row in schema_info],
-                "sample_data": [list(row) for row in sample_data],
+                "total_rows": results["total_rows"][0],
+                "schema": [{"column": row[0], "type": row[1]} for row in results["schema"]],
+                "sample_data": [list(row) for row in results["sample"]],
                 "timestamp_range": {
                     "oldest": timestamp_info[0],
                     "newest": timestamp_info[1],
                     "total_records": timestamp_info[2]
                 },
                 "status": "success"
-            }), 200
+            })
+        return jsonify(payload), 200
 
     except Exception as e:
         return jsonify({
@@ -170,84 +208,79 @@ def debug_triples_table():
         # Use the triple table from environment configuration
         triple_table = os.getenv('TRIPLE_TABLE_FULL_NAME') or 'main.deba.latest_sensor_triples'
 
-        conn = get_dbsql_connection()
-        with conn.cursor() as cursor:
-            # Check if table exists and get schema
-            try:
-                cursor.execute(f"DESCRIBE {triple_table}")
-                schema_info = cursor.fetchall()
-
-                # Get total row count
-                cursor.execute(f"SELECT COUNT(*) FROM {triple_table}")
-                total_rows = cursor.fetchone()[0]
-
-                # Get sample triples to understand structure
-                cursor.execute(f"""
+        with dbsql_connection() as conn:
+            token = warehouse_table_version(conn, triple_table)
+        payload = _debug_cache.get(("triples/debug", triple_table), token)
+        if payload is not None:
+            return jsonify(payload), 200
+
+        # Check if table exists and get schema
+        try:
+            results = run_queries({
+                "schema": (f"DESCRIBE {triple_table}", "all"),
+                # Total row count
+                "total_rows": (f"SELECT COUNT(*) FROM {triple_table}", "one"),
+                # Sample triples to understand structure
+                "sample_triples": (f"""
                     SELECT s, p, o, timestamp
                     FROM {triple_table}
                     ORDER BY timestamp DESC
                     LIMIT 20
-                """)
-                sample_triples = cursor.fetchall()
-
-                # Get unique predicates to understand what properties are available
-                cursor.execute(f"""
+                """, "all"),
+                # Unique predicates to understand what properties are available
+                "predicates": (f"""
                     SELECT DISTINCT p, COUNT(*) as count
                     FROM {triple_table}
                     GROUP BY p
                     ORDER BY count DESC
-                """)
-                predicates = cursor.fetchall()
-
-                # Get unique subjects that look like components
-                cursor.execute(f"""
+                """, "all"),
+                # Unique subjects that look like components
+                "components": (f"""
                     SELECT DISTINCT s
                     FROM {triple_table}
                     WHERE s LIKE '%component%' OR s LIKE '%Component%'
                     LIMIT 20
-                """)
-                components = cursor.fetchall()
-
-                # Get sensor-related triples (temperature, pressure, vibration, speed)
-                cursor.execute(f"""
+                """, "all"),
+                # Sensor-related triples (temperature, pressure, vibration, speed)
+                "sensor_triples": (f"""
                     SELECT s, p, o, timestamp
                     FROM {triple_table}
                     WHERE p LIKE '%sensor%' OR p LIKE '%temperature%' OR p LIKE '%pressure%' OR p LIKE '%vibration%' OR p LIKE '%speed%'
                     ORDER BY timestamp DESC
                     LIMIT 10
-                """)
-                sensor_triples = cursor.fetchall()
-
-                return jsonify({
-                    "table": triple_table,
-                    "total_rows": total_rows,
-                    "schema": [{"column": row[0], "type": row[1]} for row in schema_info],
-                    "sample_triples": [{
-                        "subject": row[0],
-                        "predicate": row[1],
-                        "object": row[2],
-                        "timestamp": str(row[3])
-                    } for row in sample_triples],
-                    "predicates": [{
-                        "predicate": row[0],
-                        "count": row[1]
-                    } for row in predicates],
-                    "components": [row[0] for row in components],
-                    "sensor_triples": [{
-                        "subject": row[0],
-                        "predicate": row[1],
-                        "object": row[2],
-                        "timestamp": str(row[3])
-                    } for row in sensor_triples],
-                    "status": "success"
-                }), 200
-
-            except Exception as table_error:
-                return jsonify({
-                    "table": triple_table,
-                    "error": f"Table access failed: {str(table_error)}",
-                    "status": "table_not_found"
-                }), 404
+                """, "all"),
+            })
+        except Exception as table_error:
+            return jsonify({
+                "table": triple_table,
+                "error": f"Table access failed: {str(table_error)}",
+                "status": "table_not_found"
+            }), 404
+
+        payload = _debug_cache.put(("triples/debug", triple_table), token, {
+            "table": triple_table,
+            "total_rows": results["total_rows"][0],
+            "schema": [{"column": row[0], "type": row[1]} for row in results["schema"]],
+            "sample_triples": [{
+                "subject": row[0],
+                "predicate": row[1],
+                "object": row[2],
+                "timestamp": str(row[3])
+            } for row in results["sample_triples"]],
+            "predicates": [{
+                "predicate": row[0],
+                "count": row[1]
+            } for row in results["predicates"]],
+            "components": [row[0] for row in results["components"]],
+            "sensor_triples": [{
+                "subject": row[0],
+                "predicate": row[1],
+                "object": row[2],
+                "timestamp": str(row[3])
+            } for row in results["sensor_triples"]],
+            "status": "success"
+        })
+        return jsonify(payload), 200
 
     except Exception as e:
         return jsonify({
@@ -261,8 +294,7 @@ def get_component_sensor_mappings():
     try:
         triple_table = os.getenv('TRIPLE_TABLE_FULL_NAME') or 'main.deba.latest_sensor_triples'
 
-        conn = get_dbsql_connection()
-        with conn.cursor() as cursor:
+        with dbsql_connection() as conn, conn.cursor() as cursor:
             # Get latest sensor readings for components
             cursor.execute(f"""
                 WITH latest_triples AS (
@@ -319,88 +351,276 @@ def get_triples_based_telemetry():
     try:
         triple_table = os.getenv('TRIPLE_TABLE_FULL_NAME') or 'main.deba.latest_sensor_triples'
 
-        conn = get_dbsql_connection()
-        with conn.cursor() as cursor:
-            # Get latest sensor readings for all components in standard format
-            cursor.execute(f"""
-                WITH latest_sensor_triples AS (
-                    SELECT
-                        s as component_uri,
-                        p as sensor_property,
-                        CAST(o AS DOUBLE) as sensor_value,
-                        timestamp,
-                        ROW_NUMBER() OVER (PARTITION BY s, p ORDER BY timestamp DESC) as rn
-                    FROM {triple_table}
-                    WHERE p IN (
-                        'http://example.com/factory/pred/sensor_temperature',
-                        'http://example.com/factory/pred/sensor_pressure',
-                        'http://example.com/factory/pred/sensor_vibration',
-                        'http://example.com/factory/pred/sensor_speed',
-                        'http://example.com/factory/pred/sensor_rotation',
-                        'http://example.com/factory/pred/sensor_flow'
-                    )
-                    AND s LIKE 'http://example.com/factory/component-%'
-                    AND o != 'None'
-                    AND o IS NOT NULL
-                )
-                SELECT component_uri, sensor_property, sensor_value, timestamp
-                FROM latest_sensor_triples
-                WHERE rn = 1
-                ORDER BY component_uri, sensor_property
-            """)
+        # The snapshot already prefers fresh Lakebase data inside its refresher
+        if current_app.config["TELEMETRY_SNAPSHOT_ENABLED"]:
+            telemetry_snapshot.start_refresher(current_app._get_current_object(), triple_table)
+            if telemetry_snapshot.peek_snapshot() is None:
+                # Cold: answer from Lakebase directly rather than wait for the first refresh
+                served = _serve_from_lakebase("telemetry/triples")
+                if served is not None:
+                    return served
+            return _serve_telemetry_snapshot()
+
+        served = _serve_from_lakebase("telemetry/triples")
+        if served is not None:
+            return served
+
+        with dbsql_connection() as conn:
+            token = warehouse_table_version(conn, triple_table)
+            etag = make_etag(token, "telemetry/triples") if token else None
+            cached = not_modified(etag)
+            if cached:
+                return cached
+
+            payload = _payload_cache.get("triples", token)
+            if payload is None:
+                payload = _payload_cache.put("triples", token, query_triples_telemetry(conn, triple_table))
+        return tag_response(jsonify(payload), etag), 200
 
-            sensor_data = cursor.fetchall()
+    except Exception as e:
+        return jsonify({
+            "error": str(e),
+            "status": "error",
+            "source": "rdf_triples"
+        }), 500
 
-            # Transform to expected frontend format
-            components = {}
-            for row in sensor_data:
-                component_uri = row[0]
-                sensor_property = row[1]
-                sensor_value = row[2]
-                timestamp = row[3]
+def _serve_telemetry_snapshot():
+    # The background refresher is the only thread that queries the warehouse
+    snapshot = telemetry_snapshot.get_snapshot(current_app.config["TELEMETRY_SNAPSHOT_WAIT_SECONDS"])
+    if snapshot is None:
+        return jsonify({
+            "error": "Telemetry snapshot not available yet",
+            "status": "error",
+            "source": "rdf_triples"
+        }), 503
+    response = not_modified(snapshot.etag) or tag_response(jsonify(snapshot.payload), snapshot.etag)
+    response.headers['X-Snapshot-Age'] = f"{snapshot.age:.3f}"
+    return response
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@telemetry_bp.get("/telemetry/stream")
+def stream_telemetry():
+    """Server-Sent Events: one full snapshot, then only changed sensor readings.
+
+    Components and sensors that drop out of the snapshot are sent as delta
+    entries with "removed": true.
+
+    Optional `component` query parameters (repeated or comma-separated) limit the
+    stream to those component IDs.
+    """
+    cfg = current_app.config
+    components = [c for value in request.args.getlist('component') for c in value.split(',') if c]
+    triple_table = os.getenv('TRIPLE_TABLE_FULL_NAME') or 'main.deba.latest_sensor_triples'
+
+    telemetry_snapshot.start_refresher(current_app._get_current_object(), triple_table)
+    # Subscribe before reading the snapshot so no change falls between the two
+    subscriber = telemetry_snapshot.subscribe(components)
+    snapshot = telemetry_snapshot.get_snapshot(cfg["TELEMETRY_SNAPSHOT_WAIT_SECONDS"])
+    if snapshot is None:
+        telemetry_snapshot.unsubscribe(subscriber)
+        return jsonify({
+            "error": "Telemetry snapshot not available yet",
+            "status": "error"
+        }), 503
+    keepalive = cfg["TELEMETRY_STREAM_KEEPALIVE_SECONDS"]
+
+    def events():
+        try:
+            yield _sse("snapshot", subscriber.select(snapshot.payload["data"]))
+            while True:
+                event = subscriber.next_event(keepalive)
+                if event is None:
+                    yield ": keepalive\n\n"
+                else:
+                    yield _sse(*event)
+        finally:
+            telemetry_snapshot.unsubscribe(subscriber)
+
+    return Response(stream_with_context(events()), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
+
+def _wants_arrow() -> bool:
+    """True when the client prefers an Arrow IPC stream over JSON"""
+    return HAS_ARROW and request.accept_mimetypes.best_match(
+        ['application/json', ARROW_STREAM_MEDIA_TYPE]) == ARROW_STREAM_MEDIA_TYPE
+
+def _arrow_response(chunks) -> Response:
+    return Response(stream_with_context(chunks), 200, {'Content-Type': ARROW_STREAM_MEDIA_TYPE, 'Vary': 'Accept'})
+
+def _parse_window():
+    """Return (start, end, components) from the query string, raising ValueError if invalid"""
+    try:
+        start = datetime.fromisoformat(request.args.get('from', ''))
+        end = datetime.fromisoformat(request.args.get('to', ''))
+    except ValueError:
+        raise ValueError("'from' and 'to' must be ISO 8601 timestamps")
+    try:
+        if start >= end:
+            raise ValueError("'from' must be earlier than 'to'")
+    except TypeError:
+        raise ValueError("'from' and 'to' must both include a UTC offset, or both omit it")
+    components = [c for value in request.args.getlist('component') for c in value.split(',') if c]
+    return start, end, components
+
+def _bronze_table() -> str:
+    cfg = current_app.config
+    return f"{cfg['DATABRICKS_CATALOG']}.{cfg['DATABRICKS_SCHEMA']}.{cfg['DATABRICKS_TABLE']}"
+
+@telemetry_bp.get("/telemetry/history")
+def get_telemetry_history():
+    """Sensor history between `from` and `to`, downsampled to at most `points` samples per series.
+
+    Clients accepting application/vnd.apache.arrow.stream get the min/max/avg
+    buckets as Arrow record batches straight from the warehouse.
+    """
+    cfg = current_app.config
+    try:
+        start, end, components = _parse_window()
+        points = int(request.args.get('points', cfg["TELEMETRY_HISTORY_DEFAULT_POINTS"]))
+        sensors = parse_sensors(request.args.getlist('sensor'))
+    except ValueError as e:
+        return jsonify({"error": str(e), "status": "error"}), 400
+    if not 2 <= points <= cfg["TELEMETRY_HISTORY_MAX_POINTS"]:
+        return jsonify({
+            "error": f"'points' must be between 2 and {cfg['TELEMETRY_HISTORY_MAX_POINTS']}",
+            "status": "error"
+        }), 400
+    method = request.args.get('method', 'minmax')
+    if method not in ('minmax', 'lttb'):
+        return jsonify({"error": "'method' must be 'minmax' or 'lttb'", "status": "error"}), 400
 
-                # Extract component ID from URI (e.g., component-111 -> 111)
-                component_id = component_uri.split('component-')[-1]
-
-                if component_id not in components:
-                    components[component_id] = {
-                        "componentID": component_id,
-                        "sensorAReading": 0.0,  # Temperature
-                        "sensorBReading": 0.0,  # Pressure
-                        "sensorCReading": 0.0,  # Vibration
-                        "sensorDReading": 0.0,  # Speed
-                        "timestamp": str(timestamp)
-                    }
+    try:
+        if _wants_arrow():
+            chunks = stream_history_arrow(_bronze_table(), start, end, points, components, sensors)
+            # Pull the first chunk eagerly so query errors still surface as a 500
+            first = next(chunks, b"")
+            return _arrow_response(chain([first], chunks))
+        with dbsql_connection() as conn:
+            payload = query_history(conn, _bronze_table(), start, end, points, components, sensors, method)
+        return jsonify(payload), 200
+    except Exception as e:
+        return jsonify({
+            "error": str(e),
+            "status": "error"
+        }), 500
 
-                # Map sensor properties to frontend expected format
-                if 'sensor_temperature' in sensor_property:
-                    components[component_id]["sensorAReading"] = float(sensor_value)
-                elif 'sensor_pressure' in sensor_property:
-                    components[component_id]["sensorBReading"] = float(sensor_value)
-                elif 'sensor_vibration' in sensor_property:
-                    components[component_id]["sensorCReading"] = float(sensor_value)
-                elif 'sensor_speed' in sensor_property:
-                    components[component_id]["sensorDReading"] = float(sensor_value)
+@telemetry_bp.get("/telemetry/export")
+def export_telemetry():
+    """Raw bronze rows between `from` and `to` as an Arrow IPC stream, for notebooks and bulk pulls"""
+    if not _wants_arrow():
+        return jsonify({
+            "error": f"Not acceptable, this endpoint only serves {ARROW_STREAM_MEDIA_TYPE}",
+            "status": "error"
+        }), 406
+    try:
+        start, end, components = _parse_window()
+    except ValueError as e:
+        return jsonify({"error": str(e), "status": "error"}), 400
+    try:
+        chunks = stream_raw_arrow(_bronze_table(), start, end, components)
+        first = next(chunks, b"")
+        return _arrow_response(chain([first], chunks))
+    except Exception as e:
+        return jsonify({
+            "error": str(e),
+            "status": "error"
+        }), 500
 
-            telemetry_data = list(components.values())
+@telemetry_bp.get("/telemetry/components")
+def get_components_telemetry():
+    """Latest readings of the components listed in `ids` (comma-separated or repeated)"""
+    cfg = current_app.config
+    ids = list(dict.fromkeys(c for value in request.args.getlist('ids') for c in value.split(',') if c))
+    if not ids:
+        return jsonify({"error": "Missing required 'ids' query parameter", "status": "error"}), 400
+    if len(ids) > cfg["TELEMETRY_COMPONENTS_MAX_IDS"]:
+        return jsonify({
+            "error": f"At most {cfg['TELEMETRY_COMPONENTS_MAX_IDS']} component ids per request",
+            "status": "error"
+        }), 400
+    triple_table = os.getenv('TRIPLE_TABLE_FULL_NAME') or 'main.deba.latest_sensor_triples'
 
-            return jsonify({
-                "data": telemetry_data,
-                "count": len(telemetry_data),
-                "table": triple_table,
-                "source": "rdf_triples",
-                "status": "success",
-                "mapping": {
-                    "sensorAReading": "sensor_temperature",
-                    "sensorBReading": "sensor_pressure",
-                    "sensorCReading": "sensor_vibration",
-                    "sensorDReading": "sensor_speed"
-                }
-            }), 200
+    try:
+        snapshot = telemetry_snapshot.peek_snapshot() if cfg["TELEMETRY_SNAPSHOT_ENABLED"] else None
+        if snapshot is not None:
+            index, source = snapshot.by_component, "snapshot"
+        else:
+            if cfg["TELEMETRY_SNAPSHOT_ENABLED"]:
+                # Warm the snapshot for later calls, and answer this one with a filtered query
+                telemetry_snapshot.start_refresher(current_app._get_current_object(), triple_table)
+            payload = _query_components(ids, triple_table)
+            index, source = {row["componentID"]: row for row in payload["data"]}, payload["source"]
+
+        data = [index[c] for c in ids if c in index]
+        return jsonify({
+            "data": data,
+            "count": len(data),
+            "missing": [c for c in ids if c not in index],
+            "source": source,
+            "status": "success"
+        }), 200
 
     except Exception as e:
         return jsonify({
             "error": str(e),
-            "status": "error",
-            "source": "rdf_triples"
+            "status": "error"
+        }), 500
+
+def _query_components(ids: list, triple_table: str) -> dict:
+    # Component filter pushed into SQL, Lakebase first like the other latest-value endpoints
+    cfg = current_app.config
+    if cfg["LAKEBASE_TELEMETRY_ENABLED"]:
+        try:
+            result = query_lakebase_telemetry(
+                cfg["PG_TRIPLE_TABLE"], cfg["LAKEBASE_TELEMETRY_MAX_STALENESS_SECONDS"], ids)
+            if result is not None:
+                return result[0]
+        except Exception as e:
+            current_app.logger.warning(f"Lakebase telemetry unavailable, falling back to the warehouse: {e}")
+    with dbsql_connection() as conn:
+        return query_triples_telemetry(conn, triple_table, ids)
+
+@telemetry_bp.get("/telemetry/anomalies")
+def get_telemetry_anomalies():
+    """Sensors whose latest reading deviates from their running baseline.
+
+    Optional query parameters: `component` (repeated or comma-separated),
+    `threshold` (|z-score|, default TELEMETRY_ANOMALY_Z_THRESHOLD) and `all=true`
+    to return the statistics of every sensor rather than only flagged ones.
+    """
+    cfg = current_app.config
+    if ANOMALY_STATS is None:
+        return jsonify({"error": "Anomaly statistics require NumPy", "status": "error"}), 501
+    if not cfg["TELEMETRY_SNAPSHOT_ENABLED"]:
+        # The baselines are only fed by the snapshot refresher
+        return jsonify({"error": "Anomaly statistics require TELEMETRY_SNAPSHOT_ENABLED", "status": "error"}), 501
+    components = [c for value in request.args.getlist('component') for c in value.split(',') if c]
+    include_all = request.args.get('all', 'false').lower() == 'true'
+    try:
+        threshold = float(request.args.get('threshold', cfg["TELEMETRY_ANOMALY_Z_THRESHOLD"]))
+    except ValueError:
+        return jsonify({"error": "'threshold' must be a number", "status": "error"}), 400
+    triple_table = os.getenv('TRIPLE_TABLE_FULL_NAME') or 'main.deba.latest_sensor_triples'
+
+    try:
+        # Baselines are fed by the snapshot refresher, one vectorised update per new snapshot
+        telemetry_snapshot.start_refresher(current_app._get_current_object(), triple_table)
+        data = ANOMALY_STATS.anomalies(threshold, cfg["TELEMETRY_ANOMALY_MIN_SAMPLES"], components, include_all)
+        return jsonify({
+            "data": data,
+            "count": len(data),
+            "threshold": threshold,
+            "minSamples": cfg["TELEMETRY_ANOMALY_MIN_SAMPLES"],
+            "updates": ANOMALY_STATS.updates,
+            "status": "success"
+        }), 200
+
+    except Exception as e:
+        return jsonify({
+            "error": str(e),
+            "status": "error"
         }), 500
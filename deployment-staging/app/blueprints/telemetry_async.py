@@ -0,0 +1,90 @@
+import os
+from flask import current_app
+from werkzeug.http import parse_etags
+from app.extensions import run_dbsql
+from app.services import telemetry_snapshot
+from app.services.telemetry import query_triples_telemetry, query_lakebase_telemetry_async
+
+# Async counterparts of the telemetry endpoints, served by asgi.py. Handlers take
+# the parsed query string ({name: [values]}) and the lower-cased request headers,
+# and return (status, JSON body) or (status, JSON body or None, response headers).
+
+
+def _triple_table() -> str:
+    return os.getenv('TRIPLE_TABLE_FULL_NAME') or 'main.deba.latest_sensor_triples'
+
+async def _latest_payload(components=None) -> dict:
+    # Lakebase on the async pool first, then the warehouse off the event loop
+    cfg = current_app.config
+    if cfg["LAKEBASE_TELEMETRY_ENABLED"]:
+        try:
+            result = await query_lakebase_telemetry_async(
+                cfg["PG_TRIPLE_TABLE"], cfg["LAKEBASE_TELEMETRY_MAX_STALENESS_SECONDS"], components)
+            if result is not None:
+                return result[0]
+        except Exception as e:
+            current_app.logger.warning(f"Lakebase telemetry unavailable, falling back to the warehouse: {e}")
+    return await run_dbsql(query_triples_telemetry, _triple_table(), components)
+
+async def get_triples_based_telemetry(args: dict, headers: dict):
+    """Latest reading of every component, as /api/telemetry/triples.
+
+    Served from the shared telemetry snapshot with its ETag once it is warm;
+    while it is cold the refresher is started and this request queries directly.
+    """
+    cfg = current_app.config
+    try:
+        if cfg["TELEMETRY_SNAPSHOT_ENABLED"]:
+            telemetry_snapshot.start_refresher(current_app._get_current_object(), _triple_table())
+            snapshot = telemetry_snapshot.peek_snapshot()
+            if snapshot is not None:
+                cache_headers = {
+                    "ETag": f'"{snapshot.etag}"',
+                    "Cache-Control": "no-cache",
+                    "X-Snapshot-Age": f"{snapshot.age:.3f}",
+                }
+                if parse_etags(headers.get("if-none-match")).contains(snapshot.etag):
+                    return 304, None, cache_headers
+                return 200, snapshot.payload, cache_headers
+        return 200, await _latest_payload()
+    except Exception as e:
+        return 500, {"error": str(e), "status": "error", "source": "rdf_triples"}
+
+async def get_components_telemetry(args: dict, headers: dict):
+    """Latest readings of the components listed in `ids`, as /api/telemetry/components"""
+    cfg = current_app.config
+    ids = list(dict.fromkeys(c for value in args.get('ids', []) for c in value.split(',') if c))
+    if not ids:
+        return 400, {"error": "Missing required 'ids' query parameter", "status": "error"}
+    if len(ids) > cfg["TELEMETRY_COMPONENTS_MAX_IDS"]:
+        return 400, {
+            "error": f"At most {cfg['TELEMETRY_COMPONENTS_MAX_IDS']} component ids per request",
+            "status": "error"
+        }
+
+    try:
+        snapshot = telemetry_snapshot.peek_snapshot() if cfg["TELEMETRY_SNAPSHOT_ENABLED"] else None
+        if snapshot is not None:
+            index, source = snapshot.by_component, "snapshot"
+        else:
+            payload = await _latest_payload(ids)
+            index, source = {row["componentID"]: row for row in payload["data"]}, payload["source"]
+
+        data = [index[c] for c in ids if c in index]
+        return 200, {
+            "data": data,
+            "count": len(data),
+            "missing": [c for c in ids if c not in index],
+            "source": source,
+            "status": "success"
+        }
+
+    except Exception as e:
+        return 500, {"error": str(e), "status": "error"}
+
+
+# Path under the /api/async prefix -> handler
+routes = {
+    "/telemetry/triples": get_triples_based_telemetry,
+    "/telemetry/components": get_components_telemetry,
+}
@@ -1,17 +1,103 @@
-from flask import Blueprint, request
-from app.services.triples import fetch_postgres, fetch_dbsql
+from datetime import datetime
+from itertools import chain
+from flask import Blueprint, Response, request, current_app, stream_with_context, jsonify
+from app.services.triples import fetch_postgres, fetch_dbsql, diff_dbsql, TripleFilter
+from app.services.snapshot import get_snapshot
+from app.services.rdf_writer import FORMATS, write_ntriples
+from app.services.pit_cache import normalize_timestamp
+from app.services.data_version import make_etag, not_modified, tag_response, synced_table_version
 
 triples_bp = Blueprint("triples", __name__)
 
+def _negotiate():
+    """Pick the response media type from the Accept header, defaulting to Turtle"""
+    if not request.accept_mimetypes:
+        return 'text/turtle'
+    return request.accept_mimetypes.best_match(list(FORMATS))
+
+def _not_acceptable():
+    return f"Not acceptable, supported media types: {', '.join(FORMATS)}", 406
+
+def _abort_on_error(chunks, media_type: str):
+    """Yield `chunks`, logging and re-raising a failure that happens after the 200 went out.
+
+    The exception makes the server drop the connection before the terminating
+    chunk, so the client sees an incomplete transfer rather than a shorter graph
+    that parses cleanly.
+    """
+    sent = 0
+    try:
+        for chunk in chunks:
+            sent += len(chunk)
+            yield chunk
+    except Exception as e:
+        current_app.logger.error(f"Aborting {media_type} response to {request.path} after {sent} bytes: {e}")
+        raise
+
+def _stream_response(chunks, media_type: str, etag: str = None) -> Response:
+    # Pull the first chunk eagerly so query errors still surface as a 500
+    # instead of a truncated 200 response
+    first = next(chunks, "")
+    headers = {'Content-Type': FORMATS[media_type][1], 'Vary': 'Accept'}
+    body = stream_with_context(_abort_on_error(chain([first], chunks), media_type))
+    return tag_response(Response(body, 200, headers), etag)
+
 @triples_bp.get("/latest")
 def latest_triples():
-    result = fetch_postgres()
-    return result, 200, {'Content-Type': 'text/turtle; charset=utf-8'}
+    media_type = _negotiate()
+    if media_type is None:
+        return _not_acceptable()
+    triple_filter = TripleFilter.from_args(request.args)
+    if triple_filter:
+        # Subgraphs are selected in the database, bypassing the full-graph snapshot
+        return _stream_response(fetch_postgres(media_type, triple_filter), media_type)
+    if not current_app.config["LATEST_SNAPSHOT_ENABLED"]:
+        etag = make_etag(synced_table_version(current_app.config["PG_TRIPLE_TABLE"]), media_type)
+        return not_modified(etag) or _stream_response(fetch_postgres(media_type), media_type, etag)
+    snapshot = get_snapshot()
+    etag = make_etag(snapshot.version, media_type)
+    response = not_modified(etag) or _stream_response(snapshot.serialize(media_type), media_type, etag)
+    response.headers['X-Snapshot-Age'] = f"{snapshot.age:.3f}"
+    return response
 
 @triples_bp.get("/pit")
 def point_in_time():
     ts = request.args.get('timestamp')
     if not ts:
         return "Missing required 'ts' (timestamp) query parameter", 400
-    result = fetch_dbsql(ts)
-    return result, 200, {'Content-Type': 'text/turtle; charset=utf-8'}
+    try:
+        ts = normalize_timestamp(ts)
+    except ValueError:
+        return "Invalid 'timestamp' query parameter, expected an ISO 8601 timestamp", 400
+    media_type = _negotiate()
+    if media_type is None:
+        return _not_acceptable()
+    triple_filter = TripleFilter.from_args(request.args)
+    response = _stream_response(fetch_dbsql(ts, media_type, triple_filter), media_type)
+    response.headers['X-Effective-Timestamp'] = ts
+    return response
+
+@triples_bp.get("/pit/diff")
+def point_in_time_diff():
+    """Triples added and removed between the graphs at `from` and `to`, as N-Triples"""
+    bounds = {}
+    for name in ('from', 'to'):
+        value = request.args.get(name)
+        if not value:
+            return f"Missing required '{name}' (timestamp) query parameter", 400
+        try:
+            bounds[name] = normalize_timestamp(value)
+        except ValueError:
+            return f"Invalid '{name}' query parameter, expected an ISO 8601 timestamp", 400
+    try:
+        if datetime.fromisoformat(bounds['from']) > datetime.fromisoformat(bounds['to']):
+            return "'from' must not be later than 'to'", 400
+    except TypeError:
+        return "'from' and 'to' must both include a UTC offset, or both omit it", 400
+    added, removed = diff_dbsql(bounds['from'], bounds['to'])
+    return jsonify({
+        "from": bounds['from'],
+        "to": bounds['to'],
+        "added": "".join(write_ntriples(added)),
+        "removed": "".join(write_ntriples(removed)),
+    })
@@ -1,4 +1,6 @@
+import json
 import os
+import tempfile
 
 class Config:
     # =============================================================================
@@ -6,6 +8,8 @@ class Config:
     # =============================================================================
     PORT = int(os.getenv("PORT", "8080"))
     SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret-key")
+    # Threads serving Flask requests under asgi.py; each open /api/telemetry/stream holds one
+    ASGI_WSGI_WORKERS = int(os.getenv("ASGI_WSGI_WORKERS", "64"))
 
     # =============================================================================
     # DATABRICKS CONFIGURATION
@@ -24,6 +28,24 @@ class Config:
     DATABRICKS_SCHEMA = os.getenv("DATABRICKS_SCHEMA", "default")
     DATABRICKS_TABLE = os.getenv("DATABRICKS_TABLE", "bronze")
 
+    # =============================================================================
+    # DATABRICKS SQL CONNECTION POOL
+    # =============================================================================
+    # Maximum open warehouse connections per process
+    DBSQL_POOL_MAX_SIZE = int(os.getenv("DBSQL_POOL_MAX_SIZE", "8"))
+    # Idle connections are closed after this many seconds
+    DBSQL_POOL_MAX_IDLE_SECONDS = float(os.getenv("DBSQL_POOL_MAX_IDLE_SECONDS", "600"))
+    # Connections idle longer than this are probed with SELECT 1 before reuse
+    DBSQL_POOL_HEALTH_CHECK_SECONDS = float(os.getenv("DBSQL_POOL_HEALTH_CHECK_SECONDS", "60"))
+    # How long a request waits for a free connection before failing
+    DBSQL_POOL_TIMEOUT_SECONDS = float(os.getenv("DBSQL_POOL_TIMEOUT_SECONDS", "30"))
+    # Threads running warehouse calls for the async (ASGI) endpoints
+    DBSQL_ASYNC_WORKERS = int(os.getenv("DBSQL_ASYNC_WORKERS", os.getenv("DBSQL_POOL_MAX_SIZE", "8")))
+    # Warehouse queries run concurrently by multi-query endpoints, across all requests
+    PARALLEL_QUERY_WORKERS = int(os.getenv("PARALLEL_QUERY_WORKERS", "6"))
+    # How long (seconds) debug endpoint results are reused while the table version is unchanged
+    DEBUG_CACHE_TTL_SECONDS = float(os.getenv("DEBUG_CACHE_TTL_SECONDS", "30"))
+
     # =============================================================================
     # ADVANCED TABLE CONFIGURATIONS
     # =============================================================================
@@ -52,6 +74,150 @@ class Config:
 
     # Token refresh interval (seconds)
     PG_TOKEN_REFRESH_SECONDS = int(os.getenv("PG_TOKEN_REFRESH_SECONDS", "900"))
+    # How long (seconds) before that interval the token is renewed in the background
+    PG_TOKEN_REFRESH_LEAD_SECONDS = int(os.getenv("PG_TOKEN_REFRESH_LEAD_SECONDS", "60"))
+
+    # Connection pool sizing
+    PG_POOL_MIN_SIZE = int(os.getenv("PG_POOL_MIN_SIZE", "2"))
+    PG_POOL_MAX_SIZE = int(os.getenv("PG_POOL_MAX_SIZE", "10"))
+    # How long (seconds) a request waits for a free connection
+    PG_POOL_TIMEOUT_SECONDS = float(os.getenv("PG_POOL_TIMEOUT_SECONDS", "30"))
+    # Idle connections above PG_POOL_MIN_SIZE are closed after this many seconds
+    PG_POOL_MAX_IDLE_SECONDS = float(os.getenv("PG_POOL_MAX_IDLE_SECONDS", "600"))
+    # Connections are replaced after this many seconds, so older tokens age out
+    PG_POOL_MAX_LIFETIME_SECONDS = float(os.getenv("PG_POOL_MAX_LIFETIME_SECONDS", str(PG_TOKEN_REFRESH_SECONDS)))
+    # Executions of a statement before psycopg prepares it server-side (0 = prepare on first use)
+    PG_PREPARE_THRESHOLD = int(os.getenv("PG_PREPARE_THRESHOLD", "5"))
+
+    # Read routing: comma-separated replica hosts for read-only queries (e.g. model browsing),
+    # connected with the primary's database, user and SSL settings. Unset, reads get their
+    # own pool on PGHOST only if PG_READ_POOL_MAX_SIZE > 0, otherwise they share the primary pool
+    PG_READ_HOSTS = os.getenv("PG_READ_HOSTS", "")
+    # Semicolon-separated full connection strings (key=value or postgresql:// URIs) of replicas
+    # that need their own settings, in addition to PG_READ_HOSTS; the Lakebase token is the password
+    PG_READ_DSNS = os.getenv("PG_READ_DSNS", "")
+    PG_READ_POOL_MIN_SIZE = int(os.getenv("PG_READ_POOL_MIN_SIZE", "1"))
+    # Size limit of each read pool (0 = PG_POOL_MAX_SIZE when PG_READ_HOSTS is set)
+    PG_READ_POOL_MAX_SIZE = int(os.getenv("PG_READ_POOL_MAX_SIZE", "0"))
+
+    # Maximum connections of the async pool used by the ASGI endpoints
+    PG_ASYNC_POOL_MAX_SIZE = int(os.getenv("PG_ASYNC_POOL_MAX_SIZE", "20"))
+
+    # Open PG_POOL_MIN_SIZE connections at server start-up instead of on the first request
+    PG_POOL_WARMUP_ENABLED = os.getenv("PG_POOL_WARMUP_ENABLED", "true").lower() == "true"
+    # How long (seconds) start-up waits for the warm-up before continuing lazily
+    PG_POOL_WARMUP_TIMEOUT_SECONDS = float(os.getenv("PG_POOL_WARMUP_TIMEOUT_SECONDS", "30"))
+    # Run a validation query on every warmed connection
+    PG_POOL_WARMUP_VALIDATE = os.getenv("PG_POOL_WARMUP_VALIDATE", "true").lower() == "true"
+    # Prepare the hot triple and telemetry queries on each new primary-pool connection
+    PG_PREPARE_HOT_STATEMENTS = os.getenv("PG_PREPARE_HOT_STATEMENTS", "true").lower() == "true"
+
+    # =============================================================================
+    # LATEST GRAPH SNAPSHOT
+    # =============================================================================
+    # Serve /api/latest from an in-memory snapshot refreshed incrementally
+    LATEST_SNAPSHOT_ENABLED = os.getenv("LATEST_SNAPSHOT_ENABLED", "true").lower() == "true"
+    # Minimum age (seconds) before a request triggers an incremental refresh
+    LATEST_SNAPSHOT_REFRESH_SECONDS = float(os.getenv("LATEST_SNAPSHOT_REFRESH_SECONDS", "5"))
+    # Full rebuild interval (seconds) so rows deleted from the synced table drop out
+    LATEST_SNAPSHOT_REBUILD_SECONDS = int(os.getenv("LATEST_SNAPSHOT_REBUILD_SECONDS", "900"))
+
+    # =============================================================================
+    # LAKEBASE TELEMETRY
+    # =============================================================================
+    # Serve latest telemetry from the synced Lakebase table, falling back to the warehouse
+    LAKEBASE_TELEMETRY_ENABLED = os.getenv("LAKEBASE_TELEMETRY_ENABLED", "true").lower() == "true"
+    # Fall back when the synced table's newest row is older than this (seconds, 0 = never)
+    LAKEBASE_TELEMETRY_MAX_STALENESS_SECONDS = float(os.getenv("LAKEBASE_TELEMETRY_MAX_STALENESS_SECONDS", "300"))
+
+    # =============================================================================
+    # TELEMETRY SENSOR MAPPING
+    # =============================================================================
+    # Frontend reading field -> sensor predicate (local name or full IRI), as a JSON object
+    TELEMETRY_SENSOR_FIELDS = json.loads(os.getenv("TELEMETRY_SENSOR_FIELDS", json.dumps({
+        "sensorAReading": "sensor_temperature",
+        "sensorBReading": "sensor_pressure",
+        "sensorCReading": "sensor_vibration",
+        "sensorDReading": "sensor_speed",
+        "sensorEReading": "sensor_rotation",
+        "sensorFReading": "sensor_flow",
+    })))
+    # Warehouse table with (field, predicate) rows overriding TELEMETRY_SENSOR_FIELDS when set
+    TELEMETRY_SENSOR_MAPPING_TABLE = os.getenv("TELEMETRY_SENSOR_MAPPING_TABLE", "")
+    # How long (seconds) the mapping read from TELEMETRY_SENSOR_MAPPING_TABLE is reused
+    TELEMETRY_SENSOR_MAPPING_TTL_SECONDS = float(os.getenv("TELEMETRY_SENSOR_MAPPING_TTL_SECONDS", "300"))
+    # Maximum component ids per /api/telemetry/components request
+    TELEMETRY_COMPONENTS_MAX_IDS = int(os.getenv("TELEMETRY_COMPONENTS_MAX_IDS", "1000"))
+    # Namespace prepended to sensor predicate local names
+    TELEMETRY_PREDICATE_NAMESPACE = os.getenv("TELEMETRY_PREDICATE_NAMESPACE", "http://example.com/factory/pred/")
+    # Subject prefix of component IRIs; the rest of the IRI is the component ID
+    TELEMETRY_COMPONENT_PREFIX = os.getenv("TELEMETRY_COMPONENT_PREFIX", "http://example.com/factory/component-")
+
+    # =============================================================================
+    # TELEMETRY SNAPSHOT
+    # =============================================================================
+    # Serve /api/telemetry/triples from a snapshot refreshed by one background thread
+    TELEMETRY_SNAPSHOT_ENABLED = os.getenv("TELEMETRY_SNAPSHOT_ENABLED", "true").lower() == "true"
+    # Interval (seconds) between refresher checks of the triple table
+    TELEMETRY_SNAPSHOT_REFRESH_SECONDS = float(os.getenv("TELEMETRY_SNAPSHOT_REFRESH_SECONDS", "5"))
+    # How long (seconds) a request waits for the first snapshot after startup
+    TELEMETRY_SNAPSHOT_WAIT_SECONDS = float(os.getenv("TELEMETRY_SNAPSHOT_WAIT_SECONDS", "30"))
+    # Idle interval (seconds) between keep-alive comments on /api/telemetry/stream
+    TELEMETRY_STREAM_KEEPALIVE_SECONDS = float(os.getenv("TELEMETRY_STREAM_KEEPALIVE_SECONDS", "15"))
+
+    # =============================================================================
+    # TELEMETRY HISTORY
+    # =============================================================================
+    # Samples per series returned by /api/telemetry/history when 'points' is omitted
+    TELEMETRY_HISTORY_DEFAULT_POINTS = int(os.getenv("TELEMETRY_HISTORY_DEFAULT_POINTS", "1000"))
+    # Upper bound on 'points' per series
+    TELEMETRY_HISTORY_MAX_POINTS = int(os.getenv("TELEMETRY_HISTORY_MAX_POINTS", "5000"))
+
+    # =============================================================================
+    # TELEMETRY ANOMALIES
+    # =============================================================================
+    # Smoothing factor of the per-sensor EWMA kept alongside the running mean
+    TELEMETRY_ANOMALY_EWMA_ALPHA = float(os.getenv("TELEMETRY_ANOMALY_EWMA_ALPHA", "0.1"))
+    # |z-score| at or above which a reading is reported by /api/telemetry/anomalies
+    TELEMETRY_ANOMALY_Z_THRESHOLD = float(os.getenv("TELEMETRY_ANOMALY_Z_THRESHOLD", "3.0"))
+    # Readings a sensor needs in its baseline before it can be flagged
+    TELEMETRY_ANOMALY_MIN_SAMPLES = int(os.getenv("TELEMETRY_ANOMALY_MIN_SAMPLES", "30"))
+
+    # =============================================================================
+    # DATA VERSIONING
+    # =============================================================================
+    # How long (seconds) a Delta table version is reused before it is looked up again
+    DATA_VERSION_TTL_SECONDS = float(os.getenv("DATA_VERSION_TTL_SECONDS", "2"))
+    # Longest (seconds) a synced table version may lag behind a write; its table
+    # statistics are reported asynchronously (0 = no bound)
+    SYNCED_VERSION_MAX_LAG_SECONDS = float(os.getenv("SYNCED_VERSION_MAX_LAG_SECONDS", "10"))
+
+    # =============================================================================
+    # IRI INTERNING
+    # =============================================================================
+    # Distinct IRIs kept in each shared memo table used by the RDF writers
+    IRI_CACHE_SIZE = int(os.getenv("IRI_CACHE_SIZE", "100000"))
+
+    # =============================================================================
+    # POINT-IN-TIME CACHE
+    # =============================================================================
+    # Cache /api/pit results keyed by timestamp and triple table version
+    PIT_CACHE_ENABLED = os.getenv("PIT_CACHE_ENABLED", "true").lower() == "true"
+    # In-memory tier budget (bytes)
+    PIT_CACHE_MEMORY_BYTES = int(os.getenv("PIT_CACHE_MEMORY_BYTES", str(256 * 1024 * 1024)))
+    # On-disk N-Triples tier; set PIT_CACHE_DIR to an empty string to disable it
+    PIT_CACHE_DIR = os.getenv("PIT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "digital-twin-pit-cache"))
+    PIT_CACHE_DISK_BYTES = int(os.getenv("PIT_CACHE_DISK_BYTES", str(2 * 1024 * 1024 * 1024)))
+    # Snap requested timestamps down to this many seconds (0 disables snapping)
+    PIT_CACHE_BUCKET_SECONDS = float(os.getenv("PIT_CACHE_BUCKET_SECONDS", "0"))
+
+    # =============================================================================
+    # SPARQL ENDPOINT
+    # =============================================================================
+    # Maximum rows returned by /api/sparql before the result is truncated
+    SPARQL_MAX_ROWS = int(os.getenv("SPARQL_MAX_ROWS", "10000"))
+    # Query time limit (seconds)
+    SPARQL_TIMEOUT_SECONDS = float(os.getenv("SPARQL_TIMEOUT_SECONDS", "10"))
 
     # =============================================================================
     # DATABRICKS APPS DEPLOYMENT
@@ -1,95 +1,383 @@
+import itertools
 import os
+import threading
 import time
 import uuid
+import psycopg
+from contextlib import contextmanager
+from psycopg.conninfo import conninfo_to_dict
 from psycopg_pool import ConnectionPool
 from flask import current_app
 from functools import lru_cache
-from app.extensions import workspace_client
+from app.extensions import get_workspace_client
+from app.services.metrics import POOL_WAIT_SECONDS, record_statement
 
-# Global state for token and pool
-postgres_password = None
-last_password_refresh = 0
+# Lakebase credential and the pool that authenticates with it
+credential_provider = None
 connection_pool = None
+_pool_lock = threading.Lock()
 
+# Read-only pools, one per read host, used by get_read_connection() when configured
+read_pools = None
+_read_turn = itertools.count()
 
 
-def refresh_oauth_token() -> bool:
+def _generate_password() -> str:
     """
     Get database-specific authentication token for PostgreSQL/Lakebase connection.
     Uses Databricks generate_database_credential() API for Lakebase instances.
     """
-    global postgres_password, last_password_refresh
-    ttl = int(current_app.config["PG_TOKEN_REFRESH_SECONDS"])
-    if postgres_password is None or time.time() - last_password_refresh > ttl:
-        try:
-            # Get Lakebase instance name from config
-            instance_name = current_app.config.get('LAKEBASE_INSTANCE_NAME')
-
-            if instance_name:
-                # Use generate_database_credential API for Lakebase
-                current_app.logger.info(f"Generating database credential for Lakebase instance: {instance_name}")
-                postgres_password = workspace_client.config.oauth_token().access_token
-                current_app.logger.info("Successfully generated database credential for Lakebase")
-            else:
-                # Fallback for non-Lakebase PostgreSQL connections
-                current_app.logger.warning("LAKEBASE_INSTANCE_NAME not configured, trying fallback authentication")
-
-                # Try OAuth token first
-                try:
-                    postgres_password = workspace_client.config.oauth_token().access_token
-                    current_app.logger.info("Using OAuth token for PostgreSQL authentication")
-                except (AttributeError, Exception):
-                    # Fall back to PAT token
-                    if hasattr(workspace_client.config, 'token') and workspace_client.config.token:
-                        postgres_password = workspace_client.config.token
-                        current_app.logger.info("Using PAT token for PostgreSQL authentication")
-                    else:
-                        # Last resort: environment variable
-                        postgres_password = current_app.config.get('DATABRICKS_TOKEN')
-                        if postgres_password:
-                            current_app.logger.info("Using DATABRICKS_TOKEN from config")
-                        else:
-                            raise ValueError("No valid authentication method found")
-
-            last_password_refresh = time.time()
-            return True
+    workspace_client = get_workspace_client()
 
-        except Exception as e:
-            current_app.logger.error(f"Failed to obtain PostgreSQL authentication token: {e}")
-            return False
-    return True
+    # Get Lakebase instance name from config
+    instance_name = current_app.config.get('LAKEBASE_INSTANCE_NAME')
+
+    if instance_name:
+        # Use generate_database_credential API for Lakebase
+        current_app.logger.info(f"Generating database credential for Lakebase instance: {instance_name}")
+        password = workspace_client.config.oauth_token().access_token
+        current_app.logger.info("Successfully generated database credential for Lakebase")
+        return password
+
+    # Fallback for non-Lakebase PostgreSQL connections
+    current_app.logger.warning("LAKEBASE_INSTANCE_NAME not configured, trying fallback authentication")
+
+    # Try OAuth token first
+    try:
+        password = workspace_client.config.oauth_token().access_token
+        current_app.logger.info("Using OAuth token for PostgreSQL authentication")
+        return password
+    except (AttributeError, Exception):
+        # Fall back to PAT token
+        if hasattr(workspace_client.config, 'token') and workspace_client.config.token:
+            current_app.logger.info("Using PAT token for PostgreSQL authentication")
+            return workspace_client.config.token
+        # Last resort: environment variable
+        password = current_app.config.get('DATABRICKS_TOKEN')
+        if password:
+            current_app.logger.info("Using DATABRICKS_TOKEN from config")
+            return password
+        raise ValueError("No valid authentication method found")
+
+
+class CredentialProvider:
+    """Current Lakebase password, rotated in place before it expires.
+
+    A background thread renews the token PG_TOKEN_REFRESH_LEAD_SECONDS before
+    PG_TOKEN_REFRESH_SECONDS elapse. The pool asks for the password only when it
+    opens a connection, so rotation never closes the pool; connections opened
+    with an older token retire through the pool's max_lifetime. Callers only
+    fetch a token themselves when none is held yet or the background renewal
+    has fallen behind.
+    """
+
+    def __init__(self, app):
+        self._app = app
+        self._lock = threading.Lock()
+        self._password = None
+        self._refreshed_at = 0.0
+        self._refresher = None
+
+    @property
+    def age(self) -> float:
+        return time.time() - self._refreshed_at
+
+    def _expired(self) -> bool:
+        return self._password is None or self.age > self._app.config["PG_TOKEN_REFRESH_SECONDS"]
+
+    def _refresh_locked(self):
+        with self._app.app_context():
+            password = _generate_password()
+        self._password = password
+        self._refreshed_at = time.time()
 
-def _build_conn_string() -> str:
+    def refresh(self) -> bool:
+        """Fetch a new token now, keeping the current one if that fails"""
+        with self._lock:
+            try:
+                self._refresh_locked()
+                return True
+            except Exception as e:
+                self._app.logger.error(f"Failed to obtain PostgreSQL authentication token: {e}")
+                return False
+
+    def password(self) -> str:
+        if self._expired():
+            with self._lock:
+                if self._expired():
+                    self._refresh_locked()
+        return self._password
+
+    def connect_kwargs(self) -> dict:
+        """Connection kwargs for the pool, resolved each time it opens a connection"""
+        return {"password": self.password()}
+
+    def _run(self):
+        while True:
+            cfg = self._app.config
+            renew_at = cfg["PG_TOKEN_REFRESH_SECONDS"] - cfg["PG_TOKEN_REFRESH_LEAD_SECONDS"]
+            delay = renew_at - self.age
+            if delay > 0:
+                time.sleep(delay)
+                continue
+            if not self.refresh():
+                # Retry soon; requests keep using the current token meanwhile
+                time.sleep(min(30.0, max(cfg["PG_TOKEN_REFRESH_LEAD_SECONDS"] / 4, 1.0)))
+
+    def start(self):
+        """Start the background renewal thread once"""
+        with self._lock:
+            if self._refresher is None:
+                self._refresher = threading.Thread(target=self._run, name="pg-credential", daemon=True)
+                self._refresher.start()
+
+
+def _get_credential_provider() -> CredentialProvider:
+    global credential_provider
+    if credential_provider is None:
+        with _pool_lock:
+            if credential_provider is None:
+                credential_provider = CredentialProvider(current_app._get_current_object())
+    return credential_provider
+
+def refresh_oauth_token() -> bool:
+    """Make sure a PostgreSQL authentication token is held, fetching one if needed"""
+    provider = _get_credential_provider()
+    try:
+        provider.password()
+        return True
+    except Exception as e:
+        current_app.logger.error(f"Failed to obtain PostgreSQL authentication token: {e}")
+        return False
+
+def _build_conn_string(host: str = None) -> str:
     cfg = current_app.config
     return (
         f"dbname={cfg['PGDATABASE']} "
         f"user={cfg['PGUSER']} "
-        f"password={postgres_password} "
-        f"host={cfg['PGHOST']} "
+        f"host={host or cfg['PGHOST']} "
         f"port={cfg['PGPORT']} "
         f"sslmode={cfg['PGSSLMODE']} "
         f"application_name={cfg['PGAPPNAME']}"
     )
 
-def init_pool_on_first_use():
-    # No-op initializer: pool is created on first get_connection() call
-    pass
+class LakebaseCursor(psycopg.Cursor):
+    """Client-side cursor recording statement latency, rows and errors in app.services.metrics"""
+
+    def execute(self, query, params=None, **kwargs):
+        started = time.perf_counter()
+        try:
+            super().execute(query, params, **kwargs)
+        except Exception:
+            record_statement("lakebase", started, error=True)
+            raise
+        record_statement("lakebase", started, rows=max(self.rowcount, 0))
+        return self
+
+class LakebaseServerCursor(psycopg.ServerCursor):
+    """Named cursor recording the DECLARE and each FETCH round trip like a statement"""
+
+    def execute(self, query, params=None, **kwargs):
+        started = time.perf_counter()
+        try:
+            super().execute(query, params, **kwargs)
+        except Exception:
+            record_statement("lakebase", started, error=True)
+            raise
+        record_statement("lakebase", started)
+        return self
+
+    def _fetch(self, fetch, *args):
+        started = time.perf_counter()
+        try:
+            rows = fetch(*args)
+        except Exception:
+            record_statement("lakebase", started, error=True)
+            raise
+        record_statement("lakebase", started, rows=len(rows))
+        return rows
+
+    def fetchone(self):
+        rows = self._fetch(super().fetchmany, 1)
+        return rows[0] if rows else None
+
+    def fetchmany(self, size: int = 0):
+        return self._fetch(super().fetchmany, size)
+
+    def fetchall(self):
+        return self._fetch(super().fetchall)
+
+# Per-connection settings read once when the pool is built, for the pool's worker threads
+_pool_settings = {}
+
+# Functions preparing the hot statements of a service on a new primary connection
+_hot_statements = []
+
+def hot_statement(prepare):
+    """Register `prepare(cursor)` to run on each new primary-pool connection.
+
+    It runs with an app context and executes its statements with prepare=True,
+    choosing parameters that match no rows, so the first request on the
+    connection already finds them prepared. Statements depending on settings
+    that are off should return without executing anything.
+    """
+    _hot_statements.append(prepare)
+    return prepare
+
+def _prepare_hot_statements(conn):
+    app = _pool_settings["app"]
+    # Outside a transaction, a failing statement does not discard the ones prepared before it
+    conn.autocommit = True
+    try:
+        with app.app_context(), conn.cursor() as cur:
+            for prepare in _hot_statements:
+                try:
+                    prepare(cur)
+                except Exception as e:
+                    # A connection that cannot prepare is still usable
+                    app.logger.warning(f"Could not prepare {prepare.__module__}.{prepare.__name__}: {e}")
+    finally:
+        conn.autocommit = False
+
+def _configure_connection(conn):
+    conn.prepare_threshold = _pool_settings["prepare_threshold"]
+    conn.cursor_factory = LakebaseCursor
+    conn.server_cursor_factory = LakebaseServerCursor
+
+def _configure_primary_connection(conn):
+    _configure_connection(conn)
+    if _pool_settings["prepare_hot_statements"]:
+        _prepare_hot_statements(conn)
+
+def _configure_read_connection(conn):
+    _configure_connection(conn)
+    # Guard against a write routed to a read pool by mistake
+    conn.read_only = True
+
+def _new_pool(provider: CredentialProvider, conninfo: str, min_size: int, max_size: int, configure) -> ConnectionPool:
+    cfg = current_app.config
+    _pool_settings["prepare_threshold"] = cfg["PG_PREPARE_THRESHOLD"]
+    _pool_settings["prepare_hot_statements"] = cfg["PG_PREPARE_HOT_STATEMENTS"]
+    _pool_settings["app"] = current_app._get_current_object()
+    return ConnectionPool(
+        conninfo,
+        min_size=min_size,
+        max_size=max_size,
+        timeout=cfg["PG_POOL_TIMEOUT_SECONDS"],
+        max_idle=cfg["PG_POOL_MAX_IDLE_SECONDS"],
+        # The password is looked up per new connection, so rotation needs no rebuild
+        kwargs=provider.connect_kwargs,
+        # Connections opened with an older token are replaced gradually
+        max_lifetime=cfg["PG_POOL_MAX_LIFETIME_SECONDS"],
+        configure=configure,
+        open=True,
+    )
 
 def _get_or_create_pool() -> ConnectionPool:
     global connection_pool
     if connection_pool is None:
+        cfg = current_app.config
+        provider = _get_credential_provider()
         if not refresh_oauth_token():
             raise RuntimeError("Cannot obtain PostgreSQL OAuth token")
-        conn_string = _build_conn_string()
-        connection_pool = ConnectionPool(conn_string, min_size=2, max_size=10)
+        with _pool_lock:
+            if connection_pool is None:
+                connection_pool = _new_pool(
+                    provider, _build_conn_string(), cfg["PG_POOL_MIN_SIZE"], cfg["PG_POOL_MAX_SIZE"],
+                    _configure_primary_connection)
+                provider.start()
     return connection_pool
 
+def _read_targets() -> list:
+    """(pool name, conninfo) of each configured replica"""
+    cfg = current_app.config
+    targets = []
+    for host in cfg["PG_READ_HOSTS"].split(","):
+        if host.strip():
+            targets.append((f"lakebase_read:{host.strip()}", _build_conn_string(host.strip())))
+    for dsn in cfg["PG_READ_DSNS"].split(";"):
+        if dsn.strip():
+            # Named by host only, so no credential in the DSN reaches the metrics
+            host = conninfo_to_dict(dsn.strip()).get("host") or cfg["PGHOST"]
+            targets.append((f"lakebase_read:{host}", dsn.strip()))
+    return targets
+
+def _get_read_pools() -> list:
+    """Read pools per PG_READ_HOSTS / PG_READ_DSNS (or the primary host), or [] when reads share the primary pool"""
+    global read_pools
+    if read_pools is None:
+        cfg = current_app.config
+        targets = _read_targets()
+        if not targets and cfg["PG_READ_POOL_MAX_SIZE"] <= 0:
+            read_pools = []
+            return read_pools
+        # Builds the primary pool and starts credential renewal first
+        _get_or_create_pool()
+        max_size = cfg["PG_READ_POOL_MAX_SIZE"] if cfg["PG_READ_POOL_MAX_SIZE"] > 0 else cfg["PG_POOL_MAX_SIZE"]
+        with _pool_lock:
+            if read_pools is None:
+                read_pools = [
+                    (name, _new_pool(credential_provider, conninfo, cfg["PG_READ_POOL_MIN_SIZE"], max_size,
+                                     _configure_read_connection))
+                    for name, conninfo in (targets or [(f"lakebase_read:{cfg['PGHOST']}", _build_conn_string())])
+                ]
+    return read_pools
+
+def warm_up_pool(app) -> bool:
+    """Fetch the credential and open PG_POOL_MIN_SIZE connections before serving.
+
+    Failures are logged and leave the pool to be built on first use, so a
+    Lakebase outage does not stop the app from starting.
+    """
+    cfg = app.config
+    if not cfg["PG_POOL_WARMUP_ENABLED"] or not cfg.get("PGDATABASE"):
+        return False
+    started = time.time()
+    with app.app_context():
+        try:
+            pool = _get_or_create_pool()
+            for warm in [pool] + [read_pool for _, read_pool in _get_read_pools()]:
+                warm.wait(timeout=cfg["PG_POOL_WARMUP_TIMEOUT_SECONDS"])
+                if cfg["PG_POOL_WARMUP_VALIDATE"]:
+                    warm.check()
+        except Exception as e:
+            app.logger.warning(f"PostgreSQL pool warm-up failed, continuing with lazy connections: {e}")
+            return False
+    app.logger.info(
+        f"PostgreSQL pool warmed up with {pool.get_stats()['pool_size']} connections in {time.time() - started:.2f}s"
+    )
+    return True
+
+@contextmanager
 def get_connection():
-    global connection_pool
-    # Recreate pool if token expired
-    ttl = int(current_app.config["PG_TOKEN_REFRESH_SECONDS"])
-    if postgres_password is None or time.time() - last_password_refresh > ttl:
-        if connection_pool:
-            connection_pool.close()
-        connection_pool = None
-    return _get_or_create_pool().connection()
+    pool = _get_or_create_pool()
+    started = time.perf_counter()
+    with pool.connection() as conn:
+        POOL_WAIT_SECONDS.observe(time.perf_counter() - started, "lakebase")
+        yield conn
+
+@contextmanager
+def get_read_connection():
+    """Connection for read-only work, from the read pools in turn when configured.
+
+    With a single DSN this is get_connection(). Reads served by a replica may
+    lag the primary slightly.
+    """
+    pools = _get_read_pools()
+    if not pools:
+        with get_connection() as conn:
+            yield conn
+        return
+    name, pool = pools[next(_read_turn) % len(pools)]
+    started = time.perf_counter()
+    with pool.connection() as conn:
+        POOL_WAIT_SECONDS.observe(time.perf_counter() - started, name)
+        yield conn
+
+def pool_stats() -> dict:
+    """psycopg statistics of the Lakebase pool, or None before it is built"""
+    return connection_pool.get_stats() if connection_pool is not None else None
+
+def read_pool_stats() -> list:
+    """(name, psycopg statistics) of each read pool"""
+    return [(name, pool.get_stats()) for name, pool in read_pools or []]
@@ -0,0 +1,84 @@
+import asyncio
+import time
+import psycopg
+from contextlib import asynccontextmanager
+from psycopg_pool import AsyncConnectionPool
+from flask import current_app
+from app.db.postgres import _build_conn_string, _get_credential_provider
+from app.services.metrics import POOL_WAIT_SECONDS, record_statement
+
+# Async Lakebase pool for the ASGI endpoints, bound to the server's event loop
+async_pool = None
+_async_pool_lock = asyncio.Lock()
+
+
+class AsyncLakebaseCursor(psycopg.AsyncCursor):
+    """Async counterpart of LakebaseCursor"""
+
+    async def execute(self, query, params=None, **kwargs):
+        started = time.perf_counter()
+        try:
+            await super().execute(query, params, **kwargs)
+        except Exception:
+            record_statement("lakebase", started, error=True)
+            raise
+        record_statement("lakebase", started, rows=max(self.rowcount, 0))
+        return self
+
+async def open_async_pool() -> AsyncConnectionPool:
+    """Return the async pool, opening it on first use.
+
+    It shares the credential provider of the thread pool, so both pick up a
+    rotated token for their next new connection.
+    """
+    global async_pool
+    if async_pool is None:
+        async with _async_pool_lock:
+            if async_pool is None:
+                cfg = current_app.config
+                provider = _get_credential_provider()
+                # The first token fetch is a blocking SDK call
+                await asyncio.to_thread(provider.password)
+                prepare_threshold = cfg["PG_PREPARE_THRESHOLD"]
+
+                async def connect_kwargs():
+                    return await asyncio.to_thread(provider.connect_kwargs)
+
+                async def configure(conn):
+                    conn.prepare_threshold = prepare_threshold
+                    conn.cursor_factory = AsyncLakebaseCursor
+
+                pool = AsyncConnectionPool(
+                    _build_conn_string(),
+                    min_size=cfg["PG_POOL_MIN_SIZE"],
+                    max_size=cfg["PG_ASYNC_POOL_MAX_SIZE"],
+                    timeout=cfg["PG_POOL_TIMEOUT_SECONDS"],
+                    max_idle=cfg["PG_POOL_MAX_IDLE_SECONDS"],
+                    kwargs=connect_kwargs,
+                    max_lifetime=cfg["PG_POOL_MAX_LIFETIME_SECONDS"],
+                    configure=configure,
+                    open=False,
+                )
+                await pool.open()
+                provider.start()
+                async_pool = pool
+    return async_pool
+
+@asynccontextmanager
+async def async_connection():
+    """Async counterpart of get_connection()"""
+    pool = await open_async_pool()
+    started = time.perf_counter()
+    async with pool.connection() as conn:
+        POOL_WAIT_SECONDS.observe(time.perf_counter() - started, "lakebase_async")
+        yield conn
+
+def async_pool_stats() -> dict:
+    """psycopg statistics of the async Lakebase pool, or None before it is opened"""
+    return async_pool.get_stats() if async_pool is not None else None
+
+async def close_async_pool():
+    global async_pool
+    if async_pool is not None:
+        await async_pool.close()
+        async_pool = None
@@ -1,15 +1,227 @@
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
 from databricks import sdk
 from databricks import sql as dbsql
 from databricks.sdk.core import Config as DBXConfig
+from app.config import Config
+from app.services.metrics import POOL_WAIT_SECONDS, InstrumentedConnection
 
-# Global Databricks workspace client and SQL config (created once)
-workspace_client = sdk.WorkspaceClient()
-dbx_cfg = DBXConfig()
-
-def get_dbsql_connection(server_http_path: str):
-    # Lazily build dbsql connection using credentials provider
-    return dbsql.connect(
-        server_hostname=dbx_cfg.host,
-        http_path=server_http_path,
-        credentials_provider=lambda: dbx_cfg.authenticate,
-    )
+@lru_cache(maxsize=None)
+def get_workspace_client() -> sdk.WorkspaceClient:
+    """Global Databricks workspace client, created on first use so importing the app needs no auth"""
+    return sdk.WorkspaceClient()
+
+@lru_cache(maxsize=None)
+def get_dbx_config() -> DBXConfig:
+    """Global Databricks SQL config, created on first use"""
+    return DBXConfig()
+
+# Errors raised by a statement rather than by the connection; the connection stays usable
+_STATEMENT_ERRORS = (dbsql.exc.ServerOperationError, dbsql.exc.ProgrammingError, dbsql.exc.DataError)
+
+
+class DBSQLPool:
+    """Bounded, thread-safe pool of Databricks SQL connections to one warehouse.
+
+    Idle connections are reused most-recently-used first, closed once idle for
+    `max_idle` seconds, and probed with SELECT 1 before reuse when idle for more
+    than `health_check` seconds. A connection whose use raised anything but a
+    statement error is closed, so the next checkout transparently reconnects.
+    """
+
+    def __init__(self, server_http_path: str, max_size: int, max_idle: float, health_check: float, timeout: float):
+        self.http_path = server_http_path
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.health_check = health_check
+        self.timeout = timeout
+        self._idle = []  # (connection, last used), most recently used last
+        self._size = 0  # open connections, idle or checked out
+        self._cond = threading.Condition()
+        self.opened = 0
+        self.closed = 0
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.timeouts = 0
+        self.health_check_failures = 0
+
+    def _open(self):
+        dbx_cfg = get_dbx_config()
+        conn = dbsql.connect(
+            server_hostname=dbx_cfg.host,
+            http_path=self.http_path,
+            credentials_provider=lambda: dbx_cfg.authenticate,
+        )
+        with self._cond:
+            self.opened += 1
+        return conn
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self.closed += 1
+
+    def _healthy(self, conn) -> bool:
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+            return True
+        except Exception:
+            with self._cond:
+                self.health_check_failures += 1
+            return False
+
+    def _evict_idle(self, now: float) -> list:
+        # Caller holds the lock; idle entries are ordered by last use
+        expired = 0
+        while expired < len(self._idle) and now - self._idle[expired][1] > self.max_idle:
+            expired += 1
+        evicted = [conn for conn, _ in self._idle[:expired]]
+        del self._idle[:expired]
+        self._size -= len(evicted)
+        return evicted
+
+    def _checkout(self):
+        waited_since = None
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                evicted = self._evict_idle(now)
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    conn, last_used = None, None
+                    break
+                if waited_since is None:
+                    waited_since = now
+                    self.waits += 1
+                remaining = self.timeout - (now - waited_since)
+                if remaining <= 0:
+                    self.timeouts += 1
+                    self.wait_seconds += now - waited_since
+                    raise TimeoutError(f"No warehouse connection available within {self.timeout}s")
+                self._cond.wait(remaining)
+            self.checkouts += 1
+            waited = 0.0 if waited_since is None else time.monotonic() - waited_since
+            self.wait_seconds += waited
+        POOL_WAIT_SECONDS.observe(waited, f"warehouse:{self.http_path}")
+        for stale in evicted:
+            self._close(stale)
+
+        if conn is not None and time.monotonic() - last_used > self.health_check and not self._healthy(conn):
+            self._close(conn)
+            conn = None
+        if conn is None:
+            try:
+                conn = self._open()
+            except Exception:
+                self._release_slot()
+                raise
+        return conn
+
+    def _release_slot(self):
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def _checkin(self, conn):
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection for the duration of the `with` block"""
+        conn = self._checkout()
+        try:
+            yield InstrumentedConnection(conn, "warehouse")
+        except _STATEMENT_ERRORS:
+            self._checkin(conn)
+            raise
+        except BaseException:
+            # Includes GeneratorExit from abandoned streams, whose cursor may still be open
+            self._close(conn)
+            self._release_slot()
+            raise
+        self._checkin(conn)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "http_path": self.http_path,
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "opened": self.opened,
+                "closed": self.closed,
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "wait_seconds": round(self.wait_seconds, 6),
+                "timeouts": self.timeouts,
+                "health_check_failures": self.health_check_failures,
+            }
+
+
+_dbsql_pools = {}
+_dbsql_pools_lock = threading.Lock()
+
+
+def get_dbsql_pool(server_http_path: str = None) -> DBSQLPool:
+    """Return the process-wide pool for a warehouse, WAREHOUSE_HTTP by default"""
+    http_path = server_http_path or Config.WAREHOUSE_HTTP
+    with _dbsql_pools_lock:
+        pool = _dbsql_pools.get(http_path)
+        if pool is None:
+            pool = _dbsql_pools[http_path] = DBSQLPool(
+                http_path,
+                max_size=Config.DBSQL_POOL_MAX_SIZE,
+                max_idle=Config.DBSQL_POOL_MAX_IDLE_SECONDS,
+                health_check=Config.DBSQL_POOL_HEALTH_CHECK_SECONDS,
+                timeout=Config.DBSQL_POOL_TIMEOUT_SECONDS,
+            )
+        return pool
+
+
+def dbsql_connection(server_http_path: str = None):
+    """Context manager checking a warehouse connection out of the shared pool"""
+    return get_dbsql_pool(server_http_path).connection()
+
+
+def dbsql_pool_stats() -> list:
+    """Size, wait and open/close counters of every warehouse pool"""
+    with _dbsql_pools_lock:
+        pools = list(_dbsql_pools.values())
+    return [pool.stats() for pool in pools]
+
+
+# Threads that run blocking warehouse calls for the async layer, sized to the pool
+_dbsql_async_executor = ThreadPoolExecutor(max_workers=Config.DBSQL_ASYNC_WORKERS, thread_name_prefix="dbsql-async")
+
+
+async def run_dbsql(fn, *args, server_http_path: str = None):
+    """Run fn(conn, *args) with a pooled warehouse connection, off the event loop.
+
+    Awaiting callers hold no thread while they queue for one of the
+    DBSQL_ASYNC_WORKERS threads, so slow warehouse queries cannot exhaust the
+    threads that serve fast requests. The caller's context (including the Flask
+    app context) is carried into the worker thread.
+    """
+    def call():
+        with dbsql_connection(server_http_path) as conn:
+            return fn(conn, *args)
+
+    ctx = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(_dbsql_async_executor, ctx.run, call)
@@ -0,0 +1,62 @@
+try:
+    import pyarrow as pa
+    HAS_ARROW = True
+except ImportError:
+    HAS_ARROW = False
+
+ARROW_STREAM_MEDIA_TYPE = 'application/vnd.apache.arrow.stream'
+
+
+class _ChunkSink:
+    """Write target for the IPC writer that hands back what was written since the last drain"""
+
+    def __init__(self):
+        self._parts = []
+        self.closed = False
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def cursor_tables(cursor, batch_size: int):
+    """Yield pyarrow Tables from an executed databricks-sql cursor until it is exhausted.
+
+    The first table is yielded even when empty so the stream carries the schema.
+    """
+    first = True
+    while True:
+        table = cursor.fetchmany_arrow(batch_size)
+        if table.num_rows == 0 and not first:
+            break
+        yield table
+        if table.num_rows == 0:
+            break
+        first = False
+
+
+def write_stream(tables):
+    """Yield an Arrow IPC stream, one chunk per input Table, without touching rows in Python"""
+    sink = _ChunkSink()
+    writer = None
+    for table in tables:
+        if writer is None:
+            writer = pa.ipc.new_stream(sink, table.schema)
+        writer.write_table(table)
+        chunk = sink.drain()
+        if chunk:
+            yield chunk
+    if writer is not None:
+        writer.close()
+        yield sink.drain()
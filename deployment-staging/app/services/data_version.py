@@ -0,0 +1,121 @@
+import hashlib
+import threading
+import time
+from flask import Response, current_app, request
+from app.db.postgres import get_connection
+from app.services.metrics import instrumented
+
+# table -> (token, fetched_at) for warehouse version lookups
+_version_cache = {}
+_version_lock = threading.Lock()
+
+
+def make_etag(*parts) -> str:
+    """Derive a compact entity tag from a data-version token and representation details"""
+    return hashlib.sha1("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()[:20]
+
+
+@instrumented
+def synced_table_version(table: str) -> str:
+    """Version token for a Lakebase synced table: newest timestamp and write counter.
+
+    MAX(timestamp) is one step down the timestamp index; the cumulative
+    insert/update/delete count from pg_stat_user_tables also moves on deletes,
+    which the timestamp alone would miss. Neither needs a table scan.
+
+    The statistics are reported by each backend asynchronously, up to several
+    seconds after its commit, so an update that keeps MAX(timestamp) can leave
+    the token unchanged for a while. Tokens therefore also roll over every
+    SYNCED_VERSION_MAX_LAG_SECONDS, which bounds how long a stale one is served.
+    """
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                SELECT (SELECT MAX(timestamp) FROM {table}),
+                       (SELECT n_tup_ins + n_tup_upd + n_tup_del FROM pg_stat_user_tables WHERE relid = %s::regclass)
+                """,
+                (table,),
+            )
+            newest, writes = cur.fetchone()
+    max_lag = current_app.config["SYNCED_VERSION_MAX_LAG_SECONDS"]
+    period = int(time.time() // max_lag) if max_lag > 0 else 0
+    return f"pg:{newest}:{writes}:{period}"
+
+
+@instrumented
+def warehouse_table_version(conn, table: str):
+    """Version token for a Delta table from its latest commit, or None if unavailable.
+
+    Tokens are reused for DATA_VERSION_TTL_SECONDS so a burst of polls costs at most
+    one DESCRIBE HISTORY per table.
+    """
+    ttl = current_app.config["DATA_VERSION_TTL_SECONDS"]
+    cached = _version_cache.get(table)
+    if cached is not None and time.time() - cached[1] < ttl:
+        return cached[0]
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"DESCRIBE HISTORY {table} LIMIT 1")
+            row = cursor.fetchone()
+    except Exception as e:
+        current_app.logger.warning(f"Could not read Delta version of {table}: {e}")
+        return None
+    token = f"delta:{table}:{row[0]}" if row else None
+    with _version_lock:
+        _version_cache[table] = (token, time.time())
+    return token
+
+
+def not_modified(etag: str):
+    """Return a 304 response when the client already holds `etag`, otherwise None"""
+    if etag and request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    return None
+
+
+def tag_response(response, etag: str):
+    """Attach `etag` so clients can revalidate with If-None-Match"""
+    if etag:
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+class VersionedCache:
+    """Keeps one value per key, valid only while its data-version token is unchanged.
+
+    With `ttl` set, values also expire after `ttl` seconds, and values for an
+    unknown (None) token are kept for that long instead of not at all. `ttl`
+    may also be a callable returning the seconds, read on every access, so it
+    can follow the app config.
+    """
+
+    def __init__(self, ttl=None):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._ttl = ttl
+
+    @property
+    def ttl(self):
+        return self._ttl() if callable(self._ttl) else self._ttl
+
+    def get(self, key, token):
+        ttl = self.ttl
+        if token is None and ttl is None:
+            return None
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != token:
+            return None
+        if ttl is not None and time.time() - entry[2] > ttl:
+            return None
+        return entry[1]
+
+    def put(self, key, token, value):
+        if token is not None or self.ttl is not None:
+            with self._lock:
+                self._entries[key] = (token, value, time.time())
+        return value
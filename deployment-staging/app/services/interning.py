@@ -0,0 +1,52 @@
+import rdflib
+from functools import lru_cache
+from app.config import Config
+
+# Characters rdflib refuses to serialize inside an IRI
+_INVALID_IRI_CHARS = '<>" {}|\\^`'
+
+
+def check_iri(value: str) -> str:
+    for c in _INVALID_IRI_CHARS:
+        if c in value:
+            raise ValueError(f"{value!r} does not look like a valid URI, cannot serialize it")
+    return value
+
+
+class Interner:
+    """Bounded memo table from raw strings to a derived value, shared across requests.
+
+    The graph has a few thousand distinct IRIs repeated millions of times, so
+    validating and rendering each one once turns per-triple work into a dict
+    lookup. When full, the least recently used entry is dropped. The table is a
+    functools.lru_cache, so lookups are thread-safe and run in C.
+    """
+
+    def __init__(self, name: str, factory, maxsize: int):
+        self.name = name
+        self._maxsize = maxsize
+        self.get = lru_cache(maxsize=maxsize)(factory)
+
+    def stats(self) -> dict:
+        info = self.get.cache_info()
+        lookups = info.hits + info.misses
+        return {
+            "name": self.name,
+            "size": info.currsize,
+            "maxsize": self._maxsize,
+            "hits": info.hits,
+            "misses": info.misses,
+            "hit_rate": info.hits / lookups if lookups else 0.0,
+        }
+
+
+# Raw IRI -> validated "<iri>" form used by the Turtle / N-Triples writers
+IRI_FORMS = Interner("iri_forms", lambda raw: f"<{check_iri(raw)}>", Config.IRI_CACHE_SIZE)
+
+# Raw IRI -> rdflib.URIRef used by the SPARQL triple store
+URIREFS = Interner("urirefs", rdflib.URIRef, Config.IRI_CACHE_SIZE)
+
+
+def interning_stats() -> list:
+    """Hit-rate statistics for the shared IRI memo tables"""
+    return [IRI_FORMS.stats(), URIREFS.stats()]
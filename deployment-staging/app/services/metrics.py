@@ -0,0 +1,247 @@
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from bisect import bisect_left
+from flask import has_request_context, request
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Prefix of every exported metric name
+NAMESPACE = "digital_twin"
+
+# Service function the current statement runs for, set by @instrumented
+_service = contextvars.ContextVar("metrics_service", default=None)
+
+
+def current_service() -> str:
+    """Tag of the running statement: the @instrumented function, else the Flask endpoint or thread"""
+    service = _service.get()
+    if service is not None:
+        return service
+    if has_request_context():
+        return request.endpoint or "unknown"
+    return threading.current_thread().name
+
+
+def instrumented(fn):
+    """Tag the statements run inside `fn` with its module and function name"""
+    tag = f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__name__}"
+
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            token = _service.set(tag)
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                _service.reset(token)
+        return async_wrapper
+
+    if inspect.isgeneratorfunction(fn):
+        # The body runs on each next(), so the tag is set around every resume
+        @functools.wraps(fn)
+        def gen_wrapper(*args, **kwargs):
+            gen = fn(*args, **kwargs)
+            try:
+                while True:
+                    token = _service.set(tag)
+                    try:
+                        item = next(gen)
+                    except StopIteration as stop:
+                        return stop.value
+                    finally:
+                        _service.reset(token)
+                    yield item
+            finally:
+                token = _service.set(tag)
+                try:
+                    gen.close()
+                finally:
+                    _service.reset(token)
+        return gen_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        token = _service.set(tag)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _service.reset(token)
+    return wrapper
+
+
+def _labels(names: tuple, values: tuple, extra: str = None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter per label combination"""
+
+    def __init__(self, name: str, help: str, labels: tuple):
+        self.name = f"{NAMESPACE}_{name}"
+        self.help = help
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount, *labels):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list:
+        with self._lock:
+            values = list(self._values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_labels(self.labels, k)} {_number(v)}" for k, v in values]
+        return lines
+
+
+class Histogram:
+    """Bucketed distribution per label combination; an observation is one bisect and a locked increment"""
+
+    def __init__(self, name: str, help: str, labels: tuple, buckets: tuple = LATENCY_BUCKETS):
+        self.name = f"{NAMESPACE}_{name}"
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}  # labels -> [per-bucket counts..., +Inf count], sum
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    def render(self) -> list:
+        with self._lock:
+            series = [(k, list(counts), total) for k, (counts, total) in self._series.items()]
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for k, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labels, k, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, k)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labels, k)} {cumulative}")
+        return lines
+
+
+def collected(name: str, kind: str, help: str, labels: tuple, samples: list) -> list:
+    """Render a gauge or counter read at scrape time from (label values, value) samples"""
+    name = f"{NAMESPACE}_{name}"
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+    lines += [f"{name}{_labels(labels, k)} {_number(v)}" for k, v in samples]
+    return lines
+
+
+STATEMENT_SECONDS = Histogram("db_statement_seconds", "Statement execution time", ("db", "service"))
+STATEMENT_ROWS = Counter("db_statement_rows_total", "Rows returned by statements", ("db", "service"))
+STATEMENT_ERRORS = Counter("db_statement_errors_total", "Statements that raised", ("db", "service"))
+POOL_WAIT_SECONDS = Histogram("db_pool_checkout_wait_seconds", "Time to check a connection out of a pool", ("pool",))
+
+_METRICS = (STATEMENT_SECONDS, STATEMENT_ROWS, STATEMENT_ERRORS, POOL_WAIT_SECONDS)
+
+
+def record_statement(db: str, started: float, rows: int = 0, error: bool = False):
+    """Record one statement that began at time.perf_counter() value `started`"""
+    service = current_service()
+    STATEMENT_SECONDS.observe(time.perf_counter() - started, db, service)
+    if error:
+        STATEMENT_ERRORS.inc(1, db, service)
+    elif rows > 0:
+        STATEMENT_ROWS.inc(rows, db, service)
+
+
+def render(extra: list = ()) -> str:
+    """All recorded metrics plus `extra` pre-rendered lines, in Prometheus text format"""
+    lines = []
+    for metric in _METRICS:
+        lines += metric.render()
+    lines += extra
+    return "\n".join(lines) + "\n"
+
+
+class InstrumentedCursor:
+    """DB-API cursor wrapper recording statement latency, errors and fetched rows"""
+
+    def __init__(self, cursor, db: str):
+        self._cursor = cursor
+        self._db = db
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return self._cursor.__exit__(*exc)
+
+    def execute(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            result = self._cursor.execute(*args, **kwargs)
+        except Exception:
+            record_statement(self._db, started, error=True)
+            raise
+        record_statement(self._db, started)
+        return result
+
+    def _rows(self, rows):
+        if rows:
+            STATEMENT_ROWS.inc(len(rows), self._db, current_service())
+        return rows
+
+    def _table(self, table):
+        if table is not None and table.num_rows:
+            STATEMENT_ROWS.inc(table.num_rows, self._db, current_service())
+        return table
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            STATEMENT_ROWS.inc(1, self._db, current_service())
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        return self._rows(self._cursor.fetchmany(*args, **kwargs))
+
+    def fetchall(self):
+        return self._rows(self._cursor.fetchall())
+
+    def fetchmany_arrow(self, *args, **kwargs):
+        return self._table(self._cursor.fetchmany_arrow(*args, **kwargs))
+
+    def fetchall_arrow(self):
+        return self._table(self._cursor.fetchall_arrow())
+
+
+class InstrumentedConnection:
+    """DB-API connection wrapper whose cursors are InstrumentedCursors"""
+
+    def __init__(self, conn, db: str):
+        self._conn = conn
+        self._db = db
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._conn.cursor(*args, **kwargs), self._db)
@@ -0,0 +1,28 @@
+from concurrent.futures import ThreadPoolExecutor
+from app.config import Config
+from app.extensions import dbsql_connection
+from app.services.metrics import instrumented
+
+# Bounded across all requests, so concurrent debug pages queue here rather than at the warehouse
+_executor = ThreadPoolExecutor(max_workers=Config.PARALLEL_QUERY_WORKERS, thread_name_prefix="warehouse-query")
+
+
+@instrumented
+def _run(sql: str, fetch: str):
+    with dbsql_connection() as conn, conn.cursor() as cursor:
+        cursor.execute(sql)
+        return cursor.fetchone() if fetch == "one" else cursor.fetchall()
+
+
+def run_queries(queries: dict) -> dict:
+    """Run independent warehouse queries concurrently, each on its own pooled connection.
+
+    `queries` maps a name to (sql, "all" | "one"); the result maps the same names
+    to fetchall() / fetchone() results. The first failing query's exception is
+    raised once all of them have finished.
+    """
+    futures = {name: _executor.submit(_run, sql, fetch) for name, (sql, fetch) in queries.items()}
+    errors = [f.exception() for f in futures.values() if f.exception() is not None]
+    if errors:
+        raise errors[0]
+    return {name: f.result() for name, f in futures.items()}
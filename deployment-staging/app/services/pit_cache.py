@@ -0,0 +1,181 @@
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from flask import current_app
+from app.services.rdf_writer import RDF_TYPE, write_ntriples
+
+# Approximate per-row cost of a cached (s, p, o) tuple beyond its characters
+_ROW_OVERHEAD_BYTES = 220
+
+_UNESCAPES = {"\\\\": "\\", "\\n": "\n", '\\"': '"', "\\r": "\r"}
+_ESCAPE_RE = re.compile(r'\\[\\n"r]')
+
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_UTC = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def normalize_timestamp(value: str) -> str:
+    """Parse a requested timestamp and snap it down to PIT_CACHE_BUCKET_SECONDS.
+
+    Equivalent spellings of one instant map to the same cache key, and a
+    scrubber session mostly lands on a handful of buckets. Raises ValueError for
+    values that are not ISO 8601 timestamps.
+    """
+    dt = datetime.fromisoformat(value.strip())
+    bucket = current_app.config["PIT_CACHE_BUCKET_SECONDS"]
+    if bucket > 0:
+        epoch = _EPOCH if dt.tzinfo is None else _EPOCH_UTC
+        us = (dt - epoch) // timedelta(microseconds=1)
+        snapped = epoch + timedelta(microseconds=us - us % int(bucket * 1_000_000))
+        dt = snapped if dt.tzinfo is None else snapped.astimezone(dt.tzinfo)
+    return dt.isoformat(sep=" ")
+
+
+def _row_bytes(rows: list) -> int:
+    return sum(len(s) + len(p) + len(str(o)) for s, p, o in rows) + _ROW_OVERHEAD_BYTES * len(rows)
+
+
+class MemoryTier:
+    """LRU of row lists bounded by an approximate byte budget"""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, rows: list, budget: int):
+        size = _row_bytes(rows)
+        if size > budget:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (rows, size)
+            self._bytes += size
+            while self._bytes > budget:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+
+
+class DiskTier:
+    """N-Triples files that survive restarts, evicted oldest-first past a byte budget"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _path(self, key) -> str:
+        name = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{name}.nt")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                rows = [_parse_line(line) for line in f if line.strip()]
+        except FileNotFoundError:
+            return None
+        os.utime(path)
+        return rows
+
+    def put(self, key, rows: list, budget: int):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for chunk in write_ntriples(rows):
+                f.write(chunk)
+        os.replace(tmp, path)
+        self._evict(budget)
+
+    def _evict(self, budget: int):
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".nt"):
+                st = entry.stat()
+                files.append((st.st_mtime, st.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= budget:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+def _unescape(value: str) -> str:
+    return _ESCAPE_RE.sub(lambda m: _UNESCAPES[m.group(0)], value)
+
+
+def _parse_line(line: str) -> tuple:
+    """Inverse of rdf_writer.write_ntriples for a single line"""
+    s_end = line.index("> ")
+    s = line[1:s_end]
+    p_end = line.index("> ", s_end + 2)
+    p = line[s_end + 3:p_end]
+    o = line.rstrip("\n")[p_end + 2:-2]
+    if o.startswith("<"):
+        return s, RDF_TYPE, o[1:-1]
+    return s, p, _unescape(o[1:-1])
+
+
+_memory = MemoryTier()
+_disk = None
+_disk_lock = threading.Lock()
+
+
+def _disk_tier():
+    global _disk
+    directory = current_app.config["PIT_CACHE_DIR"]
+    if not directory:
+        return None
+    with _disk_lock:
+        if _disk is None or _disk.directory != directory:
+            _disk = DiskTier(directory)
+        return _disk
+
+
+def get(timestamp: str, table_version: str):
+    """Return cached rows for (normalized timestamp, table version), checking memory then disk"""
+    key = (timestamp, table_version)
+    rows = _memory.get(key)
+    if rows is not None:
+        return rows
+    disk = _disk_tier()
+    if disk is None:
+        return None
+    try:
+        rows = disk.get(key)
+    except Exception as e:
+        current_app.logger.warning(f"Ignoring unreadable point-in-time cache entry: {e}")
+        return None
+    if rows is not None:
+        _memory.put(key, rows, current_app.config["PIT_CACHE_MEMORY_BYTES"])
+    return rows
+
+
+def put(timestamp: str, table_version: str, rows: list) -> list:
+    """Store rows in both tiers and return them"""
+    cfg = current_app.config
+    key = (timestamp, table_version)
+    _memory.put(key, rows, cfg["PIT_CACHE_MEMORY_BYTES"])
+    disk = _disk_tier()
+    if disk is not None:
+        try:
+            disk.put(key, rows, cfg["PIT_CACHE_DISK_BYTES"])
+        except OSError as e:
+            current_app.logger.warning(f"Could not write point-in-time cache entry: {e}")
+    return rows
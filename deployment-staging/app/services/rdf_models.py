@@ -1,10 +1,11 @@
 from psycopg.rows import dict_row
 from flask import current_app
-from app.db.postgres import get_connection
+from app.db.postgres import get_connection, get_read_connection
 import json
 import os
 from datetime import datetime
 from typing import List, Dict, Optional
+from app.services.metrics import instrumented
 
 # Database table name - read from environment variables
 # For Lakebase, use Unity Catalog path format: catalog.schema.table
@@ -14,6 +15,7 @@ RDF_MODELS_FULL_TABLE_NAME = os.getenv('RDF_MODELS_FULL_TABLE_NAME', 'main.deba.
 def ensure_table_exists():
     return True 
 
+@instrumented
 def create_rdf_model(name: str, content: str, description: str = None,
                      category: str = 'user', is_template: bool = False,
                      creator: str = None, metadata: dict = None, tags: list = None) -> dict:
@@ -45,6 +47,7 @@ def create_rdf_model(name: str, content: str, description: str = None,
         print(f"Error creating RDF model: {e}")
         return None
 
+@instrumented
 def list_rdf_models(limit: int = 50, offset: int = 0, category: str = None,
                     is_template: bool = None, creator: str = None,
                     search: str = None) -> List[dict]:
@@ -86,7 +89,7 @@ def list_rdf_models(limit: int = 50, offset: int = 0, category: str = None,
         base += " ORDER BY created_at DESC LIMIT %s OFFSET %s"
         params.extend([limit, offset])
 
-        with get_connection() as conn:
+        with get_read_connection() as conn:
             with conn.cursor(row_factory=dict_row) as cur:
                 cur.execute(base, params)
                 rows = cur.fetchall()
@@ -97,8 +100,13 @@ def list_rdf_models(limit: int = 50, offset: int = 0, category: str = None,
         # Re-raise the exception so blueprint can return proper error status
         raise
 
-def get_rdf_model(model_id: int = None, name: str = None) -> Optional[dict]:
-    """Get a specific RDF model by ID or name"""
+@instrumented
+def get_rdf_model(model_id: int = None, name: str = None, primary: bool = False) -> Optional[dict]:
+    """Get a specific RDF model by ID or name.
+
+    Reads go to a replica when one is configured; pass `primary=True` for checks
+    made before a write, which must not see a lagging copy.
+    """
     try:
         if not ensure_table_exists():
             print("Warning: PostgreSQL not available, cannot retrieve RDF model from database")
@@ -123,7 +131,7 @@ def get_rdf_model(model_id: int = None, name: str = None) -> Optional[dict]:
         else:
             return None
 
-        with get_connection() as conn:
+        with (get_connection() if primary else get_read_connection()) as conn:
             with conn.cursor(row_factory=dict_row) as cur:
                 cur.execute(sql, (param,))
                 row = cur.fetchone()
@@ -133,6 +141,7 @@ def get_rdf_model(model_id: int = None, name: str = None) -> Optional[dict]:
         print(f"Error getting RDF model: {e}")
         return None
 
+@instrumented
 def update_rdf_model(model_id: int, name: str = None, description: str = None,
                      category: str = None, is_template: bool = None, 
                      content: str = None, creator: str = None, 
@@ -195,6 +204,7 @@ def update_rdf_model(model_id: int, name: str = None, description: str = None,
     
     return row
 
+@instrumented
 def delete_rdf_model(model_id: int) -> bool:
     """Delete an RDF model"""
     ensure_table_exists()
@@ -209,12 +219,13 @@ def delete_rdf_model(model_id: int) -> bool:
     
     return bool(deleted)
 
+@instrumented
 def duplicate_rdf_model(model_id: int, new_name: str = None, creator: str = None) -> Optional[dict]:
     """Create a copy of an existing RDF model"""
     ensure_table_exists()
     
     # Get the original model
-    original = get_rdf_model(model_id=model_id)
+    original = get_rdf_model(model_id=model_id, primary=True)
     if not original:
         return None
     
@@ -222,7 +233,7 @@ def duplicate_rdf_model(model_id: int, new_name: str = None, creator: str = None
     if not new_name:
         new_name = f"{original['name']} (Copy)"
         counter = 1
-        while get_rdf_model(name=new_name):
+        while get_rdf_model(name=new_name, primary=True):
             new_name = f"{original['name']} (Copy {counter})"
             counter += 1
     
@@ -238,6 +249,7 @@ def duplicate_rdf_model(model_id: int, new_name: str = None, creator: str = None
         tags=original['tags']
     )
 
+@instrumented
 def get_model_statistics() -> dict:
     """Get statistics about RDF models"""
     try:
@@ -255,7 +267,7 @@ def get_model_statistics() -> dict:
             FROM {RDF_MODELS_FULL_TABLE_NAME}
         """
 
-        with get_connection() as conn:
+        with get_read_connection() as conn:
             with conn.cursor(row_factory=dict_row) as cur:
                 cur.execute(sql)
                 stats = cur.fetchone()
@@ -267,6 +279,7 @@ def get_model_statistics() -> dict:
         # Re-raise the exception so blueprint can return proper error status
         raise
 
+@instrumented
 def search_rdf_models(query: str, limit: int = 20) -> List[dict]:
     """Full-text search across RDF models"""
     ensure_table_exists()
@@ -294,7 +307,7 @@ def search_rdf_models(query: str, limit: int = 20) -> List[dict]:
     params = [search_pattern, search_pattern, search_pattern, query, 
               search_pattern, search_pattern, query, limit]
     
-    with get_connection() as conn:
+    with get_read_connection() as conn:
         with conn.cursor(row_factory=dict_row) as cur:
             cur.execute(sql, params)
             rows = cur.fetchall()
@@ -0,0 +1,202 @@
+"""
+Streaming RDF writers for (s, p, o) rows of the triple tables.
+
+Rows are turned straight into Turtle, N-Triples, JSON-LD or binary chunks without
+building an rdflib.Graph, so memory stays flat regardless of table size. Term
+mapping and escaping follow what rdflib produced for the same rows: `rdf:type`
+rows become IRI-valued `rdf:type` triples, every other object is a plain string
+literal.
+
+The binary format (BINARY_MEDIA_TYPE) is a dictionary-encoded stream:
+
+    magic   b"DTRDF" followed by a version byte (1)
+    frame*  uint32 term count, then per term: uint8 kind (0 IRI, 1 literal),
+            uint32 byte length, UTF-8 bytes
+            uint32 triple count, then per triple: uint32 s, p, o term ids
+
+All integers are little-endian. Term ids are global and assigned in order of
+appearance, so a reader appends each frame's terms to one table and resolves
+the frame's triples against it. The stream ends at EOF.
+"""
+import json
+import struct
+import sys
+from array import array
+from app.services.interning import IRI_FORMS
+from app.services import arrow_ipc
+
+RDF_TYPE = 'rdf:type'
+RDF_TYPE_IRI = '<http://www.w3.org/1999/02/22-rdf-syntax-ns#type>'
+RDF_TYPE_URI = 'http://www.w3.org/1999/02/22-rdf-syntax-ns#type'
+
+BINARY_MEDIA_TYPE = 'application/x-rdf-binary'
+BINARY_MAGIC = b"DTRDF\x01"
+TERM_IRI = 0
+TERM_LITERAL = 1
+
+# Rows buffered per yielded chunk
+CHUNK_ROWS = 2000
+
+
+def iri(value: str) -> str:
+    return IRI_FORMS.get(value)
+
+
+def _checked_iri(value: str) -> str:
+    # Validation is memoized along with the rendered form
+    IRI_FORMS.get(value)
+    return value
+
+
+def literal(value) -> str:
+    value = str(value)
+    return '"%s"' % value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"').replace("\r", "\\r")
+
+
+def write_ntriples(rows, chunk_rows: int = CHUNK_ROWS):
+    """Yield N-Triples text for `rows`, `chunk_rows` lines per chunk"""
+    iri = IRI_FORMS.get
+    buf = []
+    for s, p, o in rows:
+        if p == RDF_TYPE:
+            buf.append(f"{iri(s)} {RDF_TYPE_IRI} {iri(o)} .\n")
+        else:
+            buf.append(f"{iri(s)} {iri(p)} {literal(o)} .\n")
+        if len(buf) >= chunk_rows:
+            yield "".join(buf)
+            buf = []
+    if buf:
+        yield "".join(buf)
+
+
+def write_turtle(rows, chunk_rows: int = CHUNK_ROWS):
+    """Yield Turtle text for `rows`, `chunk_rows` rows per chunk.
+
+    Consecutive rows sharing a subject are folded into one predicate list, so
+    rows ordered by subject give fully grouped output.
+    """
+    iri = IRI_FORMS.get
+    buf = []
+    subject = None
+    for s, p, o in rows:
+        if p == RDF_TYPE:
+            po = f"a {iri(o)}"
+        else:
+            po = f"{iri(p)} {literal(o)}"
+        if s == subject:
+            buf.append(f" ;\n    {po}")
+        else:
+            if subject is not None:
+                buf.append(" .\n\n")
+            buf.append(f"{iri(s)} {po}")
+            subject = s
+        if len(buf) >= chunk_rows:
+            yield "".join(buf)
+            buf = []
+    if subject is not None:
+        buf.append(" .\n")
+    if buf:
+        yield "".join(buf)
+
+
+def write_jsonld(rows, chunk_rows: int = CHUNK_ROWS):
+    """Yield expanded JSON-LD for `rows`, one node object per run of rows sharing a subject"""
+    buf = ["["]
+    node = None
+    sep = "\n"
+    for s, p, o in rows:
+        if node is None or node["@id"] != s:
+            if node is not None:
+                buf.append(sep + json.dumps(node, ensure_ascii=False))
+                sep = ",\n"
+            node = {"@id": _checked_iri(s)}
+        if p == RDF_TYPE:
+            node.setdefault("@type", []).append(_checked_iri(o))
+        else:
+            node.setdefault(_checked_iri(p), []).append({"@value": str(o)})
+        if len(buf) >= chunk_rows:
+            yield "".join(buf)
+            buf = []
+    if node is not None:
+        buf.append(sep + json.dumps(node, ensure_ascii=False))
+    buf.append("\n]\n")
+    yield "".join(buf)
+
+
+def _binary_frame(terms: list, triples: array) -> bytes:
+    parts = [struct.pack("<I", len(terms))]
+    for kind, data in terms:
+        parts.append(struct.pack("<BI", kind, len(data)))
+        parts.append(data)
+    if sys.byteorder != "little":
+        triples.byteswap()
+    parts.append(struct.pack("<I", len(triples) // 3))
+    parts.append(triples.tobytes())
+    return b"".join(parts)
+
+
+def write_binary(rows, chunk_rows: int = CHUNK_ROWS):
+    """Yield the dictionary-encoded binary format for `rows`, one frame per chunk"""
+    ids = {}
+    terms = []
+    triples = array("I")
+
+    def term_id(kind, value):
+        key = (kind, value)
+        tid = ids.get(key)
+        if tid is None:
+            if kind == TERM_IRI:
+                _checked_iri(value)
+            tid = ids[key] = len(ids)
+            terms.append((kind, value.encode("utf-8")))
+        return tid
+
+    # The magic goes out with the first frame, so the first chunk waits on the
+    # first rows and a failing query raises before any byte is sent
+    header = BINARY_MAGIC
+    for s, p, o in rows:
+        triples.append(term_id(TERM_IRI, s))
+        if p == RDF_TYPE:
+            triples.append(term_id(TERM_IRI, RDF_TYPE_URI))
+            triples.append(term_id(TERM_IRI, o))
+        else:
+            triples.append(term_id(TERM_IRI, p))
+            triples.append(term_id(TERM_LITERAL, str(o)))
+        if len(triples) >= 3 * chunk_rows:
+            yield header + _binary_frame(terms, triples)
+            header = b""
+            terms.clear()
+            triples = array("I")
+    if triples:
+        yield header + _binary_frame(terms, triples)
+    elif header:
+        yield header
+
+
+def write_arrow(rows, chunk_rows: int = CHUNK_ROWS * 5):
+    """Yield an Arrow IPC stream of string columns s, p, o, values as stored in the triple tables"""
+    schema = arrow_ipc.pa.schema([("s", arrow_ipc.pa.string()), ("p", arrow_ipc.pa.string()), ("o", arrow_ipc.pa.string())])
+
+    def tables():
+        columns = ([], [], [])
+        for s, p, o in rows:
+            columns[0].append(s)
+            columns[1].append(p)
+            columns[2].append(None if o is None else str(o))
+            if len(columns[0]) >= chunk_rows:
+                yield arrow_ipc.pa.table(list(columns), schema=schema)
+                columns = ([], [], [])
+        yield arrow_ipc.pa.table(list(columns), schema=schema)
+
+    yield from arrow_ipc.write_stream(tables())
+
+
+# Supported media types -> (writer, Content-Type header)
+FORMATS = {
+    'text/turtle': (write_turtle, 'text/turtle; charset=utf-8'),
+    'application/n-triples': (write_ntriples, 'application/n-triples; charset=utf-8'),
+    'application/ld+json': (write_jsonld, 'application/ld+json; charset=utf-8'),
+    BINARY_MEDIA_TYPE: (write_binary, BINARY_MEDIA_TYPE),
+}
+if arrow_ipc.HAS_ARROW:
+    FORMATS[arrow_ipc.ARROW_STREAM_MEDIA_TYPE] = (write_arrow, arrow_ipc.ARROW_STREAM_MEDIA_TYPE)
@@ -0,0 +1,198 @@
+import threading
+import time
+from datetime import datetime
+from flask import current_app
+from app.db.postgres import get_connection, hot_statement
+from app.services.rdf_writer import FORMATS
+from app.services.triples import iter_postgres_rows
+from app.services.metrics import instrumented
+
+# Process-level snapshot of the latest graph, shared by all request threads
+_snapshot = None
+_refresh_lock = threading.Lock()
+_MISSING = object()
+
+# Thread running the periodic full rebuild, so no request waits for it
+_rebuilder = None
+_rebuilder_lock = threading.Lock()
+
+
+class GraphSnapshot:
+    """Immutable view of the synced triple table at a point in time.
+
+    `rows` maps (s, p) -> o, mirroring the synced table's primary key, so an
+    incremental update simply overwrites the previous value of a property.
+    """
+
+    def __init__(self, rows: dict, watermark, checked_at: float, built_at: float, cache: dict = None):
+        self.rows = rows
+        self.watermark = watermark
+        self.checked_at = checked_at
+        self.built_at = built_at
+        self._cache = cache if cache is not None else {}
+
+    @property
+    def age(self) -> float:
+        """Seconds since the snapshot was last reconciled with the synced table"""
+        return max(0.0, time.time() - self.checked_at)
+
+    @property
+    def version(self) -> str:
+        """Data-version token of the snapshot's contents"""
+        return f"pg:{self.watermark}:{len(self.rows)}"
+
+    def touched(self, checked_at: float, watermark=_MISSING) -> "GraphSnapshot":
+        """Return the same data marked as checked at `checked_at`, optionally with a newer watermark"""
+        if watermark is _MISSING:
+            watermark = self.watermark
+        # The derived cache depends only on `rows`, so it carries over
+        return GraphSnapshot(self.rows, watermark, checked_at, self.built_at, self._cache)
+
+    def cached(self, key):
+        """Return a value derived from this snapshot's data, or None"""
+        return self._cache.get(key)
+
+    def cache(self, key, value):
+        """Remember a value derived from this snapshot's data until the data changes"""
+        self._cache[key] = value
+        return value
+
+    def serialize(self, media_type: str = 'text/turtle'):
+        """Stream the snapshot serialized as `media_type`.
+
+        Only the (s, p) ordering is kept between requests; each response is
+        written chunk by chunk from the shared rows, so memory does not grow
+        with the number of formats or concurrent downloads.
+        """
+        ordered = self.cached("ordered")
+        if ordered is None:
+            # Sorting by (s, p) groups each subject into a single block
+            ordered = self.cache("ordered", sorted(self.rows.items()))
+        writer, _ = FORMATS[media_type]
+        return writer((s, p, o) for (s, p), o in ordered)
+
+
+def _increment_query(table: str) -> str:
+    # >= rather than > so rows committed with the watermark timestamp are not missed
+    return f"SELECT s, p, o, timestamp FROM {table} WHERE timestamp >= %s"
+
+
+@hot_statement
+def _prepare_increment(cur):
+    cfg = current_app.config
+    if not cfg["LATEST_SNAPSHOT_ENABLED"]:
+        return
+    table = cfg["PG_TRIPLE_TABLE"]
+    newest = cur.execute(f"SELECT MAX(timestamp) FROM {table}").fetchone()[0]
+    if isinstance(newest, datetime):
+        # The latest possible watermark matches nothing; its tzinfo keeps the column's parameter type
+        cur.execute(_increment_query(table), (datetime.max.replace(tzinfo=newest.tzinfo),), prepare=True)
+
+
+@instrumented
+def _fetch_rows(table: str, watermark=None):
+    with get_connection() as conn:
+        if watermark is None:
+            yield from iter_postgres_rows(conn, table, columns="s, p, o, timestamp")
+        else:
+            with conn.cursor() as cur:
+                cur.execute(_increment_query(table), (watermark,))
+                yield from cur.fetchall()
+
+
+def _rebuild(table: str) -> GraphSnapshot:
+    rows = {}
+    watermark = None
+    for s, p, o, ts in _fetch_rows(table):
+        rows[(s, p)] = o
+        if ts is not None and (watermark is None or ts > watermark):
+            watermark = ts
+    now = time.time()
+    return GraphSnapshot(rows, watermark, now, now)
+
+
+def _apply_increment(table: str, base: GraphSnapshot) -> GraphSnapshot:
+    rows = None
+    watermark = base.watermark
+    for s, p, o, ts in _fetch_rows(table, base.watermark):
+        if ts is not None and ts > watermark:
+            watermark = ts
+        if base.rows.get((s, p), _MISSING) == o:
+            continue
+        if rows is None:
+            # Copy on first change so readers of the old snapshot are unaffected
+            rows = dict(base.rows)
+        rows[(s, p)] = o
+    now = time.time()
+    if rows is None:
+        # Re-sent identical values still advance the watermark, keeping increments small
+        return base.touched(now, watermark)
+    return GraphSnapshot(rows, watermark, now, base.built_at)
+
+
+def _run_rebuild(app, table: str):
+    global _snapshot, _rebuilder
+    with app.app_context():
+        try:
+            rebuilt = _rebuild(table)
+            with _refresh_lock:
+                # Changes after the rebuild's read are past its watermark and picked up next
+                _snapshot = rebuilt
+        except Exception as e:
+            app.logger.warning(f"Snapshot rebuild failed, keeping the incremental snapshot: {e}")
+        finally:
+            with _rebuilder_lock:
+                _rebuilder = None
+
+
+def _start_rebuild(table: str):
+    global _rebuilder
+    with _rebuilder_lock:
+        if _rebuilder is None:
+            _rebuilder = threading.Thread(
+                target=_run_rebuild, args=(current_app._get_current_object(), table),
+                name="graph-snapshot-rebuild", daemon=True
+            )
+            _rebuilder.start()
+
+
+def refresh_snapshot(force_rebuild: bool = False) -> GraphSnapshot:
+    """Bring the snapshot up to date with the synced table.
+
+    Only rows at or past the stored watermark are read. The snapshot is built in
+    full on first use; the rebuild every LATEST_SNAPSHOT_REBUILD_SECONDS, which
+    drops deleted rows, runs on a background thread while increments continue.
+    """
+    global _snapshot
+    cfg = current_app.config
+    table = cfg["PG_TRIPLE_TABLE"]
+    with _refresh_lock:
+        base = _snapshot
+        if force_rebuild or base is None or base.watermark is None:
+            _snapshot = _rebuild(table)
+            return _snapshot
+        if time.time() - base.built_at > cfg["LATEST_SNAPSHOT_REBUILD_SECONDS"]:
+            _start_rebuild(table)
+        _snapshot = _apply_increment(table, base)
+        return _snapshot
+
+
+def get_snapshot() -> GraphSnapshot:
+    """Return the current snapshot, refreshing it if it is older than the refresh interval.
+
+    A request that arrives while another thread is refreshing is served the
+    previous snapshot instead of queueing behind the refresh.
+    """
+    snapshot = _snapshot
+    interval = current_app.config["LATEST_SNAPSHOT_REFRESH_SECONDS"]
+    if snapshot is not None and snapshot.age < interval:
+        return snapshot
+    if snapshot is not None and _refresh_lock.locked():
+        return snapshot
+    try:
+        return refresh_snapshot()
+    except Exception as e:
+        if snapshot is None:
+            raise
+        current_app.logger.warning(f"Snapshot refresh failed, serving stale snapshot: {e}")
+        return snapshot
@@ -0,0 +1,111 @@
+import threading
+import time
+import rdflib
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from flask import current_app
+from rdflib.namespace import OWL, RDF, RDFS, XSD
+from rdflib.plugins.sparql.algebra import traverse
+from rdflib.plugins.sparql.evaluate import evalQuery
+from rdflib.plugins.sparql.parserutils import CompValue
+from rdflib.plugins.sparql.processor import prepareQuery
+from app.services.snapshot import get_snapshot
+from app.services.triple_store import IndexedStore, QueryTimeout
+from app.services.triples import row_to_triple
+
+# Builds each snapshot's IndexedStore off the request threads, one at a time
+_store_builder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sparql-store")
+_store_lock = threading.Lock()
+
+# Prefixes available to queries without a PREFIX declaration
+DEFAULT_PREFIXES = {"rdf": RDF, "rdfs": RDFS, "owl": OWL, "xsd": XSD}
+
+
+class QueryRejected(Exception):
+    """Raised for queries the endpoint will not run"""
+
+
+def _reject_remote(node):
+    # SERVICE would make the app fetch arbitrary URLs on the caller's behalf
+    if isinstance(node, CompValue) and node.name == "ServiceGraphPattern":
+        raise QueryRejected("SERVICE is not supported")
+
+
+def _term_json(term) -> dict:
+    """Encode an rdflib term as a SPARQL 1.1 JSON results value"""
+    if isinstance(term, rdflib.URIRef):
+        return {"type": "uri", "value": str(term)}
+    if isinstance(term, rdflib.BNode):
+        return {"type": "bnode", "value": str(term)}
+    value = {"type": "literal", "value": str(term)}
+    if term.language:
+        value["xml:lang"] = term.language
+    elif term.datatype:
+        value["datatype"] = str(term.datatype)
+    return value
+
+
+def _build_store(rows: dict) -> IndexedStore:
+    return IndexedStore(row_to_triple(s, p, o) for (s, p), o in rows.items())
+
+
+def _snapshot_store(snapshot, deadline: float) -> IndexedStore:
+    """Return the snapshot's store, waiting for its build no later than `deadline`.
+
+    The store is built once per snapshot and shared by every query against it. A
+    build still running at the deadline raises QueryTimeout but carries on, so a
+    retry finds it ready.
+    """
+    with _store_lock:
+        build = snapshot.cached("store")
+        if build is None:
+            build = snapshot.cache("store", _store_builder.submit(_build_store, snapshot.rows))
+    try:
+        return build.result(timeout=max(0.0, deadline - time.monotonic()))
+    except FutureTimeout:
+        raise QueryTimeout("Query exceeded its time limit while the graph index was being built")
+
+
+def run_query(text: str) -> tuple:
+    """Run a SELECT or ASK query against the latest graph.
+
+    Returns (SPARQL JSON results, truncated). SELECT results stop at
+    SPARQL_MAX_ROWS rows; QueryTimeout is raised past SPARQL_TIMEOUT_SECONDS.
+    """
+    cfg = current_app.config
+    max_rows = cfg["SPARQL_MAX_ROWS"]
+    started = time.monotonic()
+    deadline = started + cfg["SPARQL_TIMEOUT_SECONDS"]
+
+    try:
+        query = prepareQuery(text, initNs=DEFAULT_PREFIXES)
+    except Exception as e:
+        raise QueryRejected(f"Invalid SPARQL query: {e}")
+    main = query.algebra
+    if main.name not in ("SelectQuery", "AskQuery"):
+        raise QueryRejected("Only SELECT and ASK queries are supported")
+    if main.datasetClause:
+        raise QueryRejected("FROM / FROM NAMED are not supported")
+    traverse(main, visitPre=_reject_remote)
+
+    store = _snapshot_store(get_snapshot(), deadline)
+    graph = rdflib.Graph(store=store.with_deadline(deadline))
+    res = evalQuery(graph, query)
+
+    if res["type_"] == "ASK":
+        return {"head": {}, "boolean": res["askAnswer"]}, False
+
+    names = [str(v) for v in res["vars_"]]
+    bindings = []
+    truncated = False
+    for row in res["bindings"]:
+        if len(bindings) >= max_rows:
+            truncated = True
+            break
+        if time.monotonic() > deadline:
+            raise QueryTimeout("Query exceeded its time limit")
+        bindings.append({
+            name: _term_json(row[var])
+            for name, var in zip(names, res["vars_"])
+            if row.get(var) is not None
+        })
+    return {"head": {"vars": names}, "results": {"bindings": bindings}}, truncated
@@ -0,0 +1,243 @@
+import asyncio
+import re
+from datetime import datetime, timezone
+from flask import current_app
+from app.config import Config
+from app.db.postgres import get_connection, hot_statement
+from app.db.postgres_async import async_connection
+from app.extensions import dbsql_connection
+from app.services.data_version import VersionedCache
+from app.services.metrics import instrumented
+
+_FIELD_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# Sensor mapping read from TELEMETRY_SENSOR_MAPPING_TABLE, re-read after the TTL
+_mapping_cache = VersionedCache(ttl=Config.TELEMETRY_SENSOR_MAPPING_TTL_SECONDS)
+
+
+@instrumented
+def _load_sensor_mapping(conn, table: str) -> dict:
+    with conn.cursor() as cursor:
+        cursor.execute(f"SELECT field, predicate FROM {table} ORDER BY field")
+        return {field: predicate for field, predicate in cursor.fetchall()}
+
+
+def sensor_mapping(conn=None) -> dict:
+    """Frontend field -> sensor predicate, as configured.
+
+    Read from the (field, predicate) table TELEMETRY_SENSOR_MAPPING_TABLE when
+    set, cached for TELEMETRY_SENSOR_MAPPING_TTL_SECONDS; otherwise, or when
+    the table cannot be read, TELEMETRY_SENSOR_FIELDS. `conn` is an open
+    warehouse connection to read the table with.
+    """
+    cfg = current_app.config
+    table = cfg["TELEMETRY_SENSOR_MAPPING_TABLE"]
+    if not table:
+        return cfg["TELEMETRY_SENSOR_FIELDS"]
+    mapping = _mapping_cache.get("mapping", table)
+    if mapping is not None:
+        return mapping
+    try:
+        if conn is None:
+            with dbsql_connection() as conn:
+                mapping = _load_sensor_mapping(conn, table)
+        else:
+            mapping = _load_sensor_mapping(conn, table)
+    except Exception as e:
+        current_app.logger.warning(f"Sensor mapping table {table} unavailable, using TELEMETRY_SENSOR_FIELDS: {e}")
+        mapping = None
+    if not mapping:
+        # Cached like a read, so a missing or empty table is not queried on every request
+        mapping = cfg["TELEMETRY_SENSOR_FIELDS"]
+    return _mapping_cache.put("mapping", table, mapping)
+
+
+def sensor_fields(mapping: dict) -> dict:
+    """Frontend field -> sensor predicate IRI for a sensor mapping"""
+    namespace = current_app.config["TELEMETRY_PREDICATE_NAMESPACE"]
+    fields = {}
+    for field, sensor in mapping.items():
+        if not _FIELD_RE.match(field):
+            raise ValueError(f"Invalid telemetry field name {field!r}")
+        fields[field] = sensor if "://" in sensor else namespace + sensor
+    return fields
+
+
+# Readings Postgres can cast to double precision; anything else is treated as missing
+_PG_NUMBER = r"^\s*[-+]?([0-9]+\.?[0-9]*|\.[0-9]+)([eE][-+]?[0-9]+)?\s*$"
+
+# dialect -> (bind parameter marker, numeric value of o or NULL, table holds only the latest (s, p))
+_DIALECTS = {
+    "warehouse": (lambda name: f":{name}", "TRY_CAST(o AS DOUBLE)", False),
+    "postgres": (
+        lambda name: f"%({name})s",
+        f"CASE WHEN o ~ '{_PG_NUMBER}' THEN CAST(o AS double precision) END",
+        True,
+    ),
+}
+
+
+def _pivot_query(table: str, dialect: str, mapping: dict, components=None) -> tuple:
+    """Return (SQL, params) with one row per component and one column per mapped sensor.
+
+    The sensor -> field pivot is a conditional aggregation, so one row per
+    component is transferred regardless of how many sensors are mapped. The
+    warehouse table keeps history, so the latest row per (s, p) is picked with a
+    window function first; the synced Postgres table already holds only that.
+    Each sensor also gets a column with the timestamp of its own reading, after
+    the value columns. `mapping` is a sensor_mapping() result; `components`
+    limits the result to those component IDs.
+    """
+    marker, sensor_value, latest_only = _DIALECTS[dialect]
+    prefix = current_app.config["TELEMETRY_COMPONENT_PREFIX"]
+    fields = sensor_fields(mapping)
+    params = {"component_prefix": prefix + "%"}
+    predicates = []
+    columns = []
+    read_at = []
+    for i, (field, predicate) in enumerate(fields.items()):
+        params[f"p{i}"] = predicate
+        predicates.append(marker(f"p{i}"))
+        columns.append(f"MAX(CASE WHEN p = {marker(f'p{i}')} THEN sensor_value END) as {field}")
+        read_at.append(f"MAX(CASE WHEN p = {marker(f'p{i}')} THEN timestamp END) as {field}_read_at")
+
+    component_clause = ""
+    if components:
+        subjects = []
+        for i, component in enumerate(components):
+            params[f"c{i}"] = prefix + component
+            subjects.append(marker(f"c{i}"))
+        component_clause = f"AND s IN ({', '.join(subjects)})"
+
+    source = f"""
+        SELECT s, p, {sensor_value} as sensor_value, timestamp
+        FROM {table}
+        WHERE p IN ({', '.join(predicates)})
+        AND s LIKE {marker('component_prefix')}
+        {component_clause}
+        AND o != 'None'
+        AND o IS NOT NULL
+    """
+    if not latest_only:
+        source = f"""
+            SELECT s, p, sensor_value, timestamp
+            FROM (
+                SELECT *, ROW_NUMBER() OVER (PARTITION BY s, p ORDER BY timestamp DESC) as rn
+                FROM ({source}) readings
+            ) ranked
+            WHERE rn = 1
+        """
+    q = f"""
+        SELECT substr(s, {len(prefix) + 1}) as component_id,
+               {', '.join(columns)},
+               {', '.join(read_at)},
+               MAX(timestamp) as timestamp
+        FROM ({source}) latest_sensor_triples
+        GROUP BY s
+        ORDER BY s
+    """
+    return q, params
+
+
+def _payload(rows, mapping: dict, table: str, source: str) -> dict:
+    """Shape pivoted (component_id, field..., field_read_at..., timestamp) rows for the frontend"""
+    fields = list(mapping)
+    telemetry_data = []
+    for row in rows:
+        item = {"componentID": row[0]}
+        missing = []
+        read_at = {}
+        for i, field in enumerate(fields):
+            value = row[1 + i]
+            # The frontend expects a number for every field; missing readings are listed separately
+            if value is None:
+                missing.append(field)
+            else:
+                read_at[field] = str(row[1 + len(fields) + i])
+            item[field] = 0.0 if value is None else float(value)
+        item["timestamp"] = str(row[-1])
+        # The component timestamp is the newest of its sensors; each sensor's own one tells which readings moved
+        item["sensorTimestamps"] = read_at
+        if missing:
+            item["missingSensors"] = missing
+        telemetry_data.append(item)
+
+    return {
+        "data": telemetry_data,
+        "count": len(telemetry_data),
+        "table": table,
+        "source": source,
+        "status": "success",
+        "mapping": dict(mapping)
+    }
+
+
+@instrumented
+def query_triples_telemetry(conn, triple_table: str, components=None) -> dict:
+    """Latest reading of each component sensor from the triple table, in the frontend's format"""
+    mapping = sensor_mapping(conn)
+    q, params = _pivot_query(triple_table, "warehouse", mapping, components)
+    with conn.cursor() as cursor:
+        cursor.execute(q, params)
+        rows = cursor.fetchall()
+    return _payload(rows, mapping, triple_table, "rdf_triples")
+
+
+@hot_statement
+def _prepare_lakebase_pivot(cur):
+    cfg = current_app.config
+    if not cfg["LAKEBASE_TELEMETRY_ENABLED"]:
+        return
+    table = cfg["TELEMETRY_SENSOR_MAPPING_TABLE"]
+    # Only a mapping already held is used; preparing never waits on the warehouse
+    mapping = _mapping_cache.get("mapping", table) if table else cfg["TELEMETRY_SENSOR_FIELDS"]
+    if mapping is None:
+        return
+    q, params = _pivot_query(cfg["PG_TRIPLE_TABLE"], "postgres", mapping)
+    # No subject matches an empty pattern
+    cur.execute(q, dict(params, component_prefix=""), prepare=True)
+
+
+@instrumented
+def query_lakebase_telemetry(table: str, max_staleness: float, components=None):
+    """Latest component sensor readings from the synced Lakebase table, as (payload, version).
+
+    The synced table is keyed on (s, p), so it already holds only the latest
+    value of each sensor and needs no window function. Returns None when its
+    newest row is older than `max_staleness` seconds (0 disables the check), so
+    the caller can fall back to the warehouse.
+    """
+    mapping = sensor_mapping()
+    q, params = _pivot_query(table, "postgres", mapping, components)
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(q, params)
+            rows = cur.fetchall()
+    return _lakebase_result(rows, mapping, table, max_staleness)
+
+
+@instrumented
+async def query_lakebase_telemetry_async(table: str, max_staleness: float, components=None):
+    """query_lakebase_telemetry on the async Lakebase pool"""
+    # A mapping table read is a blocking warehouse query, keep it off the event loop
+    mapping = await asyncio.to_thread(sensor_mapping)
+    q, params = _pivot_query(table, "postgres", mapping, components)
+    async with async_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(q, params)
+            rows = await cur.fetchall()
+    return _lakebase_result(rows, mapping, table, max_staleness)
+
+
+def _lakebase_result(rows: list, mapping: dict, table: str, max_staleness: float):
+    newest = max((row[-1] for row in rows if row[-1] is not None), default=None)
+    if max_staleness > 0:
+        if newest is None:
+            return None
+        if isinstance(newest, datetime):
+            if newest.tzinfo is None:
+                newest = newest.replace(tzinfo=timezone.utc)
+            if (datetime.now(timezone.utc) - newest).total_seconds() > max_staleness:
+                return None
+
+    return _payload(rows, mapping, table, "lakebase"), f"pg:{newest}:{len(rows)}"
@@ -0,0 +1,178 @@
+import threading
+from app.config import Config
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+
+class RollingStats:
+    """Per-component, per-sensor running baselines updated from telemetry snapshots.
+
+    Each (component, sensor) keeps a Welford running mean and variance and an
+    EWMA of its readings, stored as (components x sensors) arrays so a whole
+    snapshot is folded in with a few vectorised operations. Missing and
+    non-finite readings are masked out per cell, so they neither count as
+    samples nor move the baseline. A sensor is only counted again once its own
+    reading timestamp ("sensorTimestamps", else the component's) moves, so
+    neither re-published snapshots nor another sensor of the same component
+    updating fold a stale reading in twice. The z-score of the latest reading is taken against the baseline
+    before that reading was added.
+    """
+
+    def __init__(self, sensors: list, alpha: float):
+        self.sensors = list(sensors)
+        self.alpha = alpha
+        self._lock = threading.Lock()
+        self._rows = {}
+        self._components = []
+        self._timestamps = []
+        # Per component, sensor -> timestamp of the last reading folded in
+        self._read_at = []
+        width = len(self.sensors)
+        self.count = np.zeros((0, width), dtype=np.int64)
+        self.mean = np.zeros((0, width))
+        self.m2 = np.zeros((0, width))
+        self.ewma = np.zeros((0, width))
+        self.last = np.zeros((0, width))
+        self.z = np.zeros((0, width))
+        self.updates = 0
+
+    _ARRAYS = ("count", "mean", "m2", "ewma", "last", "z")
+
+    def _grow(self, extra: int):
+        width = len(self.sensors)
+        for name in self._ARRAYS:
+            current = getattr(self, name)
+            setattr(self, name, np.vstack([current, np.zeros((extra, width), dtype=current.dtype)]))
+
+    def add_sensors(self, sensors):
+        """Start baselines for sensors not tracked yet, e.g. after the sensor mapping changed"""
+        with self._lock:
+            new = [sensor for sensor in sensors if sensor not in self.sensors]
+            if not new:
+                return
+            self.sensors = self.sensors + new
+            for name in self._ARRAYS:
+                current = getattr(self, name)
+                setattr(self, name, np.hstack([current, np.zeros((len(current), len(new)), dtype=current.dtype)]))
+
+    def update(self, rows: list) -> int:
+        """Fold the readings of a telemetry payload into the baselines, returning how many were new"""
+        with self._lock:
+            idx, values = [], []
+            for row in rows:
+                component = row["componentID"]
+                i = self._rows.get(component)
+                if i is None:
+                    i = self._rows[component] = len(self._components)
+                    self._components.append(component)
+                    self._timestamps.append(None)
+                    self._read_at.append({})
+                elif self._timestamps[i] == row["timestamp"]:
+                    continue
+                self._timestamps[i] = row["timestamp"]
+                missing = row.get("missingSensors", ())
+                stamps = row.get("sensorTimestamps")
+                read_at = self._read_at[i]
+                # None, absent and not advanced readings become NaN and are masked below
+                reading, advanced = [], False
+                for sensor in self.sensors:
+                    stamp = row["timestamp"] if stamps is None else stamps.get(sensor)
+                    if sensor in missing or stamp is None or read_at.get(sensor) == stamp:
+                        reading.append(np.nan)
+                        continue
+                    read_at[sensor] = stamp
+                    reading.append(row.get(sensor))
+                    advanced = True
+                if advanced:
+                    idx.append(i)
+                    values.append(reading)
+            if len(self._components) > len(self.count):
+                self._grow(len(self._components) - len(self.count))
+            if not idx:
+                return 0
+
+            idx = np.asarray(idx)
+            x = np.asarray(values, dtype=float)
+            present = np.isfinite(x)
+            x = np.where(present, x, 0.0)
+            count = self.count[idx]
+            mean = self.mean[idx]
+            m2 = self.m2[idx]
+            ewma = self.ewma[idx]
+
+            # Score against the baseline as it was before this reading
+            std = np.sqrt(m2 / np.maximum(count - 1, 1))
+            with np.errstate(divide="ignore", invalid="ignore"):
+                z = np.where(present & (count > 1) & (std > 0), (x - mean) / std, 0.0)
+
+            # Masked cells keep their previous state
+            n = count + present
+            delta = x - mean
+            new_mean = mean + delta / np.maximum(n, 1)
+            self.count[idx] = n
+            self.mean[idx] = np.where(present, new_mean, mean)
+            self.m2[idx] = np.where(present, m2 + delta * (x - new_mean), m2)
+            self.ewma[idx] = np.where(present, np.where(count == 0, x, self.alpha * x + (1 - self.alpha) * ewma), ewma)
+            self.last[idx] = np.where(present, x, self.last[idx])
+            self.z[idx] = np.where(present, z, self.z[idx])
+            self.updates += 1
+            return len(idx)
+
+    def anomalies(self, threshold: float, min_samples: int, components=None, include_all: bool = False) -> list:
+        """Per-component statistics, keeping only sensors with |z| >= `threshold` unless `include_all`"""
+        with self._lock:
+            if components:
+                order = [self._rows[c] for c in components if c in self._rows]
+            else:
+                order = list(range(len(self._components)))
+            if not order:
+                return []
+            idx = np.asarray(order)
+            count = self.count[idx]
+            variance = self.m2[idx] / np.maximum(count - 1, 1)
+            z = np.where(count > min_samples, self.z[idx], 0.0)
+            flagged = np.abs(z) >= threshold
+            mean, ewma, last = self.mean[idx], self.ewma[idx], self.last[idx]
+            timestamps = [self._timestamps[i] for i in order]
+            names = [self._components[i] for i in order]
+            tracked = list(self.sensors)
+
+        result = []
+        for r, component in enumerate(names):
+            if not include_all and not flagged[r].any():
+                continue
+            sensors = {}
+            for c, sensor in enumerate(tracked):
+                if not include_all and not flagged[r, c]:
+                    continue
+                sensors[sensor] = {
+                    "value": float(last[r, c]),
+                    "mean": float(mean[r, c]),
+                    "variance": float(variance[r, c]),
+                    "ewma": float(ewma[r, c]),
+                    "zScore": float(z[r, c]),
+                    "anomalous": bool(flagged[r, c]),
+                    "samples": int(count[r, c]),
+                }
+            result.append({
+                "componentID": component,
+                "timestamp": timestamps[r],
+                "samples": int(count[r].max()) if count.shape[1] else 0,
+                "sensors": sensors,
+            })
+        return result
+
+
+# Baselines shared by the snapshot refresher and /api/telemetry/anomalies
+ANOMALY_STATS = RollingStats(list(Config.TELEMETRY_SENSOR_FIELDS), Config.TELEMETRY_ANOMALY_EWMA_ALPHA) if HAS_NUMPY else None
+
+
+def record_snapshot(payload: dict):
+    """Update the shared baselines from a newly published telemetry payload"""
+    if ANOMALY_STATS is not None:
+        ANOMALY_STATS.add_sensors(payload.get("mapping", ()))
+        ANOMALY_STATS.update(payload["data"])
@@ -0,0 +1,194 @@
+from datetime import datetime, timedelta, timezone
+from app.services.arrow_ipc import cursor_tables, write_stream
+from app.extensions import dbsql_connection
+from app.services.metrics import instrumented
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+# Sensor columns of the bronze telemetry table
+SENSORS = ["temperature", "pressure", "vibration", "speed", "rotation", "flow"]
+
+# Warehouse buckets fetched per output point before an LTTB pass picks the survivors
+LTTB_OVERSAMPLE = 8
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def parse_sensors(values) -> list:
+    """Map requested sensor names ("temperature" or "sensor_temperature") to bronze sensors.
+
+    Raises ValueError for unknown sensors.
+    """
+    sensors = []
+    for value in values:
+        name = value[len("sensor_"):] if value.startswith("sensor_") else value
+        if name not in SENSORS:
+            raise ValueError(f"Unknown sensor {value!r}, expected one of: {', '.join(SENSORS)}")
+        if name not in sensors:
+            sensors.append(name)
+    return sensors or list(SENSORS)
+
+
+def _micros(dt: datetime) -> int:
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return (dt - _EPOCH) // timedelta(microseconds=1)
+
+
+def lttb(x, y, n: int) -> tuple:
+    """Largest-Triangle-Three-Buckets: pick `n` of the (x, y) points preserving the visual shape"""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    size = len(x)
+    if n >= size or n < 3:
+        return x, y
+    keep = np.empty(n, dtype=np.int64)
+    keep[0], keep[-1] = 0, size - 1
+    # Interior points split into n - 2 buckets; each keeps the point forming the
+    # largest triangle with the previous pick and the next bucket's average
+    edges = np.linspace(1, size - 1, n - 1).astype(np.int64)
+    a = 0
+    for i in range(n - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nlo, nhi = hi, edges[i + 2] if i + 2 < len(edges) else size
+        avg_x = x[nlo:nhi].mean() if nhi > nlo else x[-1]
+        avg_y = y[nlo:nhi].mean() if nhi > nlo else y[-1]
+        areas = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(areas.argmax())
+        keep[i + 1] = a
+    return x[keep], y[keep]
+
+
+def _bucket_width(start_us: int, end_us: int, buckets: int) -> int:
+    return max(1, -(-(end_us - start_us) // buckets))
+
+
+def _component_clause(components, params: dict) -> str:
+    if not components:
+        return ""
+    names = []
+    for i, component in enumerate(components):
+        params[f"component{i}"] = component
+        names.append(f":component{i}")
+    return f"AND component_id IN ({', '.join(names)})"
+
+
+def _history_query(table: str, start_us: int, end_us: int, width_us: int, components, sensors) -> tuple:
+    """Return (SQL, params) grouping the window into buckets of `width_us` per component"""
+    aggregates = ",\n".join(
+        f"min(sensor_{s}) as {s}_min, max(sensor_{s}) as {s}_max, avg(sensor_{s}) as {s}_avg" for s in sensors
+    )
+    params = {}
+    component_clause = _component_clause(components, params)
+    q = f"""
+        SELECT component_id,
+               FLOOR((unix_micros(timestamp) - {start_us}) / {width_us}) as bucket,
+               {aggregates}
+        FROM {table}
+        WHERE timestamp >= timestamp_micros({start_us})
+          AND timestamp < timestamp_micros({end_us})
+          {component_clause}
+        GROUP BY component_id, bucket
+        ORDER BY component_id, bucket
+    """
+    return q, params or None
+
+
+@instrumented
+def query_history(conn, table: str, start: datetime, end: datetime, points: int,
+                  components=(), sensors=SENSORS, method: str = "minmax") -> dict:
+    """Downsampled sensor history, at most `points` samples per (component, sensor) series.
+
+    The warehouse groups rows into equal time buckets and returns min/max/avg per
+    bucket, so the transfer is bounded by `points` regardless of the raw sample
+    rate. With method="lttb" (requires NumPy) it fetches LTTB_OVERSAMPLE times as
+    many bucket averages and reduces them to `points` with LTTB.
+    """
+    if method == "lttb" and not HAS_NUMPY:
+        method = "minmax"
+    buckets = points * LTTB_OVERSAMPLE if method == "lttb" else points
+    start_us, end_us = _micros(start), _micros(end)
+    width_us = _bucket_width(start_us, end_us, buckets)
+    q, params = _history_query(table, start_us, end_us, width_us, components, sensors)
+    with conn.cursor() as cursor:
+        cursor.execute(q, params)
+        rows = cursor.fetchall()
+
+    series = {}
+    for row in rows:
+        component_id, bucket = str(row[0]), int(row[1])
+        t = (start_us + bucket * width_us) / 1_000_000
+        for i, sensor in enumerate(sensors):
+            low, high, avg = row[2 + 3 * i:5 + 3 * i]
+            if avg is None:
+                continue
+            entry = series.setdefault((component_id, sensor), {"t": [], "min": [], "max": [], "avg": []})
+            entry["t"].append(t)
+            entry["min"].append(float(low))
+            entry["max"].append(float(high))
+            entry["avg"].append(float(avg))
+
+    result = []
+    for (component_id, sensor), entry in series.items():
+        item = {"componentID": component_id, "sensor": sensor}
+        if method == "lttb":
+            t, values = lttb(entry["t"], entry["avg"], points)
+            item["t"] = [_iso(v) for v in t.tolist()]
+            item["value"] = values.tolist()
+        else:
+            item["t"] = [_iso(v) for v in entry["t"]]
+            item.update(min=entry["min"], max=entry["max"], avg=entry["avg"])
+        result.append(item)
+
+    return {
+        "from": _iso(start_us / 1_000_000),
+        "to": _iso(end_us / 1_000_000),
+        "points": points,
+        "bucket_seconds": width_us / 1_000_000,
+        "method": method,
+        "table": table,
+        "series": result,
+        "status": "success",
+    }
+
+
+def stream_history_arrow(table: str, start: datetime, end: datetime, points: int,
+                         components=(), sensors=SENSORS, batch_size: int = 10000):
+    """Yield the min/max/avg buckets of query_history as an Arrow IPC stream, one row per bucket"""
+    start_us, end_us = _micros(start), _micros(end)
+    width_us = _bucket_width(start_us, end_us, points)
+    q, params = _history_query(table, start_us, end_us, width_us, components, sensors)
+    columns = ", ".join(f"{s}_min, {s}_max, {s}_avg" for s in sensors)
+    q = f"""
+        SELECT component_id, timestamp_micros({start_us} + bucket * {width_us}) as bucket_start, {columns}
+        FROM ({q}) buckets
+        ORDER BY component_id, bucket_start
+    """
+    with dbsql_connection() as conn, conn.cursor() as cursor:
+        cursor.execute(q, params)
+        yield from write_stream(cursor_tables(cursor, batch_size))
+
+
+def stream_raw_arrow(table: str, start: datetime, end: datetime, components=(), batch_size: int = 10000):
+    """Yield every bronze row between `start` and `end` as an Arrow IPC stream"""
+    params = {}
+    component_clause = _component_clause(components, params)
+    q = f"""
+        SELECT *
+        FROM {table}
+        WHERE timestamp >= timestamp_micros({_micros(start)})
+          AND timestamp < timestamp_micros({_micros(end)})
+          {component_clause}
+        ORDER BY timestamp
+    """
+    with dbsql_connection() as conn, conn.cursor() as cursor:
+        cursor.execute(q, params or None)
+        yield from write_stream(cursor_tables(cursor, batch_size))
+
+
+def _iso(seconds: float) -> str:
+    return datetime.fromtimestamp(seconds, timezone.utc).isoformat()
@@ -0,0 +1,234 @@
+import queue
+import threading
+import time
+from flask import current_app
+from app.extensions import dbsql_connection
+from app.services.data_version import make_etag, warehouse_table_version
+from app.services.telemetry import query_triples_telemetry, query_lakebase_telemetry
+from app.services.telemetry_anomalies import record_snapshot
+
+# Process-level telemetry snapshot, published by a single background refresher
+_snapshot = None
+_ready = threading.Event()
+_refresher = None
+_refresher_lock = threading.Lock()
+
+# Stream subscribers receiving the changes between consecutive snapshots
+_subscribers = set()
+_subscribers_lock = threading.Lock()
+
+# Pending change batches per subscriber before it is resynced with a full snapshot
+SUBSCRIBER_QUEUE_SIZE = 64
+
+# Payload fields that identify a component reading rather than a sensor value
+_NON_SENSOR_FIELDS = ("componentID", "timestamp", "missingSensors", "sensorTimestamps")
+
+
+class TelemetrySnapshot:
+    """Immutable latest-value telemetry payload shared by all request threads"""
+
+    def __init__(self, payload: dict, version: str, refreshed_at: float, by_component: dict = None):
+        self.payload = payload
+        self.version = version
+        self.refreshed_at = refreshed_at
+        # componentID -> reading, for keyed lookups of a few components
+        if by_component is None:
+            by_component = {row["componentID"]: row for row in payload["data"]}
+        self.by_component = by_component
+
+    @property
+    def age(self) -> float:
+        """Seconds since the payload was last confirmed current"""
+        return max(0.0, time.time() - self.refreshed_at)
+
+    @property
+    def etag(self) -> str:
+        return make_etag(self.version, "telemetry/triples")
+
+    def touched(self) -> "TelemetrySnapshot":
+        return TelemetrySnapshot(self.payload, self.version, time.time(), self.by_component)
+
+
+def _publish(snapshot: TelemetrySnapshot):
+    global _snapshot
+    previous = _snapshot
+    _snapshot = snapshot
+    _ready.set()
+    if previous is not None and previous.version == snapshot.version:
+        return
+    record_snapshot(snapshot.payload)
+    if previous is None:
+        return
+    changes = diff_payloads(previous.payload, snapshot.payload)
+    if not changes:
+        return
+    with _subscribers_lock:
+        subscribers = list(_subscribers)
+    for subscriber in subscribers:
+        subscriber.offer(changes)
+
+
+def _refresh(triple_table: str):
+    cfg = current_app.config
+    current = _snapshot
+    if cfg["LAKEBASE_TELEMETRY_ENABLED"]:
+        try:
+            result = query_lakebase_telemetry(cfg["PG_TRIPLE_TABLE"], cfg["LAKEBASE_TELEMETRY_MAX_STALENESS_SECONDS"])
+        except Exception as e:
+            current_app.logger.warning(f"Lakebase telemetry unavailable, refreshing from the warehouse: {e}")
+            result = None
+        if result is not None:
+            payload, version = result
+            if current is not None and version == current.version:
+                _publish(current.touched())
+            else:
+                _publish(TelemetrySnapshot(payload, version, time.time()))
+            return
+
+    with dbsql_connection() as conn:
+        token = warehouse_table_version(conn, triple_table)
+        if current is not None and token is not None and token == current.version:
+            _publish(current.touched())
+            return
+        payload = query_triples_telemetry(conn, triple_table)
+    # Without a table version, publish under a fresh token so ETags still change
+    _publish(TelemetrySnapshot(payload, token or f"t:{time.time()}", time.time()))
+
+
+def _run(app, triple_table: str):
+    with app.app_context():
+        while True:
+            interval = app.config["TELEMETRY_SNAPSHOT_REFRESH_SECONDS"]
+            try:
+                _refresh(triple_table)
+            except Exception as e:
+                app.logger.warning(f"Telemetry snapshot refresh failed: {e}")
+            time.sleep(interval)
+
+
+def start_refresher(app, triple_table: str):
+    """Start the background refresher once per process.
+
+    Only the refresher thread queries the warehouse, so request threads make no
+    warehouse round trips. The synced Lakebase table is preferred while it is
+    fresh.
+    """
+    global _refresher
+    with _refresher_lock:
+        if _refresher is None:
+            _refresher = threading.Thread(
+                target=_run, args=(app, triple_table), name="telemetry-snapshot", daemon=True
+            )
+            _refresher.start()
+
+
+def peek_snapshot():
+    """Return the published snapshot without waiting, or None while it is cold"""
+    return _snapshot
+
+
+def get_snapshot(timeout: float):
+    """Return the published snapshot, waiting up to `timeout` seconds for the first one"""
+    if _snapshot is None:
+        _ready.wait(timeout)
+    return _snapshot
+
+
+def diff_payloads(old: dict, new: dict) -> list:
+    """Changes from `old` to `new`, one dict per (component, sensor).
+
+    A changed or new reading carries its "value". A sensor that is no longer
+    reported, or newly listed in "missingSensors" (whose 0.0 placeholder is not
+    a reading), is sent with "removed": True instead, as is a whole component
+    that dropped out (then without a "sensor" key), so clients can drop it.
+    """
+    before = {row["componentID"]: row for row in old["data"]}
+    changes = []
+    for row in new["data"]:
+        previous = before.pop(row["componentID"], {})
+        was_missing = set(previous.get("missingSensors", ()))
+        missing = set(row.get("missingSensors", ()))
+        for sensor, value in row.items():
+            if sensor in _NON_SENSOR_FIELDS:
+                continue
+            reported = sensor in previous and sensor not in was_missing
+            if sensor in missing:
+                if not reported:
+                    continue
+                change = {"removed": True}
+            elif reported and previous[sensor] == value:
+                continue
+            else:
+                change = {"value": value}
+            changes.append({"componentID": row["componentID"], "sensor": sensor, **change,
+                            "timestamp": row["timestamp"]})
+        for sensor in previous:
+            if sensor not in _NON_SENSOR_FIELDS and sensor not in row and sensor not in was_missing:
+                changes.append({
+                    "componentID": row["componentID"],
+                    "sensor": sensor,
+                    "removed": True,
+                    "timestamp": row["timestamp"],
+                })
+    for component_id, previous in before.items():
+        changes.append({
+            "componentID": component_id,
+            "removed": True,
+            "timestamp": previous["timestamp"],
+        })
+    return changes
+
+
+class Subscriber:
+    """Change feed of one stream client, optionally limited to some components.
+
+    Changes are queued by the refresher thread; a client that falls more than
+    SUBSCRIBER_QUEUE_SIZE batches behind is sent a full snapshot instead.
+    """
+
+    def __init__(self, components=None):
+        self.components = set(components) if components else None
+        self._queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._resync = threading.Event()
+
+    def select(self, rows: list) -> list:
+        if self.components is None:
+            return rows
+        return [row for row in rows if row["componentID"] in self.components]
+
+    def offer(self, changes: list):
+        changes = self.select(changes)
+        if not changes:
+            return
+        try:
+            self._queue.put_nowait(changes)
+        except queue.Full:
+            self._resync.set()
+
+    def next_event(self, timeout: float):
+        """Return ("snapshot", rows) or ("delta", changes), or None after `timeout` seconds"""
+        if not self._resync.is_set():
+            try:
+                return "delta", self._queue.get(timeout=timeout)
+            except queue.Empty:
+                if not self._resync.is_set():
+                    return None
+        self._resync.clear()
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        return "snapshot", self.select(_snapshot.payload["data"])
+
+
+def subscribe(components=None) -> Subscriber:
+    subscriber = Subscriber(components)
+    with _subscribers_lock:
+        _subscribers.add(subscriber)
+    return subscriber
+
+
+def unsubscribe(subscriber: Subscriber):
+    with _subscribers_lock:
+        _subscribers.discard(subscriber)
@@ -0,0 +1,103 @@
+import time
+from rdflib.store import Store
+
+
+class QueryTimeout(Exception):
+    """Raised when a query runs past its deadline"""
+
+
+# How many index entries are scanned between deadline checks
+_DEADLINE_CHECK_EVERY = 1024
+
+
+def _add(index: dict, a: int, b: int, c: int):
+    index.setdefault(a, {}).setdefault(b, set()).add(c)
+
+
+class IndexedStore(Store):
+    """Read-only rdflib store over dictionary-encoded SPO/POS/OSP indexes.
+
+    Terms are interned to integer ids once; each index maps id -> id -> set(id),
+    so every triple pattern rdflib's SPARQL engine asks for is answered from the
+    permutation whose prefix matches the bound positions.
+    """
+
+    def __init__(self, triples=(), deadline: float = None):
+        super().__init__()
+        self._ids = {}
+        self._terms = []
+        self._spo = {}
+        self._pos = {}
+        self._osp = {}
+        self._count = 0
+        self._deadline = deadline
+        for s, p, o in triples:
+            s, p, o = self._intern(s), self._intern(p), self._intern(o)
+            if o in self._spo.get(s, {}).get(p, ()):
+                continue
+            _add(self._spo, s, p, o)
+            _add(self._pos, p, o, s)
+            _add(self._osp, o, s, p)
+            self._count += 1
+
+    def _intern(self, term) -> int:
+        tid = self._ids.get(term)
+        if tid is None:
+            tid = self._ids[term] = len(self._terms)
+            self._terms.append(term)
+        return tid
+
+    def with_deadline(self, deadline: float) -> "IndexedStore":
+        """Return a view sharing these indexes that raises QueryTimeout past `deadline`"""
+        view = IndexedStore.__new__(IndexedStore)
+        view.__dict__.update(self.__dict__)
+        view._deadline = deadline
+        return view
+
+    def _scan(self, index: dict, a: int = None, b: int = None):
+        """Yield (a, b, c) id triples from `index` with the given prefix bound"""
+        firsts = index.items() if a is None else [(a, index.get(a, {}))]
+        for x, seconds in firsts:
+            pairs = seconds.items() if b is None else [(b, seconds.get(b, ()))]
+            for y, thirds in pairs:
+                for z in thirds:
+                    yield x, y, z
+
+    def _lookup(self, s, p, o):
+        """Pick the index whose prefix covers the bound positions, yielding (s, p, o) ids"""
+        if s is not None:
+            if o is not None and p is None:
+                return ((s_, p_, o_) for o_, s_, p_ in self._scan(self._osp, o, s))
+            return (t for t in self._scan(self._spo, s, p) if o is None or t[2] == o)
+        if p is not None:
+            return ((s_, p_, o_) for p_, o_, s_ in self._scan(self._pos, p, o))
+        if o is not None:
+            return ((s_, p_, o_) for o_, s_, p_ in self._scan(self._osp, o))
+        return self._scan(self._spo)
+
+    def triples(self, triple_pattern, context=None):
+        ids = []
+        for term in triple_pattern:
+            if term is None:
+                ids.append(None)
+                continue
+            tid = self._ids.get(term)
+            if tid is None:
+                return
+            ids.append(tid)
+        terms = self._terms
+        deadline = self._deadline
+        for n, (s, p, o) in enumerate(self._lookup(*ids)):
+            if deadline is not None and n % _DEADLINE_CHECK_EVERY == 0 and time.monotonic() > deadline:
+                raise QueryTimeout("Query exceeded its time limit")
+            yield (terms[s], terms[p], terms[o]), iter(())
+
+    def __len__(self, context=None) -> int:
+        return self._count
+
+    def add(self, triple, context, quoted=False):
+        raise TypeError("IndexedStore is read-only")
+
+    def remove(self, triple, context=None):
+        raise TypeError("IndexedStore is read-only")
+
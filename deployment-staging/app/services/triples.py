@@ -1,44 +1,297 @@
 import rdflib
 from flask import current_app
-from app.db.postgres import get_connection
-from app.extensions import get_dbsql_connection
+from app.db.postgres import get_connection, hot_statement
+from app.extensions import dbsql_connection
+from app.services.rdf_writer import FORMATS, RDF_TYPE, RDF_TYPE_URI
+from app.services.data_version import warehouse_table_version
+from app.services import pit_cache
+from app.services.arrow_ipc import HAS_ARROW, ARROW_STREAM_MEDIA_TYPE, cursor_tables, write_stream
+from app.services.metrics import instrumented
+from app.services.interning import URIREFS
 
-def fetch_postgres() -> str:
+# Rows fetched per round trip from the server-side / Arrow cursors
+FETCH_BATCH_ROWS = 10000
+
+def row_to_triple(s, p, o) -> tuple:
+    """Map a (s, p, o) row of the triple tables to an rdflib triple"""
+    uriref = URIREFS.get
+    if p == RDF_TYPE:
+        return uriref(s), rdflib.RDF.type, uriref(o)
+    return uriref(s), uriref(p), rdflib.Literal(str(o))
+
+def _like_prefix(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+class TripleFilter:
+    """Subgraph selection pushed into the triple queries as a WHERE clause.
+
+    Different parameters are ANDed, repeated values of one parameter are ORed.
+    `types` keeps subjects whose rdf:type is one of the given classes.
+    """
+
+    def __init__(self, subjects=(), subject_prefix: str = None, predicates=(), types=()):
+        self.subjects = list(subjects)
+        self.subject_prefix = subject_prefix or None
+        # The tables store rdf:type as the CURIE, accept either spelling
+        self.predicates = [RDF_TYPE if p == RDF_TYPE_URI else p for p in predicates]
+        self.types = list(types)
+
+    @classmethod
+    def from_args(cls, args):
+        """Build a filter from request query parameters, or None when none are given"""
+        f = cls(args.getlist('subject'), args.get('subject_prefix'), args.getlist('predicate'), args.getlist('type'))
+        return f if f else None
+
+    def __bool__(self) -> bool:
+        return bool(self.subjects or self.subject_prefix or self.predicates or self.types)
+
+    def where(self, marker, typed_subjects: str) -> tuple:
+        """Return (SQL condition, params dict).
+
+        `marker(name)` renders a bind parameter in the driver's paramstyle and
+        `typed_subjects` is a query selecting s, with a `{types}` placeholder for
+        the rdf:type values to match.
+        """
+        clauses = []
+        params = {}
+
+        def bind(prefix, values):
+            names = []
+            for i, value in enumerate(values):
+                name = f"{prefix}{i}"
+                params[name] = value
+                names.append(marker(name))
+            return ", ".join(names)
+
+        if self.subjects:
+            clauses.append(f"s IN ({bind('subject', self.subjects)})")
+        if self.subject_prefix:
+            clauses.append(f"s LIKE {bind('subject_prefix', [_like_prefix(self.subject_prefix)])}")
+        if self.predicates:
+            clauses.append(f"p IN ({bind('predicate', self.predicates)})")
+        if self.types:
+            clauses.append(f"s IN ({typed_subjects.format(types=bind('type', self.types))})")
+        return " AND ".join(clauses), params
+
+def iter_postgres_rows(conn, table: str, batch_size: int = FETCH_BATCH_ROWS, columns: str = "s, p, o",
+                       triple_filter: TripleFilter = None):
+    """Yield rows of the synced table in one pass over a server-side cursor.
+
+    The named cursor keeps the result on the server and pulls `batch_size` rows
+    per round trip, so client memory is bounded by the batch, not the table.
+    """
+    q = f"SELECT {columns} FROM {table}"
+    params = None
+    if triple_filter:
+        where, params = triple_filter.where(
+            lambda name: f"%({name})s",
+            f"SELECT s FROM {table} WHERE p = 'rdf:type' AND o IN ({{types}})",
+        )
+        q += f" WHERE {where}"
+    with conn.cursor(name="triples_scan") as cur:
+        cur.execute(q, params)
+        while True:
+            batch = cur.fetchmany(batch_size)
+            if not batch:
+                break
+            yield from batch
+
+# Keyset condition of every page after the first
+_AFTER_KEY = "(s, p) > (%(after_s)s, %(after_p)s)"
+
+def _page_query(table: str, conditions: list, batch_size: int) -> str:
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return f"SELECT s, p, o FROM {table} {where} ORDER BY s, p LIMIT {batch_size}"
+
+def iter_postgres_pages(table: str, triple_filter: TripleFilter = None, batch_size: int = FETCH_BATCH_ROWS):
+    """Yield (s, p, o) rows of the synced table in (s, p) order, checking a connection out per page.
+
+    Each page is a keyset query on the (s, p) primary key, and the connection
+    goes back to the pool before the page's rows are yielded, so a slow client
+    holds no connection while it downloads. Pages are separate statements, so a
+    row updated mid-download may be sent with its old or new value, but no
+    (s, p) is sent twice.
+    """
+    conditions, params = [], {}
+    if triple_filter:
+        where, params = triple_filter.where(
+            lambda name: f"%({name})s",
+            f"SELECT s FROM {table} WHERE p = 'rdf:type' AND o IN ({{types}})",
+        )
+        conditions.append(where)
+
+    q = _page_query(table, conditions, batch_size)
+    while True:
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(q, params)
+                page = cur.fetchall()
+        yield from page
+        if len(page) < batch_size:
+            return
+        params = dict(params, after_s=page[-1][0], after_p=page[-1][1])
+        q = _page_query(table, conditions + [_AFTER_KEY], batch_size)
+
+@hot_statement
+def _prepare_next_page(cur):
     cfg = current_app.config
+    if cfg["LATEST_SNAPSHOT_ENABLED"]:
+        # Unfiltered graphs are served from the snapshot
+        return
     table = cfg["PG_TRIPLE_TABLE"]
-    g = rdflib.Graph()
-    with get_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute(f"SELECT s, p, o FROM {table} WHERE p = 'rdf:type'")
-            for s, p, o in cur:
-                g.add((rdflib.URIRef(s), rdflib.RDF.type, rdflib.URIRef(o)))
-            cur.execute(f"SELECT s, p, o FROM {table} WHERE p <> 'rdf:type'")
-            for s, p, o in cur:
-                g.add((rdflib.URIRef(s), rdflib.URIRef(p), rdflib.Literal(o)))
-    return g.serialize()
-
-def fetch_dbsql(timestamp: str) -> str:
-    cfg = current_app.config
-    q = """
+    last = cur.execute(f"SELECT s, p FROM {table} ORDER BY s DESC, p DESC LIMIT 1").fetchone()
+    if last is not None:
+        # Nothing sorts after the last key
+        cur.execute(_page_query(table, [_AFTER_KEY], FETCH_BATCH_ROWS),
+                    {"after_s": last[0], "after_p": last[1]}, prepare=True)
+
+def _dbsql_latest_query(table: str, timestamp: str, triple_filter: TripleFilter = None) -> tuple:
+    """Return (SQL, params) selecting the latest (s, p, o) per (s, p) before `timestamp`"""
+    where, params = "", None
+    if triple_filter:
+        # Filters only touch s and p, so whole (s, p) partitions are kept or dropped
+        where, params = triple_filter.where(
+            lambda name: f":{name}",
+            f"""
+            SELECT s FROM (
+              SELECT s, o, ROW_NUMBER() OVER (PARTITION BY s ORDER BY timestamp DESC) as rn
+              FROM {table}
+              WHERE p = 'rdf:type' AND timestamp < '{timestamp}'
+            ) typed
+            WHERE rn = 1 AND o IN ({{types}})
+            """,
+        )
+        where = f"AND {where}"
+    q = f"""
         SELECT s, p, o
         FROM (
-          SELECT *,
+          SELECT s, p, o,
                  ROW_NUMBER() OVER (PARTITION BY s, p ORDER BY timestamp DESC) as rn
           FROM {table}
-          WHERE {filter_expr}
-          AND timestamp < '{timestamp}'
+          WHERE timestamp < '{timestamp}'
+          {where}
         ) t
         WHERE rn = 1
     """
-    g = rdflib.Graph()
+    return q, params
+
+def iter_dbsql_rows(conn, table: str, timestamp: str, batch_size: int = FETCH_BATCH_ROWS,
+                    triple_filter: TripleFilter = None):
+    """Yield the latest (s, p, o) per (s, p) before `timestamp` in one warehouse query.
+
+    Results are pulled as Arrow batches and converted column-wise; without pyarrow
+    installed the plain row cursor is used instead.
+    """
+    q, params = _dbsql_latest_query(table, timestamp, triple_filter)
+    with conn.cursor() as cur:
+        cur.execute(q, params)
+        yield from _fetch_batches(cur, batch_size, 3)
+
+def iter_dbsql_tables(conn, table: str, timestamp: str, batch_size: int = FETCH_BATCH_ROWS,
+                      triple_filter: TripleFilter = None):
+    """Like iter_dbsql_rows, but yield the warehouse's Arrow tables untouched"""
+    q, params = _dbsql_latest_query(table, timestamp, triple_filter)
+    with conn.cursor() as cur:
+        cur.execute(q, params)
+        yield from cursor_tables(cur, batch_size)
+
+def iter_dbsql_changes(conn, table: str, from_ts: str, to_ts: str, batch_size: int = FETCH_BATCH_ROWS):
+    """Yield (s, p, o, before) for every (s, p) written in [from_ts, to_ts) in one warehouse query.
+
+    Each changed (s, p) yields its latest value before `from_ts` (before=True),
+    if it had one, and its latest value before `to_ts` (before=False). Only keys
+    touched in the window are read, so the result scales with the change.
+    """
+    q = f"""
+        SELECT s, p, o, before
+        FROM (
+          SELECT t.s, t.p, t.o, t.timestamp < '{from_ts}' as before,
+                 ROW_NUMBER() OVER (PARTITION BY t.s, t.p, t.timestamp < '{from_ts}' ORDER BY t.timestamp DESC) as rn
+          FROM {table} t
+          JOIN (
+            SELECT DISTINCT s, p
+            FROM {table}
+            WHERE timestamp >= '{from_ts}' AND timestamp < '{to_ts}'
+          ) changed
+            ON t.s = changed.s AND t.p = changed.p
+          WHERE t.timestamp < '{to_ts}'
+        ) r
+        WHERE rn = 1
+    """
+    with conn.cursor() as cur:
+        cur.execute(q)
+        yield from _fetch_batches(cur, batch_size, 4)
+
+def _fetch_batches(cur, batch_size: int, ncols: int):
+    """Yield result rows from an executed warehouse cursor, as Arrow batches when available"""
+    if not HAS_ARROW:
+        while True:
+            batch = cur.fetchmany(batch_size)
+            if not batch:
+                break
+            yield from batch
+        return
+    while True:
+        batch = cur.fetchmany_arrow(batch_size)
+        if batch.num_rows == 0:
+            break
+        yield from zip(*(batch.column(i).to_pylist() for i in range(ncols)))
+
+def fetch_postgres(media_type: str = 'text/turtle', triple_filter: TripleFilter = None):
+    """Stream the latest graph, or the subgraph selected by `triple_filter`, serialized as `media_type`"""
+    writer, _ = FORMATS[media_type]
+    return writer(iter_postgres_pages(current_app.config["PG_TRIPLE_TABLE"], triple_filter))
+
+def fetch_dbsql(timestamp: str, media_type: str = 'text/turtle', triple_filter: TripleFilter = None):
+    """Stream the graph as of `timestamp` from the triple table, serialized as `media_type`.
+
+    `timestamp` should already be normalized with pit_cache.normalize_timestamp.
+    Unfiltered results are cached per (timestamp, Delta table version) when
+    PIT_CACHE_ENABLED; filtered subgraphs are small and always queried directly.
+    """
+    cfg = current_app.config
     http_path = cfg["WAREHOUSE_HTTP"]
     table = cfg["DBX_TRIPLE_TABLE"]
-    conn = get_dbsql_connection(http_path)
-    with conn.cursor() as cur:
-        cur.execute(q.format(table=table, filter_expr="p = 'rdf:type'", timestamp=timestamp))
-        for s, p, o in cur:
-            g.add((rdflib.URIRef(s), rdflib.RDF.type, rdflib.URIRef(o)))
-        cur.execute(q.format(table=table, filter_expr="p <> 'rdf:type'", timestamp=timestamp))
-        for s, p, o in cur:
-            g.add((rdflib.URIRef(s), rdflib.URIRef(p), rdflib.Literal(o)))
-    return g.serialize()
+    writer, _ = FORMATS[media_type]
+
+    token = None
+    if cfg["PIT_CACHE_ENABLED"] and not triple_filter:
+        with dbsql_connection(http_path) as conn:
+            token = warehouse_table_version(conn, table)
+    rows = pit_cache.get(timestamp, token) if token else None
+    if rows is not None:
+        return writer(iter(rows))
+
+    if media_type == ARROW_STREAM_MEDIA_TYPE:
+        # Forward the warehouse's Arrow batches with no per-row work
+        return write_stream(_pooled(http_path, iter_dbsql_tables, table, timestamp, triple_filter=triple_filter))
+    if token is None:
+        return writer(_pooled(http_path, iter_dbsql_rows, table, timestamp, triple_filter=triple_filter))
+
+    with dbsql_connection(http_path) as conn:
+        rows = pit_cache.put(timestamp, token, [tuple(row) for row in iter_dbsql_rows(conn, table, timestamp)])
+    return writer(iter(rows))
+
+def _pooled(http_path: str, iter_rows, *args, **kwargs):
+    """Run a row iterator on a pooled connection held until the iterator is exhausted or closed"""
+    with dbsql_connection(http_path) as conn:
+        yield from iter_rows(conn, *args, **kwargs)
+
+@instrumented
+def diff_dbsql(from_ts: str, to_ts: str) -> tuple:
+    """Return (added, removed) (s, p, o) rows between the graphs at `from_ts` and `to_ts`"""
+    cfg = current_app.config
+    states = {}
+    with dbsql_connection(cfg["WAREHOUSE_HTTP"]) as conn:
+        for s, p, o, before in iter_dbsql_changes(conn, cfg["DBX_TRIPLE_TABLE"], from_ts, to_ts):
+            states.setdefault((s, p), [None, None])[0 if before else 1] = o
+
+    added, removed = [], []
+    for (s, p), (old, new) in sorted(states.items()):
+        if old == new:
+            continue
+        if old is not None:
+            removed.append((s, p, old))
+        if new is not None:
+            added.append((s, p, new))
+    return added, removed
@@ -0,0 +1,86 @@
+"""
+ASGI entry point serving the async endpoints alongside the Flask app.
+
+GET requests under /api/async are answered on the event loop by the handlers in
+app.blueprints.telemetry_async: Lakebase through the async pool, and the warehouse
+on a bounded thread pool. A request waiting on a slow query holds no thread,
+so one process can keep thousands of them open.
+
+Every other path goes to the Flask app through a2wsgi, which runs each WSGI
+request on its own thread from a pool of ASGI_WSGI_WORKERS. Flask endpoints keep
+their thread-per-request behaviour; a /api/telemetry/stream client holds one of
+those threads for as long as it stays connected, so size the pool above the
+expected number of concurrent stream clients.
+
+app.yaml deploys this module with `uvicorn asgi:app`; uvicorn takes its host and
+port from UVICORN_HOST and UVICORN_PORT, which Databricks Apps sets. Locally:
+
+    python asgi.py          # or: uvicorn asgi:app --port $DATABRICKS_APP_PORT
+
+`python server.py` still runs the Flask app alone, without the /api/async routes.
+"""
+
+import asyncio
+import json
+import os
+from urllib.parse import parse_qs
+from a2wsgi import WSGIMiddleware
+from server import app as flask_app
+from app.blueprints import telemetry_async
+from app.db.postgres import warm_up_pool
+from app.db.postgres_async import close_async_pool
+
+ASYNC_PREFIX = "/api/async"
+
+_wsgi = WSGIMiddleware(flask_app, workers=flask_app.config["ASGI_WSGI_WORKERS"])
+
+
+async def _send_json(send, status: int, body: dict, headers: dict = None):
+    payload = b"" if body is None else json.dumps(body, default=str).encode()
+    extra = [(k.lower().encode(), str(v).encode()) for k, v in (headers or {}).items()]
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(payload)).encode()),
+            (b"access-control-allow-origin", b"*"),
+            (b"access-control-expose-headers", b"ETag, X-Snapshot-Age"),
+        ] + extra,
+    })
+    await send({"type": "http.response.body", "body": payload})
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            # Fill the pool before the server accepts requests, without blocking the loop
+            await asyncio.to_thread(warm_up_pool, flask_app)
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            with flask_app.app_context():
+                await close_async_pool()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        return await _lifespan(receive, send)
+    path = scope.get("path", "")
+    if scope["type"] == "http" and path.startswith(ASYNC_PREFIX + "/"):
+        handler = telemetry_async.routes.get(path[len(ASYNC_PREFIX):])
+        if handler is None:
+            return await _send_json(send, 404, {"error": f"Unknown endpoint {path}", "status": "error"})
+        if scope["method"] != "GET":
+            return await _send_json(send, 405, {"error": "Method not allowed", "status": "error"})
+        args = parse_qs(scope.get("query_string", b"").decode())
+        headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        with flask_app.app_context():
+            result = await handler(args, headers)
+        return await _send_json(send, *result)
+    return await _wsgi(scope, receive, send)
+
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(app, host='0.0.0.0', port=int(os.getenv('DATABRICKS_APP_PORT', '8000')))
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of the shared IRI memo table in app.services.interning.
+
+Serializes synthetic rows to N-Triples and Turtle twice, once with IRIs
+validated and rendered on every occurrence (the behaviour before interning) and
+once through IRI_FORMS, and reports the per-triple cost of each:
+
+    python benchmarks/bench_iri_interning.py --rows 1000000
+
+Run from the deployment-staging directory.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import rdf_writer
+from app.services.interning import IRI_FORMS, check_iri
+
+SENSORS = ["temperature", "pressure", "vibration", "speed", "rotation", "flow"]
+
+
+class Uncached:
+    """Stand-in for an Interner that recomputes the IRI form on every lookup"""
+
+    @staticmethod
+    def get(raw: str) -> str:
+        return f"<{check_iri(raw)}>"
+
+
+def synthetic_rows(n: int, components: int) -> list:
+    rows = []
+    c = 0
+    while len(rows) < n:
+        s = f"http://example.com/factory/component-{c % components}"
+        rows.append((s, "rdf:type", "http://example.com/factory/Component"))
+        for sensor in SENSORS:
+            rows.append((s, f"http://example.com/factory/pred/sensor_{sensor}", f"{c % 1000 / 10:.1f}"))
+        c += 1
+    return rows[:n]
+
+
+def per_triple_ns(writer, rows: list, repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in writer(rows):
+            pass
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best / len(rows) * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="synthetic triples to serialize")
+    parser.add_argument("--components", type=int, default=5000, help="distinct subjects in the synthetic graph")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per variant, best is reported")
+    args = parser.parse_args()
+
+    rows = synthetic_rows(args.rows, args.components)
+    for name, writer in [("n-triples", rdf_writer.write_ntriples), ("turtle", rdf_writer.write_turtle)]:
+        rdf_writer.IRI_FORMS = Uncached
+        uncached = per_triple_ns(writer, rows, args.repeat)
+        rdf_writer.IRI_FORMS = IRI_FORMS
+        interned = per_triple_ns(writer, rows, args.repeat)
+        print(f"{name:<10} uncached {uncached:7.0f} ns/triple  interned {interned:7.0f} ns/triple  "
+              f"({uncached / interned:.2f}x)")
+
+    stats = IRI_FORMS.stats()
+    print(f"iri_forms: {stats['size']:,d} entries, hit rate {stats['hit_rate']:.4%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark the negotiated RDF formats of /api/latest and /api/pit.
+
+Serializes a synthetic plant with every writer in app.services.rdf_writer.FORMATS
+and reports the bytes on the wire and the write time of each, relative to Turtle:
+
+    python benchmarks/bench_rdf_formats.py --rows 100000
+
+Run from the deployment-staging directory.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.rdf_writer import FORMATS
+
+SENSORS = ["temperature", "pressure", "vibration", "speed", "rotation", "flow"]
+
+
+def synthetic_rows(n: int) -> list:
+    """Component triples grouped by subject, as the snapshot serializes them"""
+    rows = []
+    c = 0
+    while len(rows) < n:
+        s = f"http://example.com/factory/component-{c}"
+        rows.append((s, "rdf:type", "http://example.com/factory/Component"))
+        rows.append((s, "http://example.com/factory/pred/partOf", f"http://example.com/factory/machine-{c % 50}"))
+        for sensor in SENSORS:
+            rows.append((s, f"http://example.com/factory/pred/sensor_{sensor}", f"{c % 1000 / 10:.1f}"))
+        c += 1
+    return rows[:n]
+
+
+def measure(writer, rows: list, repeat: int) -> tuple:
+    """Return (bytes written, best seconds) for one writer"""
+    best = None
+    size = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        size = 0
+        for chunk in writer(rows):
+            size += len(chunk.encode("utf-8") if isinstance(chunk, str) else chunk)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return size, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000, help="synthetic triples to serialize")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per format, best is reported")
+    args = parser.parse_args()
+
+    rows = synthetic_rows(args.rows)
+    results = {media_type: measure(writer, rows, args.repeat) for media_type, (writer, _) in FORMATS.items()}
+    turtle_size, turtle_time = results["text/turtle"]
+    print(f"{len(rows):,d} triples")
+    for media_type, (size, elapsed) in results.items():
+        print(f"{media_type:<36} {size / 1e6:8.2f} MB ({size / turtle_size:5.2f}x Turtle)  "
+              f"{elapsed:7.3f} s ({elapsed / turtle_time:5.2f}x Turtle)")
+
+
+if __name__ == "__main__":
+    main()
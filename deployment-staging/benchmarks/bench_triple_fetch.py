@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Benchmark the triple fetch paths: the original two-scan client-side cursor
+against the single-pass server-side (Postgres) / Arrow (DBSQL) readers in
+app.services.triples.
+
+Postgres mode loads a synthetic table of --rows triples into a TEMP table on the
+database given by --dsn (or the standard PG* environment variables):
+
+    python benchmarks/bench_triple_fetch.py --rows 1000000
+
+DBSQL mode reads an existing triple table through the configured warehouse:
+
+    python benchmarks/bench_triple_fetch.py --dbsql-table main.deba.triples --timestamp 2030-01-01
+
+Run from the deployment-staging directory with the same environment as the app.
+"""
+
+import argparse
+import io
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import psycopg
+from app.services.triples import iter_postgres_rows, iter_dbsql_rows
+
+SENSORS = ["temperature", "pressure", "vibration", "speed", "rotation", "flow"]
+
+
+def synthetic_rows(n: int):
+    """Component triples: one rdf:type plus six sensor readings per component"""
+    per_component = 1 + len(SENSORS)
+    for c in range(n // per_component + 1):
+        s = f"http://example.com/factory/component-{c}"
+        yield s, "rdf:type", "http://example.com/factory/Component"
+        for sensor in SENSORS:
+            yield s, f"http://example.com/factory/pred/sensor_{sensor}", f"{(c * 7919) % 1000 / 10:.1f}"
+
+
+def load_table(conn, rows: int) -> str:
+    table = "bench_triples"
+    with conn.cursor() as cur:
+        cur.execute(f"CREATE TEMP TABLE {table} (s text, p text, o text, timestamp timestamp, PRIMARY KEY (s, p))")
+        buf = io.StringIO()
+        for i, (s, p, o) in enumerate(synthetic_rows(rows)):
+            if i >= rows:
+                break
+            buf.write(f"{s}\t{p}\t{o}\t2024-01-01 00:00:00\n")
+        buf.seek(0)
+        with cur.copy(f"COPY {table} (s, p, o, timestamp) FROM STDIN") as copy:
+            copy.write(buf.read())
+        cur.execute(f"ANALYZE {table}")
+    return table
+
+
+def two_scan_postgres(conn, table: str):
+    # The fetch_postgres implementation this benchmark replaces
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT s, p, o FROM {table} WHERE p = 'rdf:type'")
+        yield from cur
+        cur.execute(f"SELECT s, p, o FROM {table} WHERE p <> 'rdf:type'")
+        yield from cur
+
+
+def two_scan_dbsql(conn, table: str, timestamp: str):
+    # The fetch_dbsql implementation this benchmark replaces
+    q = """
+        SELECT s, p, o
+        FROM (
+          SELECT *,
+                 ROW_NUMBER() OVER (PARTITION BY s, p ORDER BY timestamp DESC) as rn
+          FROM {table}
+          WHERE {filter_expr}
+          AND timestamp < '{timestamp}'
+        ) t
+        WHERE rn = 1
+    """
+    with conn.cursor() as cur:
+        cur.execute(q.format(table=table, filter_expr="p = 'rdf:type'", timestamp=timestamp))
+        yield from cur
+        cur.execute(q.format(table=table, filter_expr="p <> 'rdf:type'", timestamp=timestamp))
+        yield from cur
+
+
+def _rss_bytes() -> int:
+    # Resident set size; libpq buffers results outside the Python heap, so
+    # tracemalloc would miss most of the client-side cursor's memory
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def peak_rss_growth(fn) -> int:
+    """Run `fn` while sampling RSS, returning the peak growth over the starting RSS"""
+    start = _rss_bytes()
+    peak = [start]
+    done = threading.Event()
+
+    def sample():
+        while not done.is_set():
+            peak[0] = max(peak[0], _rss_bytes())
+            time.sleep(0.002)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    try:
+        fn()
+    finally:
+        done.set()
+        sampler.join()
+    return max(peak[0], _rss_bytes()) - start
+
+
+def measure(name: str, make_rows, repeat: int):
+    best = None
+    count = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        count = sum(1 for _ in make_rows())
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    peak = peak_rss_growth(lambda: sum(1 for _ in make_rows()))
+    print(f"{name:<28} {count:>10,d} rows  {best:8.3f} s  {count / best:>12,.0f} rows/s  peak +{peak / 2**20:7.1f} MiB RSS")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="synthetic triples to load (Postgres mode)")
+    parser.add_argument("--dsn", default=os.getenv("BENCH_PG_DSN", ""), help="libpq connection string")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per variant, best is reported")
+    parser.add_argument("--dbsql-table", help="benchmark the warehouse path against this triple table")
+    parser.add_argument("--timestamp", default="2100-01-01", help="point in time for the warehouse path")
+    args = parser.parse_args()
+
+    if args.dbsql_table:
+        from app.extensions import dbsql_connection
+        with dbsql_connection() as conn:
+            measure("before: two scans", lambda: two_scan_dbsql(conn, args.dbsql_table, args.timestamp), args.repeat)
+            measure("after: single pass (Arrow)", lambda: iter_dbsql_rows(conn, args.dbsql_table, args.timestamp), args.repeat)
+        return
+
+    with psycopg.connect(args.dsn) as conn:
+        print(f"Loading {args.rows:,d} synthetic triples...")
+        table = load_table(conn, args.rows)
+        measure("before: two scans", lambda: two_scan_postgres(conn, table), args.repeat)
+        measure("after: single pass (named)", lambda: iter_postgres_rows(conn, table), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
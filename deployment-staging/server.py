@@ -2,11 +2,12 @@ import os
 from flask import Flask
 from flask_cors import CORS
 from app.config import Config
-from app.extensions import workspace_client
-from app.db.postgres import init_pool_on_first_use
+from app.db.postgres import warm_up_pool
 from app.blueprints.triples import triples_bp
 from app.blueprints.rdf_models import rdf_models_bp
 from app.blueprints.telemetry import telemetry_bp
+from app.blueprints.sparql import sparql_bp
+from app.blueprints.metrics import metrics_bp
 from app.blueprints.spa import spa_bp
 
 def create_app():
@@ -17,15 +18,14 @@ def create_app():
     app.secret_key = os.getenv('SECRET_KEY', 'dev-secret-key')
 
     # Enable CORS - allow all origins for development; restrict for production!
-    CORS(app)
-
-    # Initialize components that require app context or env
-    init_pool_on_first_use()  # lazy pool build on first DB use
+    CORS(app, expose_headers=["ETag", "X-Snapshot-Age", "X-Result-Truncated", "X-Effective-Timestamp"])
 
     # Register blueprints
     app.register_blueprint(triples_bp, url_prefix="/api")
     app.register_blueprint(rdf_models_bp, url_prefix="/api")
     app.register_blueprint(telemetry_bp, url_prefix="/api")
+    app.register_blueprint(sparql_bp, url_prefix="/api")
+    app.register_blueprint(metrics_bp, url_prefix="/api")
     app.register_blueprint(spa_bp)
 
     return app
@@ -35,6 +35,10 @@ app = create_app()
 
 
 if __name__ == '__main__':
+    # The reloader runs this module in a watcher process and again in the serving
+    # child; only the child (WERKZEUG_RUN_MAIN set) fills the pool before serving
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        warm_up_pool(app)
     # For local dev
     app.run(debug=True, host='0.0.0.0', port=os.getenv('DATABRICKS_APP_PORT'))
 
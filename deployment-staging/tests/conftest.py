@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Import the app packages from deployment-staging without installing it
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,65 @@
+from contextlib import contextmanager
+
+from flask import Flask, current_app
+
+from app.services import data_version
+from app.services.data_version import VersionedCache
+
+
+def test_ttl_follows_app_config(monkeypatch):
+    cache = VersionedCache(ttl=lambda: current_app.config["DEBUG_CACHE_TTL_SECONDS"])
+    app = Flask(__name__)
+    app.config["DEBUG_CACHE_TTL_SECONDS"] = 30.0
+    now = [100.0]
+    monkeypatch.setattr("app.services.data_version.time.time", lambda: now[0])
+
+    with app.app_context():
+        cache.put("debug", None, "payload")
+        now[0] = 110.0
+        assert cache.get("debug", None) == "payload"
+        app.config["DEBUG_CACHE_TTL_SECONDS"] = 5.0
+        assert cache.get("debug", None) is None
+
+
+def test_entries_are_dropped_when_the_token_changes():
+    cache = VersionedCache()
+    cache.put("latest", "v1", "payload")
+
+    assert cache.get("latest", "v1") == "payload"
+    assert cache.get("latest", "v2") is None
+    # Without a TTL, nothing is kept for an unknown version
+    assert cache.put("latest", None, "other") == "other"
+    assert cache.get("latest", None) is None
+
+
+class _StatsConnection:
+    """Synced table whose write counter has not been reported yet"""
+
+    @contextmanager
+    def cursor(self):
+        yield self
+
+    def execute(self, sql, params):
+        pass
+
+    def fetchone(self):
+        return "2024-01-01 00:00:00", 7
+
+
+def test_synced_table_version_rolls_over_within_max_lag(monkeypatch):
+    @contextmanager
+    def get_connection():
+        yield _StatsConnection()
+
+    monkeypatch.setattr(data_version, "get_connection", get_connection)
+    now = [1000.0]
+    monkeypatch.setattr("app.services.data_version.time.time", lambda: now[0])
+    app = Flask(__name__)
+    app.config["SYNCED_VERSION_MAX_LAG_SECONDS"] = 10.0
+
+    with app.app_context():
+        token = data_version.synced_table_version("synced")
+        now[0] = 1009.0
+        assert data_version.synced_table_version("synced") == token
+        now[0] = 1010.0
+        assert data_version.synced_table_version("synced") != token
@@ -0,0 +1,149 @@
+import threading
+import time
+
+import pytest
+from databricks import sql as dbsql
+
+from app.extensions import DBSQLPool
+
+
+class FakeConnection:
+    def __init__(self, n):
+        self.n = n
+        self.closed = False
+        self.broken = False
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, *args):
+        if self.conn.broken:
+            raise ConnectionError("connection reset")
+
+    def fetchone(self):
+        return (1,)
+
+
+def make_pool(**kwargs) -> DBSQLPool:
+    options = dict(max_size=2, max_idle=60.0, health_check=30.0, timeout=1.0)
+    options.update(kwargs)
+    pool = DBSQLPool("/sql/1.0/warehouses/test", **options)
+    pool.connections = []
+
+    def open_connection():
+        conn = FakeConnection(len(pool.connections))
+        pool.connections.append(conn)
+        pool.opened += 1
+        return conn
+
+    pool._open = open_connection
+    return pool
+
+
+def checkout(pool):
+    with pool.connection() as conn:
+        return conn._conn
+
+
+def test_reuses_idle_connection():
+    pool = make_pool()
+    first = checkout(pool)
+    assert checkout(pool) is first
+    stats = pool.stats()
+    assert (stats["opened"], stats["checkouts"], stats["size"], stats["idle"]) == (1, 2, 1, 1)
+
+
+def test_concurrent_checkouts_open_up_to_max_size_and_wait():
+    pool = make_pool(max_size=2, timeout=0.05)
+    with pool.connection() as a, pool.connection() as b:
+        assert a._conn is not b._conn
+        with pytest.raises(TimeoutError):
+            with pool.connection():
+                pass
+    stats = pool.stats()
+    assert (stats["opened"], stats["timeouts"], stats["in_use"], stats["idle"]) == (2, 1, 0, 2)
+
+
+def test_waiter_gets_the_released_connection():
+    pool = make_pool(max_size=1, timeout=5.0)
+    got = []
+    with pool.connection() as held:
+        waiter = threading.Thread(target=lambda: got.append(checkout(pool)))
+        waiter.start()
+        time.sleep(0.05)
+    waiter.join(1.0)
+    assert got == [held._conn]
+    assert pool.stats()["waits"] == 1
+
+
+def test_idle_connections_are_evicted():
+    pool = make_pool(max_idle=0.01)
+    first = checkout(pool)
+    time.sleep(0.03)
+    second = checkout(pool)
+
+    assert second is not first
+    assert first.closed
+    assert pool.stats()["size"] == 1
+
+
+def test_failed_health_check_reconnects():
+    pool = make_pool(health_check=0.0)
+    first = checkout(pool)
+    first.broken = True
+    second = checkout(pool)
+
+    assert second is not first
+    assert first.closed
+    stats = pool.stats()
+    assert (stats["health_check_failures"], stats["opened"], stats["size"]) == (1, 2, 1)
+
+
+def test_statement_error_keeps_the_connection():
+    pool = make_pool()
+    with pytest.raises(dbsql.exc.ServerOperationError):
+        with pool.connection():
+            raise dbsql.exc.ServerOperationError("syntax error")
+    first = pool.connections[0]
+    assert not first.closed
+    assert checkout(pool) is first
+
+
+def test_connection_error_closes_and_reconnects():
+    pool = make_pool()
+    with pytest.raises(ConnectionError):
+        with pool.connection():
+            raise ConnectionError("connection reset")
+    first = pool.connections[0]
+    assert first.closed
+    assert pool.stats()["size"] == 0
+
+    assert checkout(pool) is not first
+    assert pool.stats()["opened"] == 2
+
+
+def test_failed_open_releases_the_slot():
+    pool = make_pool(max_size=1)
+
+    def failing_open():
+        raise ConnectionError("warehouse unreachable")
+
+    pool._open = failing_open
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            checkout(pool)
+    assert pool.stats()["size"] == 0
@@ -0,0 +1,44 @@
+import pytest
+
+from app.services.interning import Interner, check_iri
+
+
+def test_hits_and_misses():
+    calls = []
+    interner = Interner("test", lambda raw: calls.append(raw) or raw.upper(), maxsize=10)
+    assert interner.get("a") == "A"
+    assert interner.get("a") == "A"
+    assert interner.get("b") == "B"
+
+    assert calls == ["a", "b"]
+    stats = interner.stats()
+    assert (stats["name"], stats["size"], stats["maxsize"]) == ("test", 2, 10)
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+    assert stats["hit_rate"] == pytest.approx(1 / 3)
+
+
+def test_evicts_least_recently_used():
+    calls = []
+    interner = Interner("test", lambda raw: calls.append(raw) or raw, maxsize=2)
+    interner.get("a")
+    interner.get("b")
+    interner.get("a")  # "b" is now the least recently used
+    interner.get("c")
+    calls.clear()
+
+    interner.get("a")
+    interner.get("b")
+    assert calls == ["b"]
+    assert interner.stats()["size"] == 2
+
+
+def test_failures_are_not_cached():
+    interner = Interner("test", check_iri, maxsize=10)
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            interner.get("http://example.com/a b")
+    assert interner.stats()["size"] == 0
+
+
+def test_empty_stats():
+    assert Interner("test", str, maxsize=1).stats()["hit_rate"] == 0.0
@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+from app.services import metrics
+
+
+def _samples(lines: list) -> dict:
+    return dict(line.rsplit(" ", 1) for line in lines if not line.startswith("#"))
+
+
+def test_counter_render():
+    counter = metrics.Counter("things_total", "Things", ("db", "service"))
+    counter.inc(2, "lakebase", "a")
+    counter.inc(3, "lakebase", "a")
+    counter.inc(1, "warehouse", 'we"ird\nname')
+
+    lines = counter.render()
+    assert lines[:2] == ["# HELP digital_twin_things_total Things", "# TYPE digital_twin_things_total counter"]
+    assert _samples(lines) == {
+        'digital_twin_things_total{db="lakebase",service="a"}': "5",
+        'digital_twin_things_total{db="warehouse",service="we\\"ird\\nname"}': "1",
+    }
+
+
+def test_histogram_render():
+    histogram = metrics.Histogram("latency_seconds", "Latency", ("pool",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, "p")
+
+    samples = _samples(histogram.render())
+    assert samples['digital_twin_latency_seconds_bucket{pool="p",le="0.1"}'] == "2"
+    assert samples['digital_twin_latency_seconds_bucket{pool="p",le="1.0"}'] == "3"
+    assert samples['digital_twin_latency_seconds_bucket{pool="p",le="+Inf"}'] == "4"
+    assert samples['digital_twin_latency_seconds_count{pool="p"}'] == "4"
+    assert float(samples['digital_twin_latency_seconds_sum{pool="p"}']) == pytest.approx(3.65)
+
+
+def test_collected_and_render():
+    lines = metrics.collected("pool_size", "gauge", "Pool size", ("pool",), [(("main",), 4), ((), 1.5)])
+    assert lines[1] == "# TYPE digital_twin_pool_size gauge"
+    assert lines[2:] == ['digital_twin_pool_size{pool="main"} 4', "digital_twin_pool_size 1.5"]
+
+    text = metrics.render(lines)
+    assert text.endswith('digital_twin_pool_size 1.5\n')
+    assert "# TYPE digital_twin_db_statement_seconds histogram" in text
+
+
+def test_instrumented_tags_functions_generators_and_coroutines():
+    @metrics.instrumented
+    def plain():
+        return metrics.current_service()
+
+    @metrics.instrumented
+    def gen():
+        yield metrics.current_service()
+        yield metrics.current_service()
+
+    @metrics.instrumented
+    async def coro():
+        return metrics.current_service()
+
+    outside = metrics.current_service()
+    assert plain() == "test_metrics.plain"
+    it = gen()
+    assert next(it) == "test_metrics.gen"
+    # The tag does not leak into the caller between resumes
+    assert metrics.current_service() == outside
+    assert next(it) == "test_metrics.gen"
+    assert asyncio.run(coro()) == "test_metrics.coro"
+    assert metrics.current_service() == outside
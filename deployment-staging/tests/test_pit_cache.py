@@ -0,0 +1,58 @@
+import os
+
+import pytest
+from flask import Flask
+
+from app.services import pit_cache
+from app.services.rdf_writer import write_ntriples
+
+ROWS = [
+    ("http://example.com/factory/component-1", "rdf:type", "http://example.com/factory/Component"),
+    ("http://example.com/factory/component-1", "http://example.com/factory/pred/label", "plain"),
+    ("http://example.com/factory/component-1", "http://example.com/factory/pred/note", 'a "quoted" > b'),
+    ("http://example.com/factory/component-1", "http://example.com/factory/pred/escapes", "back\\slash\nnew\rline \\n"),
+    ("http://example.com/factory/component-2", "http://example.com/factory/pred/sensor_speed", "1200"),
+    ("http://example.com/factory/component-2", "http://example.com/factory/pred/empty", ""),
+]
+
+
+def test_parse_line_inverts_write_ntriples():
+    lines = "".join(write_ntriples(ROWS, chunk_rows=2)).splitlines(keepends=True)
+    assert [pit_cache._parse_line(line) for line in lines] == ROWS
+
+
+def test_non_string_literals_come_back_as_strings():
+    line = "".join(write_ntriples([("http://example.com/s", "http://example.com/p", 21.5)]))
+    assert pit_cache._parse_line(line) == ("http://example.com/s", "http://example.com/p", "21.5")
+
+
+def test_disk_tier_round_trip(tmp_path):
+    tier = pit_cache.DiskTier(str(tmp_path))
+    tier.put(("2024-01-01T00:00:00", "v1"), ROWS, budget=1 << 20)
+
+    assert tier.get(("2024-01-01T00:00:00", "v1")) == ROWS
+    assert tier.get(("2024-01-01T00:00:00", "v2")) is None
+
+
+def test_disk_tier_evicts_past_budget(tmp_path):
+    tier = pit_cache.DiskTier(str(tmp_path))
+    tier.put("old", ROWS, budget=1 << 20)
+    # Files are evicted by modification time, oldest first
+    os.utime(tier._path("old"), (0, 0))
+    size = sum(f.stat().st_size for f in tmp_path.iterdir())
+    tier.put("new", ROWS, budget=size)
+
+    assert tier.get("new") == ROWS
+    assert tier.get("old") is None
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("2024-01-01T12:00:45+00:00", "2024-01-01 12:00:00+00:00"),
+    ("2024-01-01T14:00:45+02:00", "2024-01-01 14:00:00+02:00"),
+    ("2024-01-01 12:00:59.999", "2024-01-01 12:00:00"),
+])
+def test_normalize_timestamp_snaps_to_bucket(value, expected):
+    app = Flask(__name__)
+    app.config["PIT_CACHE_BUCKET_SECONDS"] = 60
+    with app.app_context():
+        assert pit_cache.normalize_timestamp(value) == expected
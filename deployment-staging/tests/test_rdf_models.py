@@ -0,0 +1,65 @@
+from contextlib import contextmanager
+
+import pytest
+
+from app.services import rdf_models
+
+ORIGINAL = {"id": 1, "name": "Plant", "content": "", "description": "", "category": "user",
+            "creator": "a", "metadata": {}, "tags": []}
+
+
+class FakeDatabase:
+    """Models by name as seen by the primary and by a replica that lags behind it"""
+
+    def __init__(self, primary: dict, replica: dict):
+        self.tables = {"primary": primary, "replica": replica}
+        self.reads = []
+
+    def connection(self, role):
+        @contextmanager
+        def connect():
+            yield FakeConnection(self, role)
+        return connect
+
+
+class FakeConnection:
+    def __init__(self, db, role):
+        self.db, self.role = db, role
+
+    @contextmanager
+    def cursor(self, **kwargs):
+        yield self
+
+    def execute(self, sql, params):
+        self.db.reads.append(self.role)
+        models = self.db.tables[self.role].values()
+        key = "id" if "WHERE id" in sql else "name"
+        self.row = next((m for m in models if m[key] == params[0]), None)
+
+    def fetchone(self):
+        return self.row
+
+
+@pytest.fixture
+def db(monkeypatch):
+    # The replica has not seen the first copy yet
+    db = FakeDatabase(primary={"Plant": ORIGINAL, "Plant (Copy)": dict(ORIGINAL, id=2, name="Plant (Copy)")},
+                      replica={"Plant": ORIGINAL})
+    monkeypatch.setattr(rdf_models, "get_connection", db.connection("primary"))
+    monkeypatch.setattr(rdf_models, "get_read_connection", db.connection("replica"))
+    return db
+
+
+def test_plain_reads_use_the_replica(db):
+    assert rdf_models.get_rdf_model(name="Plant (Copy)") is None
+    assert db.reads == ["replica"]
+
+
+def test_duplicate_checks_names_on_the_primary(db, monkeypatch):
+    created = {}
+    monkeypatch.setattr(rdf_models, "create_rdf_model", lambda **kwargs: created.update(kwargs) or kwargs)
+
+    rdf_models.duplicate_rdf_model(1)
+
+    assert created["name"] == "Plant (Copy 1)"
+    assert set(db.reads) == {"primary"}
@@ -0,0 +1,103 @@
+import struct
+
+import pytest
+import rdflib
+from rdflib.compare import isomorphic
+
+from app.services import rdf_writer
+
+ROWS = [
+    ("http://example.com/factory/component-1", "rdf:type", "http://example.com/factory/Component"),
+    ("http://example.com/factory/component-1", "http://example.com/factory/pred/partOf", "http://example.com/factory/machine-1"),
+    ("http://example.com/factory/component-1", "http://example.com/factory/pred/sensor_temperature", 21.5),
+    ("http://example.com/factory/component-2", "rdf:type", "http://example.com/factory/Component"),
+    ("http://example.com/factory/component-2", "http://example.com/factory/pred/label", 'quote " backslash \\ newline \n end'),
+    ("http://example.com/factory/component-1", "http://example.com/factory/pred/sensor_speed", "1200"),
+]
+
+
+def expected_graph() -> rdflib.Graph:
+    g = rdflib.Graph()
+    for s, p, o in ROWS:
+        if p == rdf_writer.RDF_TYPE:
+            g.add((rdflib.URIRef(s), rdflib.RDF.type, rdflib.URIRef(o)))
+        else:
+            g.add((rdflib.URIRef(s), rdflib.URIRef(p), rdflib.Literal(str(o))))
+    return g
+
+
+def parsed(writer, fmt: str, **kwargs) -> rdflib.Graph:
+    # A small chunk size exercises the chunk boundaries
+    text = "".join(writer(ROWS, chunk_rows=2))
+    return rdflib.Graph().parse(data=text, format=fmt, **kwargs)
+
+
+def test_turtle_is_isomorphic():
+    assert isomorphic(parsed(rdf_writer.write_turtle, "turtle"), expected_graph())
+
+
+def test_ntriples_is_isomorphic():
+    assert isomorphic(parsed(rdf_writer.write_ntriples, "nt"), expected_graph())
+
+
+def test_jsonld_is_isomorphic():
+    assert isomorphic(parsed(rdf_writer.write_jsonld, "json-ld"), expected_graph())
+
+
+def test_empty_input():
+    assert len(rdflib.Graph().parse(data="".join(rdf_writer.write_turtle([])), format="turtle")) == 0
+    assert "".join(rdf_writer.write_ntriples([])) == ""
+    assert len(rdflib.Graph().parse(data="".join(rdf_writer.write_jsonld([])), format="json-ld")) == 0
+
+
+def decode_binary(data: bytes) -> rdflib.Graph:
+    assert data.startswith(rdf_writer.BINARY_MAGIC)
+    pos = len(rdf_writer.BINARY_MAGIC)
+    terms = []
+    g = rdflib.Graph()
+    while pos < len(data):
+        (count,) = struct.unpack_from("<I", data, pos)
+        pos += 4
+        for _ in range(count):
+            kind, length = struct.unpack_from("<BI", data, pos)
+            pos += 5
+            value = data[pos:pos + length].decode("utf-8")
+            pos += length
+            terms.append(rdflib.URIRef(value) if kind == rdf_writer.TERM_IRI else rdflib.Literal(value))
+        (triples,) = struct.unpack_from("<I", data, pos)
+        pos += 4
+        ids = struct.unpack_from(f"<{3 * triples}I", data, pos)
+        pos += 12 * triples
+        for i in range(0, len(ids), 3):
+            g.add((terms[ids[i]], terms[ids[i + 1]], terms[ids[i + 2]]))
+    return g
+
+
+def test_binary_is_isomorphic():
+    data = b"".join(rdf_writer.write_binary(ROWS, chunk_rows=2))
+    assert isomorphic(decode_binary(data), expected_graph())
+
+
+@pytest.mark.parametrize("writer", [rdf_writer.write_turtle, rdf_writer.write_ntriples,
+                                    rdf_writer.write_jsonld, rdf_writer.write_binary])
+def test_invalid_iri_is_rejected(writer):
+    rows = [("http://example.com/has space", "http://example.com/p", "x")]
+    with pytest.raises(ValueError):
+        list(writer(rows))
+
+
+@pytest.mark.parametrize("writer", [rdf_writer.write_turtle, rdf_writer.write_ntriples,
+                                    rdf_writer.write_jsonld, rdf_writer.write_binary])
+def test_first_chunk_waits_for_rows(writer):
+    # Endpoints pull the first chunk before sending the status, so a failing
+    # query must raise there rather than after part of the body went out
+    def failing_rows():
+        raise RuntimeError("query failed")
+        yield
+
+    with pytest.raises(RuntimeError):
+        next(writer(failing_rows()))
+
+
+def test_binary_empty_input_is_magic_only():
+    assert b"".join(rdf_writer.write_binary([])) == rdf_writer.BINARY_MAGIC
@@ -0,0 +1,47 @@
+from app.services import snapshot
+from app.services.snapshot import GraphSnapshot
+
+
+def _increment(monkeypatch, base, fetched):
+    requested = []
+
+    def fetch_rows(table, watermark=None):
+        requested.append(watermark)
+        return iter(fetched)
+
+    monkeypatch.setattr(snapshot, "_fetch_rows", fetch_rows)
+    result = snapshot._apply_increment("t", base)
+    assert requested == [base.watermark]
+    return result
+
+
+def test_increment_overwrites_and_adds_without_touching_base(monkeypatch):
+    base = GraphSnapshot({("s1", "p"): "1", ("s2", "p"): "2"}, 10, 0.0, 0.0)
+    result = _increment(monkeypatch, base, [("s1", "p", "3", 11), ("s3", "p", "4", 12)])
+
+    assert result.rows == {("s1", "p"): "3", ("s2", "p"): "2", ("s3", "p"): "4"}
+    assert result.watermark == 12
+    assert result.version != base.version
+    # Readers still holding the old snapshot see its data unchanged
+    assert base.rows == {("s1", "p"): "1", ("s2", "p"): "2"}
+
+
+def test_unchanged_rows_keep_data_and_cache(monkeypatch):
+    base = GraphSnapshot({("s1", "p"): "1"}, 10, 0.0, 5.0)
+    base.cache("key", "derived")
+    result = _increment(monkeypatch, base, [("s1", "p", "1", 10), ("s1", "p", "1", 13)])
+
+    assert result.rows is base.rows
+    assert result.watermark == 13
+    assert result.built_at == 5.0
+    assert result.checked_at > base.checked_at
+    assert result.cached("key") == "derived"
+
+
+def test_increment_without_rows_keeps_watermark(monkeypatch):
+    base = GraphSnapshot({("s1", "p"): "1"}, 10, 0.0, 0.0)
+    result = _increment(monkeypatch, base, [])
+
+    assert result.rows is base.rows
+    assert result.watermark == 10
+    assert result.version == base.version
@@ -0,0 +1,55 @@
+import pytest
+from flask import Flask
+
+from app.services import sparql
+from app.services.snapshot import GraphSnapshot
+
+FACTORY = "http://example.com/factory/"
+
+
+@pytest.fixture
+def app(monkeypatch):
+    rows = {(f"{FACTORY}component-{i}", "rdf:type"): f"{FACTORY}Component" for i in range(5)}
+    rows[(f"{FACTORY}component-0", f"{FACTORY}pred/partOf")] = f"{FACTORY}machine-1"
+    graph = GraphSnapshot(rows, 1, 0.0, 0.0)
+    monkeypatch.setattr(sparql, "get_snapshot", lambda: graph)
+
+    app = Flask(__name__)
+    app.config.update(SPARQL_MAX_ROWS=3, SPARQL_TIMEOUT_SECONDS=10.0)
+    with app.app_context():
+        yield app
+
+
+def test_select_is_capped_at_max_rows(app):
+    result, truncated = sparql.run_query(f"SELECT ?s WHERE {{ ?s a <{FACTORY}Component> }}")
+
+    assert truncated
+    assert result["head"] == {"vars": ["s"]}
+    assert len(result["results"]["bindings"]) == 3
+    assert all(b["s"]["type"] == "uri" for b in result["results"]["bindings"])
+
+
+def test_select_under_the_cap_is_complete(app):
+    result, truncated = sparql.run_query(f"SELECT ?o WHERE {{ ?s <{FACTORY}pred/partOf> ?o }}")
+
+    assert not truncated
+    assert result["results"]["bindings"] == [{"o": {"type": "literal", "value": f"{FACTORY}machine-1"}}]
+
+
+def test_ask(app):
+    result, truncated = sparql.run_query(f"ASK {{ <{FACTORY}component-4> a <{FACTORY}Component> }}")
+    assert result == {"head": {}, "boolean": True}
+    assert not truncated
+
+
+@pytest.mark.parametrize("query", [
+    "SELECT ?s WHERE { SERVICE <http://example.org/sparql> { ?s ?p ?o } }",
+    "SELECT ?s WHERE { ?x ?y ?z . OPTIONAL { SERVICE <http://example.org/sparql> { ?s ?p ?o } } }",
+    "SELECT ?s FROM <http://example.org/graph> WHERE { ?s ?p ?o }",
+    "SELECT ?s FROM NAMED <http://example.org/graph> WHERE { ?s ?p ?o }",
+    "CONSTRUCT { ?s ?p ?o } WHERE { ?s ?p ?o }",
+    "SELECT ?s WHERE {",
+])
+def test_rejected_queries(app, query):
+    with pytest.raises(sparql.QueryRejected):
+        sparql.run_query(query)
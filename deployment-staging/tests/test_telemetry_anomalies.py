@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+from app.services.telemetry_anomalies import RollingStats
+
+
+def _feed(stats, readings, component="c1"):
+    for t, values in enumerate(readings):
+        stats.update([dict(values, componentID=component, timestamp=t)])
+
+
+def test_welford_matches_numpy():
+    rng = np.random.default_rng(7)
+    data = rng.normal(50.0, 5.0, size=(200, 2))
+    stats = RollingStats(["a", "b"], alpha=0.2)
+    _feed(stats, [{"a": a, "b": b} for a, b in data])
+
+    assert list(stats.count[0]) == [200, 200]
+    np.testing.assert_allclose(stats.mean[0], data.mean(axis=0))
+    np.testing.assert_allclose(stats.m2[0] / (stats.count[0] - 1), np.var(data, axis=0, ddof=1))
+
+
+def test_missing_and_non_finite_readings_are_masked():
+    rng = np.random.default_rng(3)
+    data = rng.normal(10.0, 2.0, size=50)
+    readings = [{"a": value} for value in data]
+    readings[4] = {"a": float("nan")}
+    readings[9] = {"a": float("inf")}
+    readings[13] = {}
+    readings[21] = {"a": 0.0, "missingSensors": ["a"]}
+    stats = RollingStats(["a"], alpha=0.2)
+    _feed(stats, readings)
+
+    kept = np.delete(data, [4, 9, 13, 21])
+    assert stats.count[0, 0] == len(kept)
+    np.testing.assert_allclose(stats.mean[0, 0], kept.mean())
+    np.testing.assert_allclose(stats.m2[0, 0] / (len(kept) - 1), np.var(kept, ddof=1))
+    assert np.isfinite(stats.ewma[0, 0])
+
+
+def test_ewma():
+    stats = RollingStats(["a"], alpha=0.5)
+    _feed(stats, [{"a": 4.0}, {"a": 8.0}, {"a": 0.0}])
+    assert stats.ewma[0, 0] == pytest.approx(3.0)
+
+
+def test_republished_snapshot_is_not_counted_twice():
+    stats = RollingStats(["a"], alpha=0.5)
+    row = {"componentID": "c1", "timestamp": "t1", "a": 1.0}
+    assert stats.update([row]) == 1
+    assert stats.update([row]) == 0
+    assert stats.count[0, 0] == 1
+
+
+def test_z_score_uses_baseline_before_reading():
+    stats = RollingStats(["a"], alpha=0.5)
+    _feed(stats, [{"a": v} for v in [10.0, 12.0, 10.0, 12.0, 40.0]])
+    baseline = np.array([10.0, 12.0, 10.0, 12.0])
+    expected = (40.0 - baseline.mean()) / baseline.std(ddof=1)
+
+    flagged = stats.anomalies(threshold=3.0, min_samples=3)
+    assert [row["componentID"] for row in flagged] == ["c1"]
+    assert flagged[0]["sensors"]["a"]["zScore"] == pytest.approx(expected)
+    assert flagged[0]["sensors"]["a"]["samples"] == 5
+
+
+def test_add_sensors():
+    stats = RollingStats(["a"], alpha=0.5)
+    _feed(stats, [{"a": 1.0}, {"a": 2.0}])
+    stats.add_sensors(["a", "b"])
+    stats.update([{"componentID": "c1", "timestamp": "later", "a": 3.0, "b": 7.0}])
+
+    assert stats.sensors == ["a", "b"]
+    assert list(stats.count[0]) == [3, 1]
+    assert stats.mean[0, 1] == 7.0
+
+
+def test_only_sensors_whose_reading_moved_are_counted():
+    stats = RollingStats(["a", "b"], alpha=0.5)
+    stats.update([{"componentID": "c1", "timestamp": "t1", "a": 1.0, "b": 5.0,
+                   "sensorTimestamps": {"a": "t1", "b": "t1"}}])
+    # Only "a" was read again; "b" still carries its earlier reading
+    for t, a in [("t2", 2.0), ("t3", 3.0)]:
+        stats.update([{"componentID": "c1", "timestamp": t, "a": a, "b": 5.0,
+                       "sensorTimestamps": {"a": t, "b": "t1"}}])
+
+    assert list(stats.count[0]) == [3, 1]
+    assert stats.mean[0, 0] == pytest.approx(2.0)
+    assert stats.update([{"componentID": "c1", "timestamp": "t4", "a": 3.0, "b": 5.0,
+                          "sensorTimestamps": {"a": "t3", "b": "t1"}}]) == 0
@@ -0,0 +1,33 @@
+import numpy as np
+
+from app.services.telemetry_history import lttb
+
+
+def test_lttb_returns_input_when_not_reducing():
+    x, y = np.arange(5.0), np.arange(5.0) ** 2
+    out_x, out_y = lttb(x, y, 10)
+    np.testing.assert_array_equal(out_x, x)
+    np.testing.assert_array_equal(out_y, y)
+
+
+def test_lttb_keeps_endpoints_and_order():
+    x = np.arange(1000.0)
+    y = np.sin(x / 50.0)
+    out_x, out_y = lttb(x, y, 50)
+
+    assert len(out_x) == len(out_y) == 50
+    assert out_x[0] == 0.0 and out_x[-1] == 999.0
+    assert np.all(np.diff(out_x) > 0)
+    # Every output point is one of the input points
+    np.testing.assert_array_equal(out_y, y[out_x.astype(int)])
+
+
+def test_lttb_keeps_spikes():
+    x = np.arange(500.0)
+    y = np.zeros(500)
+    y[137] = 100.0
+    y[401] = -100.0
+    out_x, _ = lttb(x, y, 20)
+
+    assert 137.0 in out_x
+    assert 401.0 in out_x
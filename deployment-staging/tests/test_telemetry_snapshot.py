@@ -0,0 +1,48 @@
+from app.services.telemetry_snapshot import diff_payloads
+
+
+def _payload(*rows):
+    return {"data": list(rows)}
+
+
+def test_diff_reports_changed_readings_only():
+    old = _payload({"componentID": "c1", "temperature": 20.0, "pressure": 1.0, "timestamp": "t0"})
+    new = _payload({"componentID": "c1", "temperature": 21.0, "pressure": 1.0, "timestamp": "t1"})
+
+    assert diff_payloads(old, new) == [
+        {"componentID": "c1", "sensor": "temperature", "value": 21.0, "timestamp": "t1"},
+    ]
+
+
+def test_diff_reports_removed_components_and_sensors():
+    old = _payload(
+        {"componentID": "c1", "temperature": 20.0, "pressure": 1.0, "timestamp": "t0"},
+        {"componentID": "c2", "temperature": 30.0, "timestamp": "t0"},
+    )
+    new = _payload({"componentID": "c1", "temperature": 20.0, "timestamp": "t1"})
+
+    assert diff_payloads(old, new) == [
+        {"componentID": "c1", "sensor": "pressure", "removed": True, "timestamp": "t1"},
+        {"componentID": "c2", "removed": True, "timestamp": "t0"},
+    ]
+
+
+def test_diff_reports_sensors_that_become_missing_as_removed():
+    # _payload reports a null reading as 0.0 and lists it under missingSensors
+    old = _payload({"componentID": "c1", "temperature": 20.0, "pressure": 1.0, "timestamp": "t0"})
+    new = _payload({"componentID": "c1", "temperature": 0.0, "pressure": 1.0, "timestamp": "t1",
+                    "missingSensors": ["temperature"]})
+    assert diff_payloads(old, new) == [
+        {"componentID": "c1", "sensor": "temperature", "removed": True, "timestamp": "t1"},
+    ]
+
+    # Still missing: nothing to report
+    later = _payload({"componentID": "c1", "temperature": 0.0, "pressure": 1.0, "timestamp": "t2",
+                      "missingSensors": ["temperature"]})
+    assert diff_payloads(new, later) == []
+
+    # Reported again, even with a value equal to the placeholder
+    back = _payload({"componentID": "c1", "temperature": 0.0, "pressure": 1.0, "timestamp": "t3"})
+    assert diff_payloads(later, back) == [
+        {"componentID": "c1", "sensor": "temperature", "value": 0.0, "timestamp": "t3"},
+    ]
@@ -0,0 +1,110 @@
+import re
+import sqlite3
+from contextlib import contextmanager, nullcontext
+
+import pytest
+from flask import Flask
+from werkzeug.datastructures import MultiDict
+
+from app.services import triples
+from app.services.rdf_writer import RDF_TYPE_URI
+from app.services.triples import TripleFilter
+
+
+def _like(pattern: str, value: str) -> bool:
+    """LIKE with the default backslash escape, as Postgres and Databricks SQL evaluate it"""
+    regex = []
+    chars = iter(pattern)
+    for c in chars:
+        if c == "\\":
+            regex.append(re.escape(next(chars)))
+        elif c == "%":
+            regex.append(".*")
+        elif c == "_":
+            regex.append(".")
+        else:
+            regex.append(re.escape(c))
+    return re.fullmatch("".join(regex), value, re.DOTALL) is not None
+
+
+def _where(triple_filter):
+    return triple_filter.where(lambda name: f":{name}", "SELECT s FROM t WHERE o IN ({types})")
+
+
+@pytest.mark.parametrize("prefix, matching, other", [
+    ("http://example.com/factory/component_1", "http://example.com/factory/component_1/a",
+     "http://example.com/factory/componentX1"),
+    ("http://example.com/100%", "http://example.com/100%/a", "http://example.com/100-percent"),
+    ("urn:a\\b", "urn:a\\b/c", "urn:ab"),
+])
+def test_subject_prefix_wildcards_are_escaped(prefix, matching, other):
+    where, params = _where(TripleFilter(subject_prefix=prefix))
+
+    assert where == "s LIKE :subject_prefix0"
+    pattern = params["subject_prefix0"]
+    assert _like(pattern, prefix)
+    assert _like(pattern, matching)
+    assert not _like(pattern, other)
+
+
+def test_clauses_are_anded_and_values_bound():
+    where, params = _where(TripleFilter(
+        subjects=["s1", "s2"], predicates=[RDF_TYPE_URI, "p1"], types=["T"]))
+
+    assert where == ("s IN (:subject0, :subject1) AND p IN (:predicate0, :predicate1) "
+                     "AND s IN (SELECT s FROM t WHERE o IN (:type0))")
+    assert params == {"subject0": "s1", "subject1": "s2", "predicate0": "rdf:type", "predicate1": "p1", "type0": "T"}
+
+
+def test_from_args():
+    assert TripleFilter.from_args(MultiDict()) is None
+    triple_filter = TripleFilter.from_args(MultiDict([("predicate", "p1"), ("predicate", "p2")]))
+    assert triple_filter.predicates == ["p1", "p2"]
+
+
+class _SqliteConnection:
+    """Warehouse stand-in running the query on SQLite, whose window functions match"""
+
+    def __init__(self, rows):
+        self._conn = sqlite3.connect(":memory:")
+        self._conn.execute("CREATE TABLE triples (s TEXT, p TEXT, o TEXT, timestamp TEXT)")
+        self._conn.executemany("INSERT INTO triples VALUES (?, ?, ?, ?)", rows)
+
+    @contextmanager
+    def cursor(self):
+        cursor = self._conn.cursor()
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+
+
+def test_diff_dbsql(monkeypatch):
+    history = [
+        # unchanged inside the window
+        ("c1", "label", "one", "2024-01-01"),
+        # changed inside the window, twice
+        ("c2", "speed", "10", "2024-01-01"),
+        ("c2", "speed", "20", "2024-01-05"),
+        ("c2", "speed", "30", "2024-01-06"),
+        # written back to its old value
+        ("c3", "speed", "5", "2024-01-01"),
+        ("c3", "speed", "6", "2024-01-04"),
+        ("c3", "speed", "5", "2024-01-05"),
+        # new inside the window
+        ("c4", "rdf:type", "Component", "2024-01-04"),
+        # changed after the window
+        ("c5", "speed", "1", "2024-01-01"),
+        ("c5", "speed", "2", "2024-01-20"),
+    ]
+    conn = _SqliteConnection(history)
+    monkeypatch.setattr(triples, "HAS_ARROW", False)
+    monkeypatch.setattr(triples, "dbsql_connection", lambda *args: nullcontext(conn))
+
+    app = Flask(__name__)
+    app.config.update(WAREHOUSE_HTTP=None, DBX_TRIPLE_TABLE="triples")
+    with app.app_context():
+        added, removed = triples.diff_dbsql("2024-01-02", "2024-01-10")
+
+    assert added == [("c2", "speed", "30"), ("c4", "rdf:type", "Component")]
+    assert removed == [("c2", "speed", "10")]
@@ -1,9 +1,52 @@
+// Most component ids the backend accepts per /api/async/telemetry/components call (TELEMETRY_COMPONENTS_MAX_IDS)
+const COMPONENTS_BATCH_SIZE = 1000;
+
 class TelemetryService {
   constructor() {
     this.backendBaseUrl = process.env.REACT_APP_BACKEND_URL || 'http://localhost:8080';
 
   }
 
+  async fetchComponentsTelemetry(componentIDs) {
+    // Only the requested components, in batches the backend accepts
+    const batches = [];
+    for (let i = 0; i < componentIDs.length; i += COMPONENTS_BATCH_SIZE) {
+      batches.push(componentIDs.slice(i, i + COMPONENTS_BATCH_SIZE));
+    }
+
+    try {
+      const results = await Promise.all(batches.map(async batch => {
+        const ids = encodeURIComponent(batch.join(','));
+        const response = await fetch(`${this.backendBaseUrl}/api/async/telemetry/components?ids=${ids}`);
+        if (!response.ok) {
+          throw new Error(`Backend error: ${response.status}`);
+        }
+        return response.json();
+      }));
+
+      const data = results.flatMap(result => result.data);
+      console.log(`✅ Retrieved telemetry for ${data.length} of ${componentIDs.length} components`);
+      return {
+        success: true,
+        data,
+        count: data.length,
+        missing: results.flatMap(result => result.missing),
+        source: results.length > 0 ? results[0].source : undefined,
+        method: 'backend-proxy'
+      };
+
+    } catch (error) {
+      console.error('❌ Failed to fetch component telemetry via backend:', error);
+
+      return {
+        success: false,
+        error: error.message,
+        method: 'backend-proxy',
+        fallback: 'mock-data'
+      };
+    }
+  }
+
   async testConnection() {
     try {
       console.log('🔄 Testing Databricks connection via backend...');
@@ -49,7 +92,7 @@ class TelemetryService {
 
       // Try RDF triples endpoint first (preferred for semantic data)
       try {
-        const triplesResponse = await fetch(`${this.backendBaseUrl}/api/telemetry/triples`);
+        const triplesResponse = await fetch(`${this.backendBaseUrl}/api/async/telemetry/triples`);
         if (triplesResponse.ok) {
           const triplesResult = await triplesResponse.json();
           if (triplesResult.success !== false && triplesResult.data && triplesResult.data.length > 0) {
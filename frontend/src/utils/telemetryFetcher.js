@@ -51,21 +51,13 @@ export class TelemetryFetcher {
     // Always use secure backend proxy
     try {
       console.log(`📡 Fetching telemetry for component ${componentID} via backend proxy`);
-      const result = await this.telemetryService.fetchLatestTelemetry();
-
-      if (result.success && result.data && result.data.length > 0) {
-        const componentData = result.data.find(data => data.componentID === componentID);
-        if (componentData) {
-          console.log(`✅ Found telemetry data for component ${componentID}`);
-          return componentData;
-        } else {
-          console.warn(`⚠️  No data for component ${componentID}. Available: ${result.data.map(d => d.componentID).join(', ')}`);
-          return null;
-        }
-      } else {
-        console.warn('⚠️  Backend returned no telemetry data, using mock data');
-        throw new Error('No telemetry data from backend');
+      const componentData = await this.requestComponent(componentID);
+      if (componentData) {
+        console.log(`✅ Found telemetry data for component ${componentID}`);
+        return componentData;
       }
+      console.warn(`⚠️  No data for component ${componentID}`);
+      return null;
     } catch (error) {
       console.error('❌ Backend unavailable, using mock data:', error.message);
     }
@@ -81,6 +73,34 @@ export class TelemetryFetcher {
     return componentData[0] || null;
   }
 
+  requestComponent(componentID) {
+    // Components requested in the same tick share one /api/async/telemetry/components call
+    if (!this.pendingComponents) {
+      this.pendingComponents = new Map();
+      Promise.resolve().then(() => this.flushComponents());
+    }
+    if (!this.pendingComponents.has(componentID)) {
+      let resolve, reject;
+      const promise = new Promise((res, rej) => { resolve = res; reject = rej; });
+      this.pendingComponents.set(componentID, { promise, resolve, reject });
+    }
+    return this.pendingComponents.get(componentID).promise;
+  }
+
+  async flushComponents() {
+    const pending = this.pendingComponents;
+    this.pendingComponents = null;
+
+    const result = await this.telemetryService.fetchComponentsTelemetry([...pending.keys()]);
+    if (!result.success) {
+      const error = new Error(result.error || 'No telemetry data from backend');
+      pending.forEach(request => request.reject(error));
+      return;
+    }
+    const byComponent = new Map(result.data.map(data => [data.componentID, data]));
+    pending.forEach((request, componentID) => request.resolve(byComponent.get(componentID) || null));
+  }
+
   async fetchHistoricalTelemetry(componentID, startTime, endTime) {
     // Use mock data for historical telemetry (backend endpoint for historical data can be added)
     console.log(`📊 Fetching historical telemetry for ${componentID} (${startTime} to ${endTime})`);